@@ -0,0 +1,218 @@
+"""
+History Stats Benchmark - /history/stats queries, old and new
+Seeds one user's history and times the eleven count_documents calls the
+route used to make, the single $facet aggregation it falls back to, and the
+usage_daily rollups it reads when they exist.
+
+Usage:
+    python benchmarks/history_stats.py
+    python benchmarks/history_stats.py --sizes 1000,10000 --repeats 20
+    python benchmarks/history_stats.py --mongo-uri mongodb://localhost:27017
+
+The in-memory mock has no network, so it hides the round trips this change
+removes; use --mongo-uri for numbers that match production.
+Results are written to benchmarks/results/ as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.load_server import RESULTS_DIR, percentile, git_commit
+from routes.history_routes import history_stats_pipeline, stats_from_rollups
+from database.models import rebuild_usage_rollups
+
+ACTIONS = ["tts", "tts", "tts", "sts", "voice_cloning"]
+
+
+async def seed(db, user_id: str, count: int, rng: random.Random):
+    """Insert `count` history items spread over the last 90 days"""
+    now = datetime.now(timezone.utc)
+    await db.history.delete_many({"user_id": user_id})
+    docs = [
+        {
+            "user_id": user_id,
+            "action": rng.choice(ACTIONS),
+            "text": "السلام علیکم",
+            "credits_used": 12,
+            "created_at": now - timedelta(seconds=rng.uniform(0, 90 * 86400))
+        }
+        for _ in range(count)
+    ]
+    for offset in range(0, len(docs), 10000):
+        await db.history.insert_many(docs[offset:offset + 10000])
+
+
+async def legacy_stats(db, user_id: str) -> dict:
+    """The queries /history/stats made before the aggregation"""
+    tts_count = await db.history.count_documents({"user_id": user_id, "action": "tts"})
+    sts_count = await db.history.count_documents({"user_id": user_id, "action": "sts"})
+    clone_count = await db.history.count_documents({"user_id": user_id, "action": "voice_cloning"})
+
+    week_ago = datetime.now(timezone.utc) - timedelta(days=7)
+    recent_count = await db.history.count_documents({"user_id": user_id, "created_at": {"$gte": week_ago}})
+
+    daily = []
+    for i in range(7):
+        day_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=i)
+        day_end = day_start + timedelta(days=1)
+        daily.append(await db.history.count_documents({
+            "user_id": user_id,
+            "created_at": {"$gte": day_start, "$lt": day_end}
+        }))
+
+    return {"tts": tts_count, "sts": sts_count, "voice_cloning": clone_count, "recent": recent_count, "daily": daily[::-1]}
+
+
+async def facet_stats(db, user_id: str) -> dict:
+    """The single aggregation the route runs now (UTC, 7 days)"""
+    now = datetime.now(timezone.utc)
+    first_day = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=6)
+    result = await db.history.aggregate(
+        history_stats_pipeline(user_id, now - timedelta(days=7), first_day, "UTC")
+    ).to_list(1)
+    facets = result[0]
+
+    by_action = {row["_id"]: row["count"] for row in facets["by_action"]}
+    per_day = {row["_id"]: row["count"] for row in facets["daily"]}
+    return {
+        "tts": by_action.get("tts", 0),
+        "sts": by_action.get("sts", 0),
+        "voice_cloning": by_action.get("voice_cloning", 0),
+        "recent": facets["recent"][0]["count"] if facets["recent"] else 0,
+        "daily": [per_day.get((first_day + timedelta(days=i)).strftime("%Y-%m-%d"), 0) for i in range(7)]
+    }
+
+
+async def rollup_stats(db, user_id: str) -> dict:
+    """The rollup read the route prefers (UTC, 7 days)"""
+    now = datetime.now(timezone.utc)
+    first_day = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=6)
+    by_action, recent, per_day = await stats_from_rollups(
+        db, user_id, ZoneInfo("UTC"), first_day, now - timedelta(days=7), now
+    )
+    return {
+        "tts": by_action.get("tts", 0),
+        "sts": by_action.get("sts", 0),
+        "voice_cloning": by_action.get("voice_cloning", 0),
+        "recent": recent,  # Exact to the hour, so not compared
+        "daily": [per_day.get((first_day + timedelta(days=i)).strftime("%Y-%m-%d"), 0) for i in range(7)]
+    }
+
+
+async def time_variant(fn, db, user_id: str, repeats: int) -> dict:
+    await fn(db, user_id)  # Warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await fn(db, user_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "repeats": repeats,
+        "p50_ms": round(percentile(timings, 0.50), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "max_ms": round(timings[-1], 2)
+    }
+
+
+async def run(db, args) -> dict:
+    rng = random.Random(args.seed)
+    user_id = f"history-stats-{args.seed}"
+    results = {}
+
+    for size in args.sizes:
+        print(f"🌱 Seeding {size:,} history items")
+        await seed(db, user_id, size, rng)
+
+        await rebuild_usage_rollups(db, user_id)
+
+        expected = await legacy_stats(db, user_id)
+        if await facet_stats(db, user_id) != expected:
+            sys.exit(f"❌ Aggregation and count_documents disagree at {size:,} items")
+        rolled = await rollup_stats(db, user_id)
+        if {**rolled, "recent": expected["recent"]} != expected:
+            sys.exit(f"❌ Rollups and count_documents disagree at {size:,} items")
+
+        results[str(size)] = {
+            "count_documents": await time_variant(legacy_stats, db, user_id, args.repeats),
+            "aggregate": await time_variant(facet_stats, db, user_id, args.repeats),
+            "rollups": await time_variant(rollup_stats, db, user_id, args.repeats)
+        }
+
+    await db.history.delete_many({"user_id": user_id})
+    await db.usage_daily.delete_many({"user_id": user_id})
+    return results
+
+
+def print_report(results: dict):
+    print(f"\n{'items':>10}  {'queries':<16}{'p50':>10}{'p95':>10}{'max':>10}")
+    for size, variants in results.items():
+        for name, r in variants.items():
+            print(f"{int(size):>10,}  {name:<16}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['max_ms']:>10.1f}")
+        for name in ("aggregate", "rollups"):
+            speedup = variants["count_documents"]["p50_ms"] / max(variants[name]["p50_ms"], 1e-6)
+            print(f"{'':>10}  {name} is {speedup:.1f}x faster at p50")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time /history/stats queries: count_documents, one aggregation and rollups")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated history sizes for one user")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed runs per size and variant")
+    parser.add_argument("--mongo-uri", help="Use this MongoDB instead of an in-memory mock")
+    parser.add_argument("--database", default="versona_benchmark", help="Database name with --mongo-uri")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/history-stats-<timestamp>.json)")
+    args = parser.parse_args()
+    args.sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongo_uri)[args.database]
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("❌ mongomock-motor is not installed; pass --mongo-uri or pip install -r benchmarks/requirements.txt")
+        db = AsyncMongoMockClient()[args.database]
+
+    async def run_with_index():
+        await db.history.create_index([("user_id", 1), ("created_at", -1)])
+        await db.usage_daily.create_index([("user_id", 1), ("date", 1)], unique=True)
+        return await run(db, args)
+
+    results = asyncio.run(run_with_index())
+    print_report(results)
+
+    result = {
+        "benchmark": "history_stats",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "sizes": args.sizes,
+            "repeats": args.repeats,
+            "database": "mongodb" if args.mongo_uri else "mongomock"
+        },
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"history-stats-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
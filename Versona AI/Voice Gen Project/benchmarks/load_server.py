@@ -0,0 +1,413 @@
+"""
+Load Benchmark - Throughput and latency percentiles for the API server
+Boots server:app under uvicorn against the local ElevenLabs stand-in and a
+mock (or local) MongoDB, then replays a mix of user journeys with many
+concurrent virtual users.
+
+Usage:
+    python benchmarks/load_server.py --users 50 --duration 60
+    python benchmarks/load_server.py --mongo-uri mongodb://localhost:27017
+    python benchmarks/load_server.py --target http://localhost:8000 --mongo-uri ...
+    python benchmarks/load_server.py --compare benchmarks/results/load-previous.json
+
+Each virtual user signs up, logs in, then loops over a weighted mix of
+/tts/tts/generate/, /sts/convert/, /history/ and /history/stats.
+Results are written to benchmarks/results/ as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+sys.path.insert(0, PROJECT_DIR)
+
+# Route -> relative weight in the request mix
+DEFAULT_MIX = {
+    "tts_generate": 5,
+    "sts_convert": 1,
+    "history_list": 3,
+    "history_stats": 1
+}
+
+# Short Urdu vocabulary used to build request texts
+URDU_WORDS = [
+    "السلام", "علیکم", "آپ", "کیسے", "ہیں", "میں", "ٹھیک", "ہوں", "شکریہ", "پاکستان",
+    "زندہ", "باد", "آج", "کا", "دن", "بہت", "خوبصورت", "ہے", "خوش", "آمدید",
+    "مدد", "کیجیے", "براہ", "کرم", "انتظار", "کریں", "آپ کی", "کال", "اہم", "ہمارے"
+]
+
+# Texts that many users send (IVR greetings, menu prompts)
+POPULAR_TEXTS = [
+    "السلام علیکم، خوش آمدید۔",
+    "براہ کرم انتظار کریں۔",
+    "آپ کی کال ہمارے لیے اہم ہے۔",
+    "آپ کا شکریہ۔"
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+# ==================== Servers ====================
+
+class ThreadedServer:
+    """Run an ASGI app under uvicorn in a background thread"""
+
+    def __init__(self, app, port: int):
+        import uvicorn
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.server.install_signal_handlers = lambda: None
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.url = f"http://127.0.0.1:{port}"
+
+    def start(self, timeout: float = 30):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError(f"Server at {self.url} did not start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def boot(args):
+    """
+    Start the fake provider and (unless --target is given) the API server.
+
+    Returns:
+        (api_url, database handle usable from the load loop, servers to stop)
+    """
+    from execution.fake_elevenlabs import FakeConfig, create_fake_app
+
+    servers = []
+    fake = ThreadedServer(create_fake_app(FakeConfig(
+        latency=args.provider_latency,
+        error_rate=args.provider_error_rate,
+        rate_limit_rate=args.provider_429_rate,
+        max_concurrency=args.provider_concurrency,
+        tier=args.provider_tier,
+        seed=args.seed
+    )), free_port()).start()
+    servers.append(fake)
+
+    if args.target:
+        print(f"🎯 Target: {args.target} (fake provider at {fake.url}/v1 is unused unless the target points at it)")
+    else:
+        # Configuration is read at import time, so set it before importing the server
+        os.environ["ELEVENLABS_BASE_URL"] = f"{fake.url}/v1"
+        os.environ.setdefault("ELEVENLABS_API_KEY", "fake-benchmark-key")
+        os.environ["PREWARM_ENABLED"] = "false"
+        if not args.warm_cache:
+            os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-tts-")
+            os.environ["PHRASE_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-phrases-")
+        if args.mongo_uri:
+            os.environ["MONGODB_URI"] = args.mongo_uri
+            os.environ["DATABASE_NAME"] = args.database
+
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongo_uri)[args.database]
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("❌ mongomock-motor is not installed; pass --mongo-uri or pip install -r benchmarks/requirements.txt")
+        db = AsyncMongoMockClient()[args.database]
+
+    if args.target:
+        return args.target.rstrip("/"), db, servers, fake
+
+    os.chdir(PROJECT_DIR)
+    import server
+    import database.connection as connection
+
+    if not args.mongo_uri:
+        # Share the in-memory database between the server thread and the load loop
+        async def use_mock_database():
+            connection.database = db
+            await connection.create_indexes()
+            return db
+
+        async def keep_mock_database():
+            pass
+
+        server.connect_to_mongodb = use_mock_database
+        server.close_mongodb_connection = keep_mock_database
+
+    api = ThreadedServer(server.app, free_port()).start()
+    servers.append(api)
+    return api.url, db, servers, fake
+
+
+# ==================== Virtual Users ====================
+
+class Recorder:
+    """Latency samples and failures per route"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.status_codes = {}
+
+    def record(self, route: str, seconds: float, status_code: int):
+        codes = self.status_codes.setdefault(route, {})
+        codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+        if 200 <= status_code < 300:
+            self.samples.setdefault(route, []).append(seconds)
+        else:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(route, []))
+            errors = self.errors.get(route, 0)
+            total = len(values) + errors
+            routes[route] = {
+                "requests": total,
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0,
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1) if values else 0,
+                "status_codes": self.status_codes.get(route, {})
+            }
+        return routes
+
+
+def random_text(rng: random.Random, repeat_ratio: float) -> str:
+    if rng.random() < repeat_ratio:
+        return rng.choice(POPULAR_TEXTS)
+    words = [rng.choice(URDU_WORDS) for _ in range(rng.randint(4, 40))]
+    return " ".join(words) + "۔"
+
+
+async def virtual_user(index: int, client, db, recorder: Recorder, args, stop_at: float, rng: random.Random):
+    import httpx
+
+    async def timed(route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 599
+        recorder.record(route, time.perf_counter() - started, status)
+        return response
+
+    email = f"bench-{args.run_id}-{index}@example.com"
+    password = "benchmark-password"
+
+    response = await timed("signup", "POST", "/api/signup/", json={
+        "username": f"bench{index}", "Email": email, "password": password
+    })
+    if response is None or response.status_code != 200:
+        return
+
+    # Enough credits for the whole run
+    await db.users.update_one({"email": email}, {"$set": {"credits_limit": 10 ** 9}})
+
+    response = await timed("login", "POST", "/api/login/", json={"Email": email, "password": password})
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    from execution.fake_elevenlabs import mp3_frames
+    sts_audio = mp3_frames(3)
+
+    routes = list(args.mix)
+    weights = [args.mix[r] for r in routes]
+
+    while time.monotonic() < stop_at:
+        route = rng.choices(routes, weights)[0]
+
+        if route == "tts_generate":
+            await timed(route, "POST", "/tts/tts/generate/", headers=headers, json={
+                "text": random_text(rng, args.repeat_ratio), "mode": "manual"
+            })
+        elif route == "sts_convert":
+            await timed(route, "POST", "/sts/convert/", headers=headers,
+                        files={"file": ("input.mp3", sts_audio, "audio/mpeg")},
+                        data={"voice_type": rng.choice(["male", "female"])})
+        elif route == "history_list":
+            await timed(route, "GET", "/history/", headers=headers, params={"limit": 20})
+        elif route == "history_stats":
+            await timed(route, "GET", "/history/stats", headers=headers)
+
+        if args.think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+
+async def run_load(api_url: str, db, args) -> tuple:
+    import httpx
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.timeout, limits=limits) as client:
+        started = time.monotonic()
+        stop_at = started + args.duration
+        users = []
+        for i in range(args.users):
+            users.append(asyncio.create_task(
+                virtual_user(i, client, db, recorder, args, stop_at, random.Random(f"{args.seed}-{i}"))
+            ))
+            if args.ramp_up:
+                await asyncio.sleep(args.ramp_up / args.users)
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - started
+
+    return recorder, elapsed
+
+
+# ==================== Reporting ====================
+
+def print_report(routes: dict, elapsed: float):
+    print(f"\n{'route':<16}{'reqs':>8}{'err%':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, r in routes.items():
+        print(
+            f"{route:<16}{r['requests']:>8}{r['error_rate'] * 100:>7.1f}%{r['throughput_rps']:>9.1f}"
+            f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}"
+        )
+    total = sum(r["requests"] for r in routes.values())
+    print(f"\nTotal: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), latencies in ms")
+
+
+def print_comparison(current: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\n📈 Compared with {os.path.basename(baseline_path)} ({baseline.get('commit') or 'unknown commit'})")
+    print(f"{'route':<16}{'rps':>14}{'p95 ms':>16}{'p99 ms':>16}")
+    for route, r in current["routes"].items():
+        old = baseline.get("routes", {}).get(route)
+        if not old:
+            continue
+
+        def delta(new, previous):
+            if not previous:
+                return f"{new:>8.1f}      "
+            return f"{new:>8.1f} {((new - previous) / previous) * 100:>+5.0f}%"
+
+        print(f"{route:<16}{delta(r['throughput_rps'], old['throughput_rps']):>14}"
+              f"{delta(r['p95_ms'], old['p95_ms']):>16}{delta(r['p99_ms'], old['p99_ms']):>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the Versona AI API server")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load after signup")
+    parser.add_argument("--ramp-up", type=float, default=2, help="Seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=60, help="Client timeout per request")
+    parser.add_argument("--mix", help="Weights, e.g. tts_generate=5,sts_convert=1,history_list=3,history_stats=1")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="Share of TTS texts drawn from a small popular set")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the configured audio caches instead of starting cold")
+    parser.add_argument("--target", help="Benchmark an already running server instead of booting one")
+    parser.add_argument("--mongo-uri", help="Use this MongoDB instead of an in-memory mock")
+    parser.add_argument("--database", default="versona_benchmark", help="Database name (default: versona_benchmark)")
+    parser.add_argument("--provider-latency", default="lognormal:300,0.5", help="Fake ElevenLabs latency distribution")
+    parser.add_argument("--provider-error-rate", type=float, default=0.0)
+    parser.add_argument("--provider-429-rate", type=float, default=0.0)
+    parser.add_argument("--provider-concurrency", type=int, default=0, help="Fake plan concurrency cap (0 = none)")
+    parser.add_argument("--provider-tier", default="creator")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    args = parser.parse_args()
+
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        mix = {}
+        for part in args.mix.split(","):
+            route, _, weight = part.partition("=")
+            if route.strip() not in DEFAULT_MIX:
+                parser.error(f"Unknown route in --mix: {route}")
+            mix[route.strip()] = float(weight or 1)
+    args.mix = mix
+    args.run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    print(f"🚀 Booting benchmark ({args.users} users, {args.duration:.0f}s)")
+    api_url, db, servers, fake = boot(args)
+
+    try:
+        recorder, elapsed = asyncio.run(run_load(api_url, db, args))
+    finally:
+        for s in reversed(servers):
+            s.stop()
+
+    routes = recorder.report(elapsed)
+    result = {
+        "benchmark": "load_server",
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "users": args.users,
+            "duration": args.duration,
+            "think_ms": args.think_ms,
+            "mix": args.mix,
+            "repeat_ratio": args.repeat_ratio,
+            "target": args.target,
+            "database": "mongodb" if args.mongo_uri else "mongomock",
+            "provider_latency": args.provider_latency,
+            "provider_error_rate": args.provider_error_rate,
+            "provider_429_rate": args.provider_429_rate,
+            "provider_concurrency": args.provider_concurrency
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "routes": routes
+    }
+
+    print_report(routes, elapsed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{args.run_id}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved: {output}")
+
+    if args.compare:
+        print_comparison(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Login Storm Benchmark - Login throughput and its effect on TTS latency
+Boots the server like load_server.py, then measures /tts/tts/generate/
+latency twice: alone, and while many clients log in at once. Password
+hashing is slow on purpose (scrypt); this shows whether it stays off the
+event loop that serves everything else.
+
+Usage:
+    python benchmarks/login_storm.py
+    python benchmarks/login_storm.py --logins 64 --tts-users 8 --duration 10
+    python benchmarks/login_storm.py --inline-hashing    # hash on the event loop, for comparison
+
+Results are written to benchmarks/results/ as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.load_server import RESULTS_DIR, POPULAR_TEXTS, Recorder, boot, git_commit
+
+PASSWORD = "benchmark-password"
+
+
+def use_inline_hashing():
+    """Make login verify passwords on the event loop (the behaviour the pool avoids)"""
+    from routes import auth_routes
+    from database.models.user import verify_password
+
+    async def verify_inline(password: str, hashed: str) -> bool:
+        return verify_password(password, hashed)
+
+    auth_routes.verify_password_async = verify_inline
+
+
+async def create_accounts(client, db, count: int, run_id: str) -> list:
+    """Sign up `count` users; returns (email, auth headers) pairs"""
+    accounts = []
+    for i in range(count):
+        email = f"storm-{run_id}-{i}@example.com"
+        response = await client.post("/api/signup/", json={
+            "username": f"storm{i}", "Email": email, "password": PASSWORD
+        })
+        response.raise_for_status()
+        await db.users.update_one({"email": email}, {"$set": {"credits_limit": 10 ** 9}})
+        accounts.append((email, {"Authorization": f"Bearer {response.json()['token']}"}))
+    return accounts
+
+
+async def tts_user(client, headers: dict, recorder: Recorder, stop_at: float, index: int):
+    text = POPULAR_TEXTS[index % len(POPULAR_TEXTS)]
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        response = await client.post("/tts/tts/generate/", headers=headers, json={"text": text})
+        recorder.record("tts_generate", time.perf_counter() - started, response.status_code)
+
+
+async def login_user(client, email: str, recorder: Recorder, stop_at: float):
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        response = await client.post("/api/login/", json={"Email": email, "password": PASSWORD})
+        recorder.record("login", time.perf_counter() - started, response.status_code)
+
+
+async def run_phase(client, accounts: list, args, storm: bool) -> dict:
+    recorder = Recorder()
+    started = time.monotonic()
+    stop_at = started + args.duration
+
+    tasks = [
+        tts_user(client, accounts[i % len(accounts)][1], recorder, stop_at, i)
+        for i in range(args.tts_users)
+    ]
+    if storm:
+        tasks += [
+            login_user(client, accounts[i % len(accounts)][0], recorder, stop_at)
+            for i in range(args.logins)
+        ]
+    await asyncio.gather(*tasks)
+    return recorder.report(time.monotonic() - started)
+
+
+async def run(api_url: str, db, args) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=(args.logins + args.tts_users) * 2)
+    async with httpx.AsyncClient(base_url=api_url, timeout=120, limits=limits) as client:
+        accounts = await create_accounts(client, db, max(args.logins, args.tts_users), args.run_id)
+
+        # Warm the audio cache so TTS latency reflects the server, not the provider
+        await client.post("/tts/batch/", headers=accounts[0][1], json={"texts": POPULAR_TEXTS})
+
+        print(f"🎙️  TTS alone: {args.tts_users} users for {args.duration:.0f}s")
+        quiet = await run_phase(client, accounts, args, storm=False)
+        print(f"🌩️  TTS during a login storm: {args.logins} concurrent logins")
+        storm = await run_phase(client, accounts, args, storm=True)
+
+    return {"quiet": quiet, "storm": storm}
+
+
+def print_report(phases: dict):
+    print(f"\n{'phase':<8}{'route':<14}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for phase, routes in phases.items():
+        for route, r in routes.items():
+            print(
+                f"{phase:<8}{route:<14}{r['requests']:>8}{r['throughput_rps']:>9.1f}"
+                f"{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}{r['p99_ms']:>9.0f}{r['max_ms']:>9.0f}"
+            )
+
+    quiet = phases["quiet"].get("tts_generate", {})
+    storm = phases["storm"].get("tts_generate", {})
+    if quiet.get("p99_ms") and storm.get("p99_ms"):
+        print(f"\nTTS p99 during the storm: {storm['p99_ms'] / quiet['p99_ms']:.1f}x the quiet p99 (latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput and its effect on TTS latency")
+    parser.add_argument("--logins", type=int, default=32, help="Concurrent clients logging in during the storm")
+    parser.add_argument("--tts-users", type=int, default=4, help="Concurrent TTS clients in both phases")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per phase")
+    parser.add_argument("--inline-hashing", action="store_true", help="Verify passwords on the event loop instead of the pool")
+    parser.add_argument("--mongo-uri", help="Use this MongoDB instead of an in-memory mock")
+    parser.add_argument("--database", default="versona_benchmark", help="Database name with --mongo-uri")
+    parser.add_argument("--provider-latency", default="fixed:50", help="Fake ElevenLabs latency distribution")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/login-<timestamp>.json)")
+    args = parser.parse_args()
+
+    # Settings boot() reads that this benchmark does not vary
+    args.target = None
+    args.warm_cache = False
+    args.provider_error_rate = 0.0
+    args.provider_429_rate = 0.0
+    args.provider_concurrency = 0
+    args.provider_tier = "creator"
+    args.run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+    api_url, db, servers, _ = boot(args)
+    if args.inline_hashing:
+        use_inline_hashing()
+
+    try:
+        phases = asyncio.run(run(api_url, db, args))
+    finally:
+        for s in reversed(servers):
+            s.stop()
+
+    print_report(phases)
+
+    from database.models.user import PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P, PASSWORD_HASH_WORKERS
+    result = {
+        "benchmark": "login_storm",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "logins": args.logins,
+            "tts_users": args.tts_users,
+            "duration": args.duration,
+            "inline_hashing": args.inline_hashing,
+            "scrypt": {"n": PASSWORD_SCRYPT_N, "r": PASSWORD_SCRYPT_R, "p": PASSWORD_SCRYPT_P},
+            "hash_workers": PASSWORD_HASH_WORKERS
+        },
+        "phases": phases
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"login-{args.run_id}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Micro-benchmarks - Hot helper functions with a regression gate
+Measures functions that run on every request and compares them with the
+recorded baseline in benchmarks/baselines/micro.json.
+
+Usage:
+    python benchmarks/micro.py                    # compare; exit 1 on regression
+    python benchmarks/micro.py --save-baseline    # record a new baseline
+    python benchmarks/micro.py --filter urdu --threshold 0.15
+
+Throughput is machine dependent: record the baseline on the machine (or CI
+runner class) that runs the gate.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+from datetime import datetime, timezone
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(PROJECT_DIR, "benchmarks", "baselines", "micro.json")
+sys.path.insert(0, PROJECT_DIR)
+
+# Fail when throughput drops by more than this fraction of the baseline
+DEFAULT_THRESHOLD = 0.25
+
+# Realistic Urdu prose with punctuation, digits and a little English
+URDU_PARAGRAPH = (
+    "السلام علیکم، آج کا دن بہت خوبصورت ہے۔ پاکستان کی آبادی 24 کروڑ سے زیادہ ہے؟ "
+    "براہ کرم اپنا OTP کوڈ درج کریں! ہماری سروس 24/7 دستیاب ہے۔\n"
+)
+
+TEXT_SIZES = {
+    "10": 10,
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000
+}
+
+
+def urdu_text(size: int) -> str:
+    repeats = size // len(URDU_PARAGRAPH) + 1
+    return (URDU_PARAGRAPH * repeats)[:size]
+
+
+def legacy_is_urdu_text(text: str) -> bool:
+    """The validator the routes used before execution.urdu_text (two findall scans)"""
+    if not text or not text.strip():
+        return False
+    text_stripped = text.strip()
+    urdu_chars = len(re.findall(r'[\u0600-\u06FF\u0750-\u077F]', text_stripped))
+    total_alpha = len(re.findall(r'[a-zA-Z\u0600-\u06FF\u0750-\u077F]', text_stripped))
+    if total_alpha == 0:
+        return False
+    return urdu_chars / total_alpha >= 0.8
+
+
+# ==================== Cases ====================
+
+def build_cases() -> dict:
+    """Name -> zero-argument callable; setup work happens here, not in the timing"""
+    from bson import ObjectId
+    from execution.urdu_text import is_urdu_text, normalize_text
+    from routes.history_routes import history_item_to_response
+    from database.models.user import hash_password, verify_password, user_to_response
+    from auth.jwt_handler import create_access_token, verify_token
+
+    cases = {}
+
+    for label, size in TEXT_SIZES.items():
+        text = urdu_text(size)
+        cases[f"legacy.is_urdu_text[{label}]"] = lambda text=text: legacy_is_urdu_text(text)
+        cases[f"urdu_text.is_urdu_text[{label}]"] = lambda text=text: is_urdu_text(text)
+        cases[f"urdu_text.normalize_text[{label}]"] = lambda text=text: normalize_text(text)
+
+    # scrypt is slow by design; these track the cost parameters, not a hot path
+    hashed = hash_password("correct horse battery")
+    legacy_hashed = "0123456789abcdef:" + hashlib.sha256(b"correct horse battery0123456789abcdef").hexdigest()
+    cases["hash_password"] = lambda: hash_password("correct horse battery")
+    cases["verify_password"] = lambda: verify_password("correct horse battery", hashed)
+    cases["verify_password[legacy]"] = lambda: verify_password("correct horse battery", legacy_hashed)
+
+    token = create_access_token(str(ObjectId()), "user@example.com")
+    cases["verify_token"] = lambda: verify_token(token)
+
+    now = datetime.now(timezone.utc)
+    user = {
+        "_id": ObjectId(),
+        "email": "user@example.com",
+        "username": "Ayesha",
+        "plan": "pro",
+        "credits_used": 1234,
+        "credits_limit": 50000,
+        "created_at": now
+    }
+    cases["user_to_response"] = lambda: user_to_response(user)
+
+    items = [
+        {
+            "_id": ObjectId(),
+            "user_id": "u",
+            "action": "tts",
+            "mode": "manual",
+            "voice_id": "RwXLkVKnRloV1UPh3Ccx",
+            "text": urdu_text(200) + "...",
+            "full_text_length": 900,
+            "audio_path": ".tmp/audio/tts_0123456789abcdef.mp3",
+            "duration": 12.5,
+            "credits_used": 900,
+            "created_at": now
+        }
+        for _ in range(20)
+    ]
+    cases["history_items_to_response[20]"] = lambda: [history_item_to_response(item) for item in items]
+
+    return cases
+
+
+# ==================== Timing ====================
+
+def measure(fn, min_time: float, repeats: int) -> dict:
+    """
+    Calibrate a loop count that runs for about min_time, then time `repeats`
+    loops and report the best and median throughput.
+    """
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 5 or loops >= 1 << 24:
+            break
+        loops *= 2
+    loops = max(1, int(loops * (min_time / max(elapsed, 1e-9))))
+
+    rates = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rates.append(loops / (time.perf_counter() - started))
+
+    rates.sort()
+    return {
+        "ops_per_sec": round(rates[len(rates) // 2], 2),
+        "best_ops_per_sec": round(rates[-1], 2),
+        "loops": loops,
+        "repeats": repeats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for hot helper functions")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per case (median is used)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed throughput drop before failing (default: 0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--output", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    results = {}
+    regressions = []
+
+    print(f"{'case':<40}{'ops/s':>14}{'baseline':>14}{'change':>9}")
+    for name, fn in cases.items():
+        result = measure(fn, args.min_time, args.repeats)
+        results[name] = result
+
+        old = baseline.get(name)
+        if old:
+            change = (result["ops_per_sec"] - old["ops_per_sec"]) / old["ops_per_sec"]
+            flag = ""
+            if change < -args.threshold:
+                regressions.append(name)
+                flag = "  ❌"
+            print(f"{name:<40}{result['ops_per_sec']:>14,.1f}{old['ops_per_sec']:>14,.1f}{change:>+8.0%}{flag}")
+        else:
+            print(f"{name:<40}{result['ops_per_sec']:>14,.1f}{'-':>14}{'':>9}")
+
+    report = {
+        "benchmark": "micro",
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline) and args.filter:
+            # Only replace the cases that were run
+            with open(args.baseline, encoding="utf-8") as f:
+                previous = json.load(f)
+            previous["cases"].update(results)
+            report["cases"] = previous["cases"]
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved: {args.baseline}")
+        return
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
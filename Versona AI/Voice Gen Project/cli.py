@@ -18,11 +18,15 @@ def main():
         epilog="""
 Examples:
   awaaz tts "ہیلو، آپ کیسے ہیں؟" -o hello.mp3
+  awaaz tts --batch prompts.ndjson -o ivr_audio/
   awaaz stt recording.mp3
   awaaz sts input.mp3 --voice-id YOUR_VOICE_ID
   awaaz clone "My Voice" sample.mp3
   awaaz voices
   awaaz analytics
+  awaaz prewarm --top 50 --budget 5000
+  awaaz rollup-usage
+  awaaz fake-provider --latency lognormal:300,0.5 --error-rate 0.01
   awaaz server
         """
     )
@@ -31,10 +35,12 @@ Examples:
     
     # TTS Command
     tts_parser = subparsers.add_parser('tts', help='Text to Speech')
-    tts_parser.add_argument('text', help='Text to convert to speech')
-    tts_parser.add_argument('-o', '--output', default='output.mp3', help='Output file path')
+    tts_parser.add_argument('text', nargs='?', help='Text to convert to speech')
+    tts_parser.add_argument('-o', '--output', help='Output file path (output directory with --batch)')
     tts_parser.add_argument('-v', '--voice-id', help='Voice ID to use')
     tts_parser.add_argument('--stream', action='store_true', help='Stream audio output')
+    tts_parser.add_argument('--batch', metavar='FILE', help='Batch file: .zip of .txt files, .ndjson/.jsonl, or .txt (one text per line)')
+    tts_parser.add_argument('--concurrency', type=int, help='Texts synthesized at the same time in batch mode')
     
     # STT Command
     stt_parser = subparsers.add_parser('stt', help='Speech to Text')
@@ -63,6 +69,27 @@ Examples:
     analytics_parser = subparsers.add_parser('analytics', help='Show usage analytics')
     analytics_parser.add_argument('--json', action='store_true', help='Output as JSON')
     
+    # Prewarm Command
+    prewarm_parser = subparsers.add_parser('prewarm', help='Prewarm the TTS audio cache')
+    prewarm_parser.add_argument('--top', type=int, help='Number of uncached (text, voice) pairs to warm')
+    prewarm_parser.add_argument('--budget', type=int, help='Maximum characters (credits) to spend')
+    prewarm_parser.add_argument('--no-history', action='store_true', help='Skip popular phrases from MongoDB history')
+    
+    # Usage Rollups Command
+    rollup_parser = subparsers.add_parser('rollup-usage', help='Rebuild daily usage rollups from history')
+    rollup_parser.add_argument('--user', help='Only rebuild this user ID')
+    
+    # Fake Provider Command
+    fake_parser = subparsers.add_parser('fake-provider', help='Run a local ElevenLabs stand-in')
+    fake_parser.add_argument('-p', '--port', type=int, default=8100, help='Port (default: 8100)')
+    fake_parser.add_argument('--host', default='127.0.0.1', help='Host (default: 127.0.0.1)')
+    fake_parser.add_argument('--latency', help='fixed:MS, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA')
+    fake_parser.add_argument('--error-rate', type=float, help='Fraction of calls answered with 500')
+    fake_parser.add_argument('--429-rate', dest='rate_limit_rate', type=float, help='Fraction of calls answered with 429')
+    fake_parser.add_argument('--max-concurrency', type=int, help='Concurrent synthesis calls before 429')
+    fake_parser.add_argument('--tier', help='Subscription tier to report')
+    fake_parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    
     # Server Command
     server_parser = subparsers.add_parser('server', help='Start the API server')
     server_parser.add_argument('-p', '--port', type=int, default=8000, help='Port (default: 8000)')
@@ -87,6 +114,12 @@ Examples:
         cmd_voices(args)
     elif args.command == 'analytics':
         cmd_analytics(args)
+    elif args.command == 'prewarm':
+        cmd_prewarm(args)
+    elif args.command == 'rollup-usage':
+        cmd_rollup_usage(args)
+    elif args.command == 'fake-provider':
+        cmd_fake_provider(args)
     elif args.command == 'server':
         cmd_server(args)
 
@@ -95,12 +128,22 @@ def cmd_tts(args):
     """Text to Speech command"""
     from execution.tts import text_to_speech, text_to_speech_stream
     
+    if args.batch:
+        cmd_tts_batch(args)
+        return
+    
+    if not args.text:
+        print("❌ Error: text is required (or use --batch FILE)")
+        sys.exit(1)
+    
+    args.output = args.output or 'output.mp3'
+    
     print(f"🎤 Converting text to speech...")
     print(f"   Text: {args.text[:50]}{'...' if len(args.text) > 50 else ''}")
     
     try:
         if args.stream:
-            audio = text_to_speech_stream(args.text, args.voice_id)
+            audio = b"".join(text_to_speech_stream(args.text, args.voice_id))
         else:
             audio = text_to_speech(args.text, args.voice_id)
         
@@ -115,6 +158,55 @@ def cmd_tts(args):
         sys.exit(1)
 
 
+def cmd_tts_batch(args):
+    """Batch Text to Speech: one MP3 per text plus manifest.json"""
+    import re
+    import json
+    from execution.batch import parse_batch_file, synthesize_batch, BATCH_CONCURRENCY
+    from execution.elevenlabs_client import run_sync
+    
+    output_dir = args.output or 'batch_output'
+    concurrency = args.concurrency or BATCH_CONCURRENCY
+    
+    try:
+        with open(args.batch, 'rb') as f:
+            items = parse_batch_file(args.batch, f.read())
+        items = [item for item in items if item['text'].strip()]
+        
+        print(f"🎤 Converting {len(items)} texts to speech...")
+        print(f"   Concurrency: {concurrency}, output: {output_dir}")
+        
+        results = run_sync(synthesize_batch([item['text'] for item in items], args.voice_id, concurrency))
+        
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = []
+        for index, (item, audio) in enumerate(zip(items, results)):
+            if isinstance(audio, Exception):
+                print(f"   ❌ {item['id']}: {audio}")
+                manifest.append({"index": index, "id": item['id'], "success": False, "error": str(audio)})
+                continue
+            
+            # Ids come from the input file: keep them from reaching outside output_dir
+            safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", item['id'])[:80]
+            filename = f"{index:04d}_{safe_id}.mp3" if item['id'] != str(index) else f"{index:04d}.mp3"
+            with open(os.path.join(output_dir, filename), 'wb') as f:
+                f.write(audio)
+            manifest.append({"index": index, "id": item['id'], "success": True, "file": filename, "size": len(audio)})
+        
+        with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        
+        succeeded = sum(1 for m in manifest if m['success'])
+        print(f"✅ Saved {succeeded}/{len(items)} files to: {output_dir}")
+        print(f"   Manifest: {os.path.join(output_dir, 'manifest.json')}")
+        if succeeded < len(items):
+            sys.exit(1)
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
 def cmd_stt(args):
     """Speech to Text command"""
     from execution.stt import speech_to_text, transcribe_with_translation, summarize_audio
@@ -277,6 +369,98 @@ def cmd_analytics(args):
         sys.exit(1)
 
 
+def cmd_prewarm(args):
+    """Prewarm audio cache command (run from cron/Task Scheduler to schedule)"""
+    import asyncio
+    from execution.prewarm import prewarm_cache, PREWARM_TOP_N, PREWARM_CREDIT_BUDGET
+    from execution.elevenlabs_client import close_async_client
+    
+    top_n = args.top or PREWARM_TOP_N
+    budget = args.budget or PREWARM_CREDIT_BUDGET
+    
+    print(f"🔥 Prewarming TTS cache...")
+    print(f"   Top pairs: {top_n}, credit budget: {budget:,}")
+    
+    async def run():
+        db = None
+        if not args.no_history:
+            from database.connection import connect_to_mongodb, close_mongodb_connection
+            try:
+                db = await connect_to_mongodb()
+            except Exception:
+                print("   History unavailable, using suggested texts only")
+        try:
+            return await prewarm_cache(db, top_n, budget)
+        finally:
+            await close_async_client()
+            if db is not None:
+                await close_mongodb_connection()
+    
+    try:
+        report = asyncio.run(run())
+        
+        print(f"✅ Synthesized: {report['synthesized']}")
+        print(f"   Already cached: {report['already_cached']}")
+        print(f"   Credits spent: {report['credits_spent']:,}")
+        if report['skipped_budget']:
+            print(f"   Skipped (budget): {report['skipped_budget']}")
+        if report['errors']:
+            print(f"   Errors: {report['errors']}")
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def cmd_rollup_usage(args):
+    """Rebuild usage_daily from history (run once after deploying rollups)"""
+    import asyncio
+    from database.connection import connect_to_mongodb, close_mongodb_connection
+    from database.models import rebuild_usage_rollups
+    
+    print(f"📊 Rebuilding usage rollups{' for ' + args.user if args.user else ''}...")
+    
+    async def run():
+        db = await connect_to_mongodb()
+        try:
+            return await rebuild_usage_rollups(db, args.user)
+        finally:
+            await close_mongodb_connection()
+    
+    try:
+        report = asyncio.run(run())
+        print(f"✅ Users: {report['users']:,}")
+        print(f"   Rollup documents: {report['documents']:,}")
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def cmd_fake_provider(args):
+    """Run the local ElevenLabs stand-in"""
+    import uvicorn
+    from execution.fake_elevenlabs import FakeConfig, create_fake_app
+    
+    overrides = {
+        key: value for key, value in {
+            'latency': args.latency,
+            'error_rate': args.error_rate,
+            'rate_limit_rate': args.rate_limit_rate,
+            'max_concurrency': args.max_concurrency,
+            'tier': args.tier,
+            'seed': args.seed
+        }.items() if value is not None
+    }
+    config = FakeConfig(**overrides)
+    
+    print(f"\n🧪 Starting fake ElevenLabs on http://{args.host}:{args.port}")
+    print(f"   Latency: {config.latency}, errors: {config.error_rate:.1%}, 429s: {config.rate_limit_rate:.1%}")
+    print(f"   Use it with: ELEVENLABS_BASE_URL=http://{args.host}:{args.port}/v1\n")
+    
+    uvicorn.run(create_fake_app(config), host=args.host, port=args.port, log_level="warning")
+
+
 def cmd_server(args):
     """Start API server command"""
     import uvicorn
@@ -62,11 +62,23 @@ async def create_indexes():
     await database.history.create_index("user_id")
     await database.history.create_index("created_at")
     await database.history.create_index([("user_id", 1), ("created_at", -1)])
+    # Keyset pagination seeks on (created_at, _id), newest first
+    await database.history.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
     
     # Voices collection indexes
     await database.voices.create_index("user_id")
     await database.voices.create_index("elevenlabs_id", unique=True, sparse=True)
     
+    # Jobs collection indexes (workers claim by status, users list their own)
+    await database.jobs.create_index([("status", 1), ("created_at", 1)])
+    await database.jobs.create_index([("user_id", 1), ("created_at", -1)])
+    
+    # Credit ledger (one entry per settled reservation)
+    await database.credit_ledger.create_index([("user_id", 1), ("settled_at", -1)])
+    
+    # Daily usage rollups (one document per user and day, plus all-time totals)
+    await database.usage_daily.create_index([("user_id", 1), ("date", 1)], unique=True)
+    
     print("📇 Database indexes created")
 
 
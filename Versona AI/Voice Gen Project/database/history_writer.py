@@ -0,0 +1,331 @@
+"""
+History Writer - Write-behind buffer for history inserts
+Generation routes hand their history documents to this writer and reply as
+soon as the audio is ready; a background task inserts them with insert_many
+when HISTORY_FLUSH_BATCH documents are queued or every
+HISTORY_FLUSH_INTERVAL_MS, whichever comes first.
+
+Durability: if MongoDB is unavailable a batch is appended to a local spill
+file (one JSON document per line) and replayed once inserts succeed again.
+Each process appends to its own file next to HISTORY_SPILL_PATH
+(history_spill.<pid>.jsonl); a replay first renames the file, so later
+spills start a new one, and at start a process also picks up files left by
+earlier runs. Documents get their _id when queued, so a replay never
+inserts twice; when an insert finds documents already there, an earlier
+attempt may have stopped before counting them, so those users' usage
+rollups are rebuilt from history. With the spill file disabled, failed
+batches stay queued and are retried.
+
+Until start() is called (CLI, scripts) writes go straight to MongoDB.
+"""
+
+import os
+import re
+import time
+import uuid
+import asyncio
+from collections import deque
+from dotenv import load_dotenv
+
+from database.models.usage import record_usage, rebuild_usage_rollups
+
+load_dotenv()
+
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "true").lower() == "true"
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+HISTORY_FLUSH_BATCH = int(os.getenv("HISTORY_FLUSH_BATCH", "500"))
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200"))
+HISTORY_SPILL_PATH = os.getenv("HISTORY_SPILL_PATH", ".tmp/history_spill.jsonl")  # empty disables
+
+# Seconds to wait before retrying a failed batch that could not be spilled
+RETRY_SECONDS = 1.0
+
+# Seconds between attempts to replay the spill file while MongoDB is down
+REPLAY_RETRY_SECONDS = 5.0
+
+DUPLICATE_KEY = 11000
+
+
+async def insert_history(db, docs: list) -> int:
+    """
+    Insert history documents and add them to the usage rollups.
+    Documents already present (same _id) are skipped; returns how many were new.
+    """
+    from pymongo.errors import BulkWriteError
+
+    repair = set()
+    try:
+        await db.history.insert_many(docs, ordered=False)
+        inserted = docs
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY for error in errors):
+            raise
+        skipped = {error["index"] for error in errors}
+        inserted = [doc for index, doc in enumerate(docs) if index not in skipped]
+        # Left by an earlier attempt that may have failed before recording usage
+        repair = {docs[index]["user_id"] for index in skipped}
+
+    await record_usage(db, *[doc for doc in inserted if doc["user_id"] not in repair])
+    for user_id in repair:
+        await rebuild_usage_rollups(db, user_id)
+    return len(inserted)
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class HistoryWriter:
+    """Bounded queue of history documents flushed in batches by one task"""
+
+    def __init__(self, max_queue: int, batch_size: int, interval_ms: float, spill_path: str):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000
+        self.spill_dir, self.spill_name = os.path.split(spill_path) if spill_path else (None, None)
+        self.spill_path = self._spill_file(str(os.getpid())) if spill_path else None
+        self._claimed = []  # Renamed spill files waiting to be replayed
+        self._queue = deque()
+        self._task = None
+        self._full = None
+        self._spill_lock = None
+        self._db_getter = None
+        self._spill_pending = False  # spill file may hold documents not in MongoDB
+        self._next_replay = 0.0
+        self.max_depth = 0
+        self.written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.spilled = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ==================== Lifecycle ====================
+
+    async def start(self, db_getter):
+        """Replay any spill file from the last run, then start flushing"""
+        if self._task or not HISTORY_WRITE_BEHIND:
+            return
+        self._db_getter = db_getter
+        self._full = asyncio.Event()
+        self._spill_lock = asyncio.Lock()
+        await self._replay(leftovers=True)
+        self._task = asyncio.create_task(self._run())
+        print(f"🗂️  History writer started (batch {self.batch_size}, every {self.interval * 1000:.0f} ms)")
+
+    async def stop(self):
+        """Flush everything still queued; what cannot be inserted is spilled"""
+        if not self._task:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        while self._queue:
+            batch = self._take()
+            if not await self._flush(batch):
+                if self.spill_path:
+                    await self._spill(batch + self._take(len(self._queue)))
+                else:
+                    print(f"⚠️ History writer dropped {len(batch) + len(self._queue)} unsaved items at shutdown")
+                    self._queue.clear()
+                break
+
+    # ==================== Writes ====================
+
+    async def write(self, db, *docs):
+        """Queue history documents; returns without waiting for MongoDB"""
+        docs = list(docs)
+        if not docs:
+            return
+        if self._task is None:
+            await insert_history(db, docs)
+            return
+
+        from bson import ObjectId
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+
+        # Queue full (MongoDB slow or down): spill, or make this request wait
+        room = max(0, self.max_queue - len(self._queue))
+        overflow = docs[room:]
+        self._queue.extend(docs[:room])
+        self.max_depth = max(self.max_depth, len(self._queue))
+        if len(self._queue) >= self.batch_size:
+            self._full.set()
+
+        if overflow:
+            if self.spill_path:
+                await self._spill(overflow)
+            else:
+                await insert_history(db, overflow)
+                self.written += len(overflow)
+
+    def _take(self, count: int = None) -> list:
+        count = min(count or self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(count)]
+
+    async def _run(self):
+        while True:
+            if len(self._queue) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            while self._queue:
+                batch = self._take()
+                try:
+                    if await self._flush(batch):
+                        continue
+                    if self.spill_path:
+                        await self._spill(batch)
+                        break
+                except asyncio.CancelledError:
+                    # Shutdown: stop() flushes it (a partial insert is skipped by _id)
+                    self._queue.extendleft(reversed(batch))
+                    raise
+                self._queue.extendleft(reversed(batch))
+                await asyncio.sleep(RETRY_SECONDS)
+                break
+
+            if self._spill_pending and time.monotonic() >= self._next_replay:
+                await self._replay()
+
+    async def _flush(self, batch: list) -> bool:
+        """Insert one batch; False if MongoDB failed"""
+        started = time.perf_counter()
+        try:
+            await insert_history(self._db_getter(), batch)
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"⚠️ History flush of {len(batch)} items failed: {e}")
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.written += len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        return True
+
+    # ==================== Spill file ====================
+
+    def _spill_file(self, tag: str) -> str:
+        stem, ext = os.path.splitext(self.spill_name)
+        return os.path.join(self.spill_dir, f"{stem}.{tag}{ext}")
+
+    def _leftover_files(self) -> list:
+        """Spill files of earlier runs (and the single file older versions wrote)"""
+        stem, ext = os.path.splitext(self.spill_name)
+        pattern = re.compile(rf"{re.escape(stem)}(\.[0-9a-f-]+)?{re.escape(ext)}")
+        try:
+            names = os.listdir(self.spill_dir or ".")
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.spill_dir, name) for name in sorted(names) if pattern.fullmatch(name)]
+
+    async def _spill(self, docs: list):
+        from bson import json_util
+
+        lines = "".join(json_util.dumps(doc) + "\n" for doc in docs)
+
+        def append():
+            os.makedirs(self.spill_dir or ".", exist_ok=True)
+            while True:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    try:
+                        current = os.path.samestat(os.fstat(f.fileno()), os.stat(self.spill_path))
+                    except FileNotFoundError:
+                        current = False
+                # Renamed for replay by another process while we wrote: write again,
+                # a replay that already has these documents skips them by _id
+                if current:
+                    return
+
+        async with self._spill_lock:
+            await asyncio.to_thread(append)
+        self.spilled += len(docs)
+        self._spill_pending = True
+        print(f"💾 Spilled {len(docs)} history items to {self.spill_path}")
+
+    async def _replay(self, leftovers: bool = False):
+        """
+        Insert spilled documents. Each file is renamed before it is read, so
+        spills made meanwhile go to a new file; it is removed once all of its
+        documents are in MongoDB.
+        """
+        if not self.spill_path:
+            return
+        from bson import json_util
+
+        def claim(paths):
+            for path in paths:
+                claimed = self._spill_file(f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+                try:
+                    os.replace(path, claimed)
+                except (FileNotFoundError, PermissionError):
+                    continue  # Claimed by another process, or still open on Windows
+                self._claimed.append(claimed)
+
+        def read(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return [json_util.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                return []
+
+        async with self._spill_lock:
+            paths = [p for p in self._leftover_files() if p not in self._claimed] if leftovers else [self.spill_path]
+            await asyncio.to_thread(claim, paths)
+
+        replayed = 0
+        while self._claimed:
+            path = self._claimed[0]
+            docs = await asyncio.to_thread(read, path)
+            try:
+                for offset in range(0, len(docs), self.batch_size):
+                    await insert_history(self._db_getter(), docs[offset:offset + self.batch_size])
+            except Exception as e:
+                print(f"⚠️ History spill replay failed, will retry: {e}")
+                self._spill_pending = True
+                self._next_replay = time.monotonic() + REPLAY_RETRY_SECONDS
+                return
+            await asyncio.to_thread(_discard, path)
+            self._claimed.pop(0)
+            replayed += len(docs)
+
+        self._spill_pending = os.path.exists(self.spill_path)
+        if replayed:
+            print(f"♻️  Replayed {replayed} spilled history items")
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        return {
+            "enabled": self._task is not None,
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "queue_limit": self.max_queue,
+            "written": self.written,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "spilled": self.spilled,
+            "spill_pending": self._spill_pending
+        }
+
+
+# Shared writer for every generation route
+history_writer = HistoryWriter(HISTORY_QUEUE_MAX, HISTORY_FLUSH_BATCH, HISTORY_FLUSH_INTERVAL_MS, HISTORY_SPILL_PATH)
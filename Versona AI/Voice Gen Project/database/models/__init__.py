@@ -12,11 +12,37 @@ from .user import (
     get_user_by_id,
     update_user,
     update_last_login,
+    delete_user,
     increment_credits_used,
     check_credits_available,
+    credits_available,
+    reserve_credits,
+    commit_credits,
+    refund_credits,
     user_to_response,
     hash_password,
-    verify_password
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+    verify_unknown_user_async,
+    needs_rehash
+)
+
+from .job import (
+    create_job,
+    get_job,
+    cancel_job,
+    job_to_response
+)
+
+from .usage import (
+    record_usage,
+    forget_usage,
+    clear_usage,
+    start_usage_rollups,
+    count_history,
+    get_usage_rollups,
+    rebuild_usage_rollups
 )
 
 __all__ = [
@@ -29,9 +55,29 @@ __all__ = [
     "get_user_by_id",
     "update_user",
     "update_last_login",
+    "delete_user",
     "increment_credits_used",
     "check_credits_available",
+    "credits_available",
+    "reserve_credits",
+    "commit_credits",
+    "refund_credits",
     "user_to_response",
     "hash_password",
-    "verify_password"
+    "verify_password",
+    "hash_password_async",
+    "verify_password_async",
+    "verify_unknown_user_async",
+    "needs_rehash",
+    "create_job",
+    "get_job",
+    "cancel_job",
+    "job_to_response",
+    "record_usage",
+    "forget_usage",
+    "clear_usage",
+    "start_usage_rollups",
+    "count_history",
+    "get_usage_rollups",
+    "rebuild_usage_rollups"
 ]
@@ -0,0 +1,260 @@
+"""
+Job Model - Background provider operations (TTS, STS, voice cloning)
+The jobs collection is the queue: workers claim documents atomically, so
+queued work survives restarts and is shared safely between server processes.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+
+# Job lifecycle
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = [JOB_QUEUED, JOB_RUNNING]
+TERMINAL_STATUSES = [JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED]
+
+
+async def create_job(db, user_id: str, kind: str, params: dict) -> dict:
+    """Insert a new queued job"""
+    now = datetime.now(timezone.utc)
+    job_doc = {
+        "user_id": user_id,
+        "kind": kind,
+        "status": JOB_QUEUED,
+        "params": params,
+        "progress": 0.0,
+        "message": "Queued",
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "lease_until": None,
+        "reservation": None,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None
+    }
+
+    result = await db.jobs.insert_one(job_doc)
+    job_doc["_id"] = result.inserted_id
+
+    return job_doc
+
+
+async def get_job(db, job_id: str, user_id: str = None) -> Optional[dict]:
+    """Get a job by ID, optionally restricted to its owner"""
+    from bson import ObjectId
+    try:
+        query = {"_id": ObjectId(job_id)}
+    except Exception:
+        return None
+
+    if user_id:
+        query["user_id"] = user_id
+
+    return await db.jobs.find_one(query)
+
+
+async def claim_next_job(db, lease_seconds: int, max_attempts: int) -> Optional[dict]:
+    """
+    Atomically take the oldest runnable job.
+    Runnable means queued, or running with an expired lease (its worker died).
+    """
+    from pymongo import ReturnDocument
+
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": JOB_QUEUED},
+                {"status": JOB_RUNNING, "lease_until": {"$lt": now}}
+            ],
+            "attempts": {"$lt": max_attempts}
+        },
+        {
+            "$set": {
+                "status": JOB_RUNNING,
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "started_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def fail_exhausted_jobs(db, max_attempts: int) -> int:
+    """Mark jobs that keep crashing their worker as failed"""
+    now = datetime.now(timezone.utc)
+    result = await db.jobs.update_many(
+        {
+            "status": {"$in": ACTIVE_STATUSES},
+            "attempts": {"$gte": max_attempts},
+            "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+        },
+        {"$set": {
+            "status": JOB_FAILED,
+            "error": "Job did not complete after repeated attempts",
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+    return result.modified_count
+
+
+async def renew_job_lease(db, job_id, lease_seconds: int) -> Optional[dict]:
+    """Extend a running job's lease; returns None if it is no longer running"""
+    from pymongo import ReturnDocument
+
+    now = datetime.now(timezone.utc)
+    return await db.jobs.find_one_and_update(
+        {"_id": job_id, "status": JOB_RUNNING},
+        {"$set": {"lease_until": now + timedelta(seconds=lease_seconds), "updated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def release_job(db, job_id):
+    """Put a running job back in the queue without counting the attempt"""
+    await db.jobs.update_one(
+        {"_id": job_id, "status": JOB_RUNNING},
+        {
+            "$set": {
+                "status": JOB_QUEUED,
+                "lease_until": None,
+                "updated_at": datetime.now(timezone.utc)
+            },
+            "$inc": {"attempts": -1}
+        }
+    )
+
+
+async def update_job_progress(db, job_id, progress: float, message: str):
+    """Record progress of a running job"""
+    await db.jobs.update_one(
+        {"_id": job_id, "status": JOB_RUNNING},
+        {"$set": {
+            "progress": round(progress, 3),
+            "message": message,
+            "updated_at": datetime.now(timezone.utc)
+        }}
+    )
+
+
+async def finish_job(db, job_id, status: str, result: dict = None, error: str = None) -> bool:
+    """
+    Move a running job to a terminal status.
+    Returns False if the job was cancelled (or finished) in the meantime.
+    """
+    now = datetime.now(timezone.utc)
+    updates = {
+        "status": status,
+        "lease_until": None,
+        "finished_at": now,
+        "updated_at": now,
+        "error": error
+    }
+    if status == JOB_COMPLETED:
+        updates["progress"] = 1.0
+        updates["message"] = "Completed"
+        updates["result"] = result
+    else:
+        updates["message"] = "Failed"
+
+    outcome = await db.jobs.update_one(
+        {"_id": job_id, "status": JOB_RUNNING},
+        {"$set": updates}
+    )
+    return outcome.modified_count > 0
+
+
+async def hold_job_reservation(db, job_id, reservation: dict):
+    """Record credits reserved for a job, so a resumed attempt reuses them instead of reserving twice"""
+    await db.jobs.update_one({"_id": job_id}, {"$set": {"reservation": reservation}})
+
+
+async def take_job_reservation(db, job_id) -> Optional[dict]:
+    """
+    Remove and return a job's reservation for settling.
+    Atomic, so only one caller settles it; None if it was already settled.
+    """
+    job = await db.jobs.find_one_and_update(
+        {"_id": job_id, "reservation": {"$ne": None}},
+        {"$set": {"reservation": None}},
+        projection={"reservation": 1}
+    )
+    return job["reservation"] if job else None
+
+
+async def settle_abandoned_reservations(db) -> int:
+    """
+    Settle reservations left on finished jobs whose worker died before it
+    could: completed jobs are charged, failed and cancelled ones refunded.
+    """
+    from .user import commit_credits, refund_credits
+
+    now = datetime.now(timezone.utc)
+    settled = 0
+    while True:
+        job = await db.jobs.find_one_and_update(
+            {
+                "status": {"$in": TERMINAL_STATUSES},
+                "reservation": {"$ne": None},
+                "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+            },
+            {"$set": {"reservation": None}},
+            projection={"status": 1, "reservation": 1}
+        )
+        if job is None:
+            return settled
+        if job["status"] == JOB_COMPLETED:
+            await commit_credits(db, job["reservation"])
+        else:
+            await refund_credits(db, job["reservation"])
+        settled += 1
+
+
+async def cancel_job(db, job_id: str, user_id: str) -> bool:
+    """Cancel a queued or running job owned by user_id"""
+    from bson import ObjectId
+
+    now = datetime.now(timezone.utc)
+    result = await db.jobs.update_one(
+        {"_id": ObjectId(job_id), "user_id": user_id, "status": {"$in": ACTIVE_STATUSES}},
+        {"$set": {
+            "status": JOB_CANCELLED,
+            "message": "Cancelled",
+            "lease_until": None,
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+    return result.modified_count > 0
+
+
+def job_to_response(job: dict, base_url: str = "") -> dict:
+    """Convert job document to response format"""
+    result = job.get("result") or {}
+    response = {
+        "id": str(job["_id"]),
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job.get("progress", 0.0),
+        "message": job.get("message"),
+        "error": job.get("error"),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+        "result": dict(result) if result else None
+    }
+
+    if result.get("audio_route"):
+        response["result"]["audio_url"] = f"{base_url}{result['audio_route']}"
+
+    return response
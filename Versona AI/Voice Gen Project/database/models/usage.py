@@ -0,0 +1,225 @@
+"""
+Usage Model - Per-user daily usage rollups
+Each history write also bumps a small usage_daily document for its user and
+UTC day: counts per action, credits, audio seconds and counts per UTC hour
+(so dashboards can re-bucket days into the user's timezone). A row with
+date "all" holds the user's all-time totals. Dashboards read a handful of
+these instead of scanning history.
+
+Rollups are only trusted once they cover a user's whole history: the totals
+row then carries `backfilled_at`, set by a rebuild or when a user starts
+with no history (signup, history cleared). Until then readers get None and
+scan history, so generations made before a rebuild never hide older items.
+
+Rollups are derived data: `python cli.py rollup-usage` rebuilds them from
+history, e.g. after deploying or if an update was lost.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+TOTALS_DATE = "all"
+
+
+def _utc(value: datetime) -> datetime:
+    # MongoDB returns naive UTC datetimes
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def usage_updates(history_docs, sign: int = 1) -> list:
+    """$inc upserts that add (or with sign=-1 remove) history documents from the rollups"""
+    from pymongo import UpdateOne
+
+    increments = {}  # (user_id, date) -> {field: delta}
+    for doc in history_docs:
+        created = _utc(doc["created_at"])
+        delta = {
+            f"counts.{doc['action']}": sign,
+            "credits": sign * (doc.get("credits_used") or 0),
+            "audio_seconds": sign * (doc.get("duration") or 0)
+        }
+        for date in (created.strftime("%Y-%m-%d"), TOTALS_DATE):
+            inc = increments.setdefault((doc["user_id"], date), {})
+            for field, value in delta.items():
+                inc[field] = inc.get(field, 0) + value
+            if date != TOTALS_DATE:
+                hour = f"hours.{created:%H}"
+                inc[hour] = inc.get(hour, 0) + sign
+
+    now = datetime.now(timezone.utc)
+    return [
+        UpdateOne(
+            {"user_id": user_id, "date": date},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (user_id, date), inc in increments.items()
+    ]
+
+
+async def record_usage(db, *history_docs, sign: int = 1):
+    """
+    Apply history documents to the rollups in one round trip. Failures are
+    logged, not raised: the history write already succeeded and a rebuild
+    repairs the rollups.
+    """
+    updates = usage_updates(history_docs, sign)
+    if not updates:
+        return
+    try:
+        await db.usage_daily.bulk_write(updates, ordered=False)
+    except Exception as e:
+        print(f"⚠️ Usage rollup update failed (run `cli.py rollup-usage`): {e}")
+
+
+async def forget_usage(db, *history_docs):
+    """Remove deleted history documents from the rollups"""
+    await record_usage(db, *history_docs, sign=-1)
+
+
+async def clear_usage(db, user_id: str):
+    """Drop all rollups of a user (history cleared or account deleted)"""
+    await db.usage_daily.delete_many({"user_id": user_id})
+
+
+async def start_usage_rollups(db, user_id: str):
+    """Mark the rollups of a user without history as complete (new account, history cleared)"""
+    now = datetime.now(timezone.utc)
+    await db.usage_daily.update_one(
+        {"user_id": user_id, "date": TOTALS_DATE},
+        {
+            "$set": {"backfilled_at": now, "updated_at": now},
+            "$setOnInsert": {"counts": {}, "credits": 0, "audio_seconds": 0}
+        },
+        upsert=True
+    )
+
+
+def _backfilled(totals: Optional[dict]) -> bool:
+    return bool(totals and totals.get("backfilled_at"))
+
+
+async def count_history(db, user_id: str, action: str = None) -> Optional[int]:
+    """A user's history size (optionally one action) from the totals row; None until backfilled"""
+    totals = await db.usage_daily.find_one(
+        {"user_id": user_id, "date": TOTALS_DATE}, {"counts": 1, "backfilled_at": 1}
+    )
+    if not _backfilled(totals):
+        return None
+    counts = totals.get("counts", {})
+    return max(0, counts.get(action, 0) if action else sum(counts.values()))
+
+
+async def get_usage_rollups(db, user_id: str, since: datetime, until: datetime) -> Optional[dict]:
+    """
+    Read a user's totals and hourly counts between two times.
+    Returns {"totals": {...}, "hours": {utc hour start: count}}, or None when
+    the rollups do not cover the user's whole history yet (not backfilled).
+    """
+    since, until = _utc(since), _utc(until)
+    dates = [TOTALS_DATE]
+    day = since.date()
+    while day <= until.date():
+        dates.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    docs = await db.usage_daily.find(
+        {"user_id": user_id, "date": {"$in": dates}},
+        {"_id": 0, "updated_at": 0}
+    ).to_list(len(dates))
+
+    totals = next((doc for doc in docs if doc["date"] == TOTALS_DATE), None)
+    if not _backfilled(totals):
+        return None
+
+    hours = {}
+    for doc in docs:
+        if doc["date"] == TOTALS_DATE:
+            continue
+        day_start = datetime.strptime(doc["date"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        for hour, count in doc.get("hours", {}).items():
+            if count:
+                hours[day_start + timedelta(hours=int(hour))] = count
+
+    return {"totals": totals, "hours": hours}
+
+
+# ==================== Backfill ====================
+
+def _rollup_docs(user_id: str, rows: list) -> list:
+    """Build a user's rollup documents from grouped history rows"""
+    now = datetime.now(timezone.utc)
+    days = {}
+    for row in rows:
+        key = row["_id"]
+        for date in (key["date"], TOTALS_DATE):
+            doc = days.setdefault(date, {
+                "user_id": user_id, "date": date, "counts": {},
+                "credits": 0, "audio_seconds": 0, "updated_at": now
+            })
+            if date == TOTALS_DATE:
+                doc["backfilled_at"] = now
+            doc["counts"][key["action"]] = doc["counts"].get(key["action"], 0) + row["count"]
+            doc["credits"] += row["credits"]
+            doc["audio_seconds"] += row["audio_seconds"]
+            if date != TOTALS_DATE:
+                hours = doc.setdefault("hours", {})
+                hours[key["hour"]] = hours.get(key["hour"], 0) + row["count"]
+    return list(days.values())
+
+
+async def _replace_user_rollups(db, user_id: str, rows: list) -> int:
+    from pymongo import ReplaceOne
+
+    docs = _rollup_docs(user_id, rows)
+    if docs:
+        await db.usage_daily.bulk_write([
+            ReplaceOne({"user_id": user_id, "date": doc["date"]}, doc, upsert=True)
+            for doc in docs
+        ], ordered=False)
+    await db.usage_daily.delete_many({"user_id": user_id, "date": {"$nin": [doc["date"] for doc in docs]}})
+    return len(docs)
+
+
+async def rebuild_usage_rollups(db, user_id: str = None) -> dict:
+    """
+    Recompute rollups from history, for one user or everyone. Idempotent; a
+    generation saved while its user is being rebuilt may be missed, so run
+    it again (or for that user) if counts look off.
+    """
+    match = {"user_id": user_id} if user_id else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "hour": {"$dateToString": {"format": "%H", "date": "$created_at"}},
+                "action": "$action"
+            },
+            "count": {"$sum": 1},
+            "credits": {"$sum": {"$ifNull": ["$credits_used", 0]}},
+            "audio_seconds": {"$sum": {"$ifNull": ["$duration", 0]}}
+        }},
+        {"$sort": {"_id.user_id": 1}}
+    ]
+
+    users = 0
+    documents = 0
+    current, rows = None, []
+    async for row in db.history.aggregate(pipeline, allowDiskUse=True):
+        if row["_id"]["user_id"] != current:
+            if current is not None:
+                documents += await _replace_user_rollups(db, current, rows)
+                users += 1
+            current, rows = row["_id"]["user_id"], []
+        rows.append(row)
+    if current is not None:
+        documents += await _replace_user_rollups(db, current, rows)
+        users += 1
+
+    if user_id and current is None:
+        await clear_usage(db, user_id)
+        await start_usage_rollups(db, user_id)
+
+    return {"users": users, "documents": documents}
@@ -2,12 +2,31 @@
 User Model - Schema and operations for user management
 """
 
+import os
+import hmac
+import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
+from dotenv import load_dotenv
 import hashlib
 import secrets
 
+from database.user_cache import user_cache
+from database.models.usage import start_usage_rollups
+
+load_dotenv()
+
+# scrypt cost: memory is 128 * N * r bytes (16 MB with the defaults)
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", "16384"))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+
+# Threads hashing at once; bounds CPU and memory used by a login storm
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 
 # ==================== Pydantic Models ====================
 
@@ -43,22 +62,79 @@ class UserProfile(BaseModel):
 
 # ==================== Password Utilities ====================
 
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=32
+    )
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
 def hash_password(password: str) -> str:
-    """Hash password using SHA256 with salt"""
-    salt = secrets.token_hex(16)
-    hashed = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{hashed}"
+    """
+    Hash password with scrypt (memory-hard, salted)
+    Format: scrypt$N$r$p$salt$hash (base64 salt and hash)
+    
+    Blocks for tens of milliseconds; async code uses hash_password_async.
+    """
+    salt = secrets.token_bytes(16)
+    n, r, p = PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
+    """Verify password against an scrypt hash or a legacy salt:sha256 hash"""
     try:
+        if hashed.startswith("scrypt$"):
+            _, n, r, p, salt, hash_value = hashed.split("$")
+            computed = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(computed, base64.b64decode(hash_value))
+        
+        # Legacy: single salted SHA-256
         salt, hash_value = hashed.split(":")
-        return hashlib.sha256((password + salt).encode()).hexdigest() == hash_value
+        computed = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(computed, hash_value)
     except:
         return False
 
 
+def needs_rehash(hashed: str) -> bool:
+    """True for legacy hashes and scrypt hashes made with other cost parameters"""
+    current = f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}$"
+    return not hashed.startswith(current)
+
+
+# KDF work runs here so logins never block the event loop (hashlib.scrypt
+# releases the GIL, so threads hash in parallel)
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded password pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """verify_password on the bounded password pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, password, hashed)
+
+
+# Current-cost hash that matches no password: verified against when the email
+# is unknown, so a login takes as long whether or not the account exists
+_DUMMY_HASH = f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}${_b64(bytes(16))}${_b64(bytes(32))}"
+
+
+async def verify_unknown_user_async(password: str) -> bool:
+    """Spend the same scrypt work as a real check; always False"""
+    await verify_password_async(password, _DUMMY_HASH)
+    return False
+
+
 # ==================== User Database Operations ====================
 
 async def create_user(db, user_data: UserCreate) -> dict:
@@ -78,7 +154,7 @@ async def create_user(db, user_data: UserCreate) -> dict:
     user_doc = {
         "email": user_data.Email.lower(),
         "username": user_data.username,
-        "password": hash_password(user_data.password),
+        "password": await hash_password_async(user_data.password),
         "avatar_url": None,
         "plan": "free",
         "credits_used": 0,
@@ -93,6 +169,9 @@ async def create_user(db, user_data: UserCreate) -> dict:
     result = await db.users.insert_one(user_doc)
     user_doc["_id"] = result.inserted_id
     
+    # No history yet, so usage rollups are complete from the start
+    await start_usage_rollups(db, str(result.inserted_id))
+    
     return user_doc
 
 
@@ -120,6 +199,7 @@ async def update_user(db, user_id: str, updates: dict) -> bool:
         {"_id": ObjectId(user_id)},
         {"$set": updates}
     )
+    user_cache.invalidate(user_id)
     
     return result.modified_count > 0
 
@@ -132,6 +212,17 @@ async def update_last_login(db, user_id: str):
         {"_id": ObjectId(user_id)},
         {"$set": {"last_login": datetime.now(timezone.utc)}}
     )
+    user_cache.invalidate(user_id)
+
+
+async def delete_user(db, user_id: str) -> bool:
+    """Delete user document"""
+    from bson import ObjectId
+    
+    result = await db.users.delete_one({"_id": ObjectId(user_id)})
+    user_cache.invalidate(user_id)
+    
+    return result.deleted_count > 0
 
 
 async def increment_credits_used(db, user_id: str, amount: int) -> bool:
@@ -142,16 +233,13 @@ async def increment_credits_used(db, user_id: str, amount: int) -> bool:
         {"_id": ObjectId(user_id)},
         {"$inc": {"credits_used": amount}}
     )
+    user_cache.invalidate(user_id)
     
     return result.modified_count > 0
 
 
-async def check_credits_available(db, user_id: str, required: int) -> bool:
-    """Check if user has enough credits"""
-    user = await get_user_by_id(db, user_id)
-    if not user:
-        return False
-    
+def credits_available(user: dict, required: int) -> bool:
+    """Check an already loaded user document for enough credits"""
     # Use 1000 as default limit if missing for backward compatibility
     limit = user.get("credits_limit")
     if limit is None: limit = 1000
@@ -163,6 +251,99 @@ async def check_credits_available(db, user_id: str, required: int) -> bool:
     return available >= required
 
 
+async def check_credits_available(db, user_id: str, required: int) -> bool:
+    """Check if user has enough credits"""
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        return False
+    return credits_available(user, required)
+
+
+# ==================== Credit Reservations ====================
+
+LEDGER_COMMITTED = "committed"
+LEDGER_REFUNDED = "refunded"
+
+
+async def reserve_credits(db, user_id: str, amount: int, action: str) -> Optional[dict]:
+    """
+    Hold credits before calling the provider.
+    One conditional update checks the balance and takes the credits, so
+    concurrent requests from one user cannot overspend.
+    
+    Returns:
+        The reservation to pass to commit_credits/refund_credits,
+        or None if the user does not have enough credits
+    """
+    from bson import ObjectId
+    from pymongo import ReturnDocument
+    
+    user = await db.users.find_one_and_update(
+        {
+            "_id": ObjectId(user_id),
+            "$expr": {"$lte": [
+                {"$add": [{"$ifNull": ["$credits_used", 0]}, amount]},
+                {"$ifNull": ["$credits_limit", 1000]}
+            ]}
+        },
+        {"$inc": {"credits_used": amount}},
+        projection={"credits_used": 1, "credits_limit": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if user is None:
+        return None
+    user_cache.invalidate(user_id)
+    
+    return {
+        "user_id": user_id,
+        "action": action,
+        "amount": amount,
+        "credits_used": user["credits_used"],
+        "reserved_at": datetime.now(timezone.utc)
+    }
+
+
+async def _settle_reservation(db, reservation: dict, charged: int, status: str):
+    """Give back the unused part of a reservation and record it in the ledger"""
+    from bson import ObjectId
+    
+    refunded = reservation["amount"] - charged
+    entry = {
+        "user_id": reservation["user_id"],
+        "action": reservation["action"],
+        "status": status,
+        "reserved": reservation["amount"],
+        "charged": charged,
+        "refunded": refunded,
+        "reserved_at": reservation["reserved_at"],
+        "settled_at": datetime.now(timezone.utc)
+    }
+    
+    writes = [db.credit_ledger.insert_one(entry)]
+    if refunded:
+        writes.append(db.users.update_one(
+            {"_id": ObjectId(reservation["user_id"])},
+            {"$inc": {"credits_used": -refunded}}
+        ))
+    await asyncio.gather(*writes)
+    if refunded:
+        user_cache.invalidate(reservation["user_id"])
+
+
+async def commit_credits(db, reservation: dict, used: int = None):
+    """
+    Charge a reservation after the provider delivered.
+    Pass `used` when only part was delivered (batch); the rest is refunded.
+    """
+    charged = reservation["amount"] if used is None else min(used, reservation["amount"])
+    await _settle_reservation(db, reservation, charged, LEDGER_COMMITTED)
+
+
+async def refund_credits(db, reservation: dict):
+    """Give back every reserved credit (provider call failed or was aborted)"""
+    await _settle_reservation(db, reservation, 0, LEDGER_REFUNDED)
+
+
 def user_to_response(user: dict) -> dict:
     """Convert user document to response format"""
     return {
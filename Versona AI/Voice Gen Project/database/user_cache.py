@@ -0,0 +1,150 @@
+"""
+User Cache - In-process cache of authenticated users
+get_current_user runs on almost every request; serving the user from memory
+saves one MongoDB round trip per request. Entries hold only the fields the
+routes read (never the password hash) and are dropped whenever the user is
+changed through database/models/user.py.
+
+With several workers, enable USER_CACHE_CHANGE_STREAM (needs a replica set)
+so a change made by one worker evicts the entry in every worker. Without it,
+changes made elsewhere are picked up after USER_CACHE_TTL_SECONDS.
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_CHANGE_STREAM = os.getenv("USER_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+# Fields kept per user (routes that need the password hash load it themselves)
+USER_FIELDS = {
+    "email": 1,
+    "username": 1,
+    "avatar_url": 1,
+    "plan": 1,
+    "credits_used": 1,
+    "credits_limit": 1,
+    "created_at": 1,
+    "last_login": 1,
+    "is_active": 1,
+    "email_verified": 1
+}
+
+
+class UserCache:
+    """TTL + LRU map of user id -> compact user document"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user id -> (expires_at, user)
+        self._generation = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return dict(entry[1])  # Callers may modify their copy
+
+    def put(self, user_id: str, user: dict, generation: int = None):
+        """
+        Store a user. Pass the generation read before the database lookup:
+        if an invalidation happened meanwhile the (possibly stale) document is dropped.
+        """
+        if generation is not None and generation != self._generation:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": USER_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+# Shared cache for this process
+user_cache = UserCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+
+
+async def get_cached_user(db, user_id: str) -> Optional[dict]:
+    """Get a compact user document by ID, from memory when possible"""
+    from bson import ObjectId
+
+    if USER_CACHE_ENABLED:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+
+    generation = user_cache.generation
+    try:
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, USER_FIELDS)
+    except Exception:
+        return None
+
+    if user is not None and USER_CACHE_ENABLED:
+        user_cache.put(user_id, user, generation)
+        return dict(user)
+    return user
+
+
+async def watch_user_changes(db):
+    """
+    Evict users changed by any process, following a MongoDB change stream.
+    Runs until cancelled; without a replica set it logs once and returns.
+    """
+    from pymongo.errors import OperationFailure
+
+    pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+    while True:
+        try:
+            async with db.users.watch(pipeline) as stream:
+                print("👀 Watching user changes for cache invalidation")
+                async for change in stream:
+                    user_cache.invalidate(str(change["documentKey"]["_id"]))
+        except asyncio.CancelledError:
+            raise
+        except (OperationFailure, NotImplementedError) as e:
+            # Standalone servers have no change streams
+            print(f"⚠️ User change stream unavailable, relying on TTL: {e}")
+            return
+        except Exception as e:
+            # Changes missed while reconnecting are covered by dropping everything
+            print(f"⚠️ User change stream interrupted: {e}")
+            user_cache.clear()
+            await asyncio.sleep(1)
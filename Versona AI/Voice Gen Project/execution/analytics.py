@@ -17,27 +17,22 @@ Gemini 2.0 Flash Pricing:
 - Audio: ~25 tokens per second of audio (estimate)
 """
 
-import os
 import json
-import requests
+import asyncio
 from datetime import datetime, timezone
-from dotenv import load_dotenv
 
-load_dotenv()
-
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-BASE_URL = "https://api.elevenlabs.io/v1"
+from execution.elevenlabs_client import ELEVENLABS_API_KEY, METADATA_TIMEOUT, request, run_sync
 
 # Pricing constants (Updated Jan 2025)
 PRICING = {
     "elevenlabs": {
         "plans": {
-            "free": {"monthly_cost": 0, "credits": 10000, "voice_minutes": 0},
-            "starter": {"monthly_cost": 5, "credits": 30000, "voice_minutes": 30},
-            "creator": {"monthly_cost": 22, "credits": 100000, "voice_minutes": 100},
-            "pro": {"monthly_cost": 99, "credits": 500000, "voice_minutes": 500},
-            "scale": {"monthly_cost": 330, "credits": 2000000, "voice_minutes": 2000},
-            "business": {"monthly_cost": 1320, "credits": 11000000, "voice_minutes": 11000},
+            "free": {"monthly_cost": 0, "credits": 10000, "voice_minutes": 0, "concurrency": 2},
+            "starter": {"monthly_cost": 5, "credits": 30000, "voice_minutes": 30, "concurrency": 3},
+            "creator": {"monthly_cost": 22, "credits": 100000, "voice_minutes": 100, "concurrency": 5},
+            "pro": {"monthly_cost": 99, "credits": 500000, "voice_minutes": 500, "concurrency": 10},
+            "scale": {"monthly_cost": 330, "credits": 2000000, "voice_minutes": 2000, "concurrency": 15},
+            "business": {"monthly_cost": 1320, "credits": 11000000, "voice_minutes": 11000, "concurrency": 15},
         },
         "tts": {
             "cost_per_credit": 0.00022,  # $22 / 100,000 credits
@@ -76,13 +71,12 @@ PRICING = {
 
 # ==================== ElevenLabs Analytics ====================
 
-def get_user_info() -> dict:
+async def get_user_info_async() -> dict:
     """Get ElevenLabs user account info"""
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found")
     
-    headers = {"xi-api-key": ELEVENLABS_API_KEY}
-    response = requests.get(f"{BASE_URL}/user", headers=headers)
+    response = await request("GET", "/user", timeout=METADATA_TIMEOUT)
     
     if response.status_code != 200:
         raise Exception(f"API Error: {response.status_code} - {response.text}")
@@ -90,13 +84,17 @@ def get_user_info() -> dict:
     return response.json()
 
 
-def get_subscription_info() -> dict:
+def get_user_info() -> dict:
+    """Get ElevenLabs user account info"""
+    return run_sync(get_user_info_async())
+
+
+async def get_subscription_info_async() -> dict:
     """Get ElevenLabs subscription details with usage"""
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found")
     
-    headers = {"xi-api-key": ELEVENLABS_API_KEY}
-    response = requests.get(f"{BASE_URL}/user/subscription", headers=headers)
+    response = await request("GET", "/user/subscription", timeout=METADATA_TIMEOUT)
     
     if response.status_code != 200:
         raise Exception(f"API Error: {response.status_code} - {response.text}")
@@ -104,13 +102,32 @@ def get_subscription_info() -> dict:
     return response.json()
 
 
-def get_elevenlabs_analytics() -> dict:
+def get_subscription_info() -> dict:
+    """Get ElevenLabs subscription details with usage"""
+    return run_sync(get_subscription_info_async())
+
+
+async def get_elevenlabs_analytics_async() -> dict:
     """
     Get comprehensive ElevenLabs analytics with detailed cost breakdown
     """
-    user = get_user_info()
-    subscription = get_subscription_info()
+    user, subscription = await asyncio.gather(
+        get_user_info_async(),
+        get_subscription_info_async()
+    )
     
+    return build_elevenlabs_analytics(user, subscription)
+
+
+def get_elevenlabs_analytics() -> dict:
+    """
+    Get comprehensive ElevenLabs analytics with detailed cost breakdown
+    """
+    return run_sync(get_elevenlabs_analytics_async())
+
+
+def build_elevenlabs_analytics(user: dict, subscription: dict) -> dict:
+    """Build the analytics report from raw user and subscription info"""
     # Extract data
     tier = subscription.get("tier", "free").lower()
     character_count = subscription.get("character_count", 0)
@@ -387,26 +404,38 @@ def get_local_usage_stats() -> dict:
 
 # ==================== Combined Dashboard ====================
 
+async def get_admin_dashboard_async() -> dict:
+    """Get complete admin dashboard with all analytics"""
+    try:
+        el_data = await get_elevenlabs_analytics_async()
+    except Exception as e:
+        el_data = {"error": str(e)}
+    
+    return await asyncio.to_thread(build_admin_dashboard, el_data)
+
+
 def get_admin_dashboard() -> dict:
     """Get complete admin dashboard with all analytics"""
+    try:
+        el_data = get_elevenlabs_analytics()
+    except Exception as e:
+        el_data = {"error": str(e)}
+    
+    return build_admin_dashboard(el_data)
+
+
+def build_admin_dashboard(el_data: dict) -> dict:
+    """Combine ElevenLabs analytics with Gemini and local usage stats"""
     dashboard = {
-        "elevenlabs": None,
+        "elevenlabs": el_data,
         "gemini": None,
         "local_usage": None,
         "pricing_reference": PRICING,
-        "alerts": [],
+        "alerts": list(el_data.get("alerts", [])),
         "summary": {},
         "generated_at": datetime.now().isoformat()
     }
     
-    # ElevenLabs
-    try:
-        el_data = get_elevenlabs_analytics()
-        dashboard["elevenlabs"] = el_data
-        dashboard["alerts"].extend(el_data.get("alerts", []))
-    except Exception as e:
-        dashboard["elevenlabs"] = {"error": str(e)}
-    
     # Gemini
     try:
         dashboard["gemini"] = get_gemini_analytics()
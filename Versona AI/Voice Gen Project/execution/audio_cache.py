@@ -0,0 +1,191 @@
+"""
+Audio Cache - Content-addressed store for synthesized audio
+Identical (text, voice, model, settings) requests are served from disk
+instead of paying for another ElevenLabs round trip.
+"""
+
+import os
+import json
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+from execution.urdu_text import normalize_text
+
+load_dotenv()
+
+CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tmp/cache/tts")
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024
+CACHE_MAX_ENTRIES = int(os.getenv("TTS_CACHE_MAX_ENTRIES", "20000"))
+
+
+def make_cache_key(
+    text: str,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float
+) -> str:
+    """Hash the normalized request into a stable content address"""
+    material = json.dumps(
+        [normalize_text(text), voice_id, model_id, float(stability), float(similarity_boost)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Disk-backed audio store with an in-memory LRU index.
+    Files live at <directory>/<key[:2]>/<key>.mp3; file mtimes carry the
+    LRU order across restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_entries: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._index = OrderedDict()  # key -> size in bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    # ==================== Index ====================
+
+    def _load(self):
+        """Rebuild the index from files on disk, oldest first"""
+        entries = []
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".mp3"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+        entries.sort()
+        with self._lock:
+            self._index.clear()
+            self._total_bytes = 0
+            for _, key, size in entries:
+                self._index[key] = size
+                self._total_bytes += size
+            self._loaded = True
+
+        self._evict()
+
+    async def load(self):
+        """Load the on-disk index without blocking the event loop"""
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    def _evict(self):
+        """Drop least recently used entries until within limits"""
+        victims = []
+        with self._lock:
+            while self._index and (
+                self._total_bytes > self.max_bytes or len(self._index) > self.max_entries
+            ):
+                key, size = self._index.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                victims.append(key)
+
+        for key in victims:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    # ==================== Disk I/O ====================
+
+    def _read(self, key: str) -> bytes:
+        path = self._path(key)
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # Persist recency for the next restart
+        return data
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # ==================== Public API ====================
+
+    def contains(self, key: str) -> bool:
+        """Check the index without touching recency or counters"""
+        return key in self._index
+
+    async def get(self, key: str):
+        """Return cached audio bytes, or None on a miss"""
+        await self.load()
+
+        with self._lock:
+            present = key in self._index
+            if present:
+                self._index.move_to_end(key)
+
+        if present:
+            try:
+                data = await asyncio.to_thread(self._read, key)
+                self.hits += 1
+                return data
+            except FileNotFoundError:
+                with self._lock:
+                    size = self._index.pop(key, None)
+                    if size is not None:
+                        self._total_bytes -= size
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        """Store audio bytes under the given key"""
+        if not data or len(data) > self.max_bytes:
+            return
+
+        await self.load()
+        await asyncio.to_thread(self._write, key, data)
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+
+        if self._total_bytes > self.max_bytes or len(self._index) > self.max_entries:
+            await asyncio.to_thread(self._evict)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": len(self._index),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions
+        }
+
+
+# Shared cache for every TTS entry point
+tts_cache = AudioCache(CACHE_DIR, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES)
@@ -0,0 +1,362 @@
+"""
+Audio Store - Where generated audio files are written and served from
+Files are content addressed: audio is named after the SHA-256 of its bytes
+and kept at <AUDIO_DIR>/blobs/<h[:2]>/<h[2:4]>/<h>.mp3, so identical outputs
+are stored once and no directory grows without bound. Writes happen in a
+worker thread and land atomically (temp file + rename).
+
+Streams are named before their content is known: they get a random id, and
+a small alias file (<AUDIO_DIR>/aliases/<id[:2]>/<id>) points it at the
+blob once the stream completes.
+
+Least recently written blobs are evicted beyond AUDIO_STORE_MAX_MB or
+AUDIO_STORE_MAX_AGE_DAYS. Files from before the store (flat <AUDIO_DIR>/*.mp3)
+are still served.
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import asyncio
+import threading
+import anyio
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUDIO_DIR = ".tmp/audio"
+AUDIO_STORE_MAX_BYTES = int(os.getenv("AUDIO_STORE_MAX_MB", "5120")) * 1024 * 1024
+AUDIO_STORE_MAX_AGE_DAYS = float(os.getenv("AUDIO_STORE_MAX_AGE_DAYS", "90"))  # 0 keeps audio forever
+
+# Temp files older than this are leftovers of a crash (younger ones may belong to another worker)
+STALE_SECONDS = 3600
+
+_BLOB_NAME = re.compile(r"[0-9a-f]{64}\.mp3")
+_AUDIO_NAME = re.compile(r"[A-Za-z0-9_-]{1,80}\.mp3")
+
+
+class StoredAudio(NamedTuple):
+    """Where a piece of audio was stored"""
+    audio_id: str      # Content hash, or the stream id
+    filename: str      # Name used in audio URLs
+    path: str          # File on disk (saved in history)
+    size: int
+    deduplicated: bool  # The same audio was already stored
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _call_abort(on_abort, stream_id: str):
+    if on_abort:
+        try:
+            await on_abort()
+        except Exception as e:
+            print(f"⚠️ Failed to clean up aborted audio {stream_id}: {e}")
+
+
+def _discard_stale(entry, now: float):
+    try:
+        if entry.stat().st_mtime < now - STALE_SECONDS:
+            os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+
+
+class AudioStore:
+    """
+    Content-addressed audio files with an in-memory LRU index for eviction.
+    Lookups go to the file system, so several server processes can share
+    the directory; each one evicts based on what it has seen.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age_days: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self._index = OrderedDict()  # digest -> (size, last written)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.writes = 0
+        self.deduplicated = 0
+        self.evictions = 0
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest[2:4], f"{digest}.mp3")
+
+    def _alias_path(self, alias: str) -> str:
+        return os.path.join(self.directory, "aliases", alias[:2], alias)
+
+    def _incoming_dir(self) -> str:
+        return os.path.join(self.directory, "incoming")
+
+    # ==================== Index ====================
+
+    def _load(self):
+        """Rebuild the index from blobs on disk, oldest first, and drop leftovers"""
+        now = time.time()
+        entries = []
+        blob_dir = os.path.join(self.directory, "blobs")
+        if os.path.isdir(blob_dir):
+            for shard in os.scandir(blob_dir):
+                if not shard.is_dir():
+                    continue
+                for subshard in os.scandir(shard.path):
+                    if not subshard.is_dir():
+                        continue
+                    for entry in os.scandir(subshard.path):
+                        if _BLOB_NAME.fullmatch(entry.name):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+                        elif entry.name.endswith(".part"):
+                            _discard_stale(entry, now)
+
+        # Streams interrupted by a crash
+        os.makedirs(self._incoming_dir(), exist_ok=True)
+        for entry in os.scandir(self._incoming_dir()):
+            _discard_stale(entry, now)
+
+        entries.sort()
+        with self._lock:
+            self._index.clear()
+            self._total_bytes = 0
+            for mtime, digest, size in entries:
+                self._index[digest] = (size, mtime)
+                self._total_bytes += size
+            self._loaded = True
+
+        self._evict()
+        self._prune_aliases()
+
+    async def load(self):
+        """Load the on-disk index without blocking the event loop"""
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    def _evict(self):
+        """Drop least recently written blobs until within the size and age limits"""
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        victims = []
+        with self._lock:
+            while self._index:
+                digest, (size, written) = next(iter(self._index.items()))
+                if self._total_bytes <= self.max_bytes and (cutoff is None or written >= cutoff):
+                    break
+                self._index.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                victims.append(digest)
+
+        for digest in victims:
+            _discard(self._blob_path(digest))
+
+    def _prune_aliases(self):
+        """Remove stream aliases whose audio is gone"""
+        alias_dir = os.path.join(self.directory, "aliases")
+        if not os.path.isdir(alias_dir):
+            return
+        for shard in os.scandir(alias_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if self._read_alias(entry.path) is None:
+                    _discard(entry.path)
+
+    def _over_limits(self) -> bool:
+        if self._total_bytes > self.max_bytes:
+            return True
+        if self.max_age_seconds and self._index:
+            _, written = next(iter(self._index.values()))
+            return written < time.time() - self.max_age_seconds
+        return False
+
+    def _register(self, stored: list):
+        with self._lock:
+            for item in stored:
+                if item.deduplicated:
+                    self.deduplicated += 1
+                else:
+                    self.writes += 1
+                digest = os.path.basename(item.path)[:-4]
+                previous = self._index.pop(digest, None)
+                if previous is not None:
+                    self._total_bytes -= previous[0]
+                self._index[digest] = (item.size, time.time())
+                self._total_bytes += item.size
+
+    # ==================== Disk I/O ====================
+
+    def _write(self, data: bytes) -> StoredAudio:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        try:
+            os.utime(path)  # Already stored: now recently written, so evicted last
+            deduplicated = True
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            deduplicated = False
+
+        return StoredAudio(digest, f"{digest}.mp3", path, len(data), deduplicated)
+
+    def _adopt(self, tmp_path: str, digest: str, size: int, alias: str) -> StoredAudio:
+        """Move a completed stream into its blob and point the alias at it"""
+        path = self._blob_path(digest)
+        try:
+            os.utime(path)
+            _discard(tmp_path)
+            deduplicated = True
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            deduplicated = False
+
+        alias_path = self._alias_path(alias)
+        os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+        with open(f"{alias_path}.part", "w", encoding="ascii") as f:
+            f.write(digest)
+        os.replace(f"{alias_path}.part", alias_path)
+
+        return StoredAudio(alias, f"{alias}.mp3", path, size, deduplicated)
+
+    def _read_alias(self, alias_path: str) -> Optional[str]:
+        try:
+            with open(alias_path, encoding="ascii") as f:
+                digest = f.read().strip()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+        path = self._blob_path(digest)
+        return path if _BLOB_NAME.fullmatch(f"{digest}.mp3") and os.path.exists(path) else None
+
+    def _resolve(self, filename: str) -> Optional[str]:
+        if _BLOB_NAME.fullmatch(filename):
+            path = self._blob_path(filename[:-4])
+            return path if os.path.exists(path) else None
+        if not _AUDIO_NAME.fullmatch(filename):
+            return None
+        path = self._read_alias(self._alias_path(filename[:-4]))
+        if path:
+            return path
+        # Written before the store existed
+        legacy = os.path.join(self.directory, filename)
+        return legacy if os.path.isfile(legacy) else None
+
+    # ==================== Public API ====================
+
+    async def put(self, data: bytes) -> StoredAudio:
+        """Store audio bytes (deduplicated by content)"""
+        return (await self.put_many([data]))[0]
+
+    async def put_many(self, items: list) -> list:
+        """Store several audio files with one hop to the worker thread"""
+        await self.load()
+        stored = await asyncio.to_thread(lambda: [self._write(data) for data in items])
+        self._register(stored)
+        if self._over_limits():
+            await asyncio.to_thread(self._evict)
+        return stored
+
+    def new_stream_id(self) -> str:
+        """Id (and URL name) for audio that is streamed before it is stored"""
+        return uuid.uuid4().hex
+
+    async def tee(self, chunks, stream_id: str, on_complete=None, on_abort=None):
+        """
+        Forward audio chunks unchanged while storing them.
+
+        Chunks are written to a temp file and hashed as they pass; once the
+        stream has finished the file becomes a blob and `stream_id` points at
+        it, so the URL never serves a half-written file. If the stream is
+        aborted (client disconnect, provider error) the temp file is removed
+        and on_abort is called instead of on_complete.
+
+        Cleanup and both callbacks run shielded: a disconnect cancels the
+        response's scope, which would otherwise cancel every later await and
+        skip them. A generator that never starts runs neither callback; the
+        caller has to settle that case itself.
+
+        Args:
+            chunks: Async iterator of audio bytes (closed when the tee ends)
+            stream_id: Id from new_stream_id(), already sent to the client
+            on_complete: Optional coroutine function awaited with the StoredAudio
+            on_abort: Optional coroutine function awaited when the stream fails
+
+        Returns:
+            Async generator yielding the same chunks
+        """
+        await self.load()
+        tmp_path = os.path.join(self._incoming_dir(), f"{stream_id}.part")
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        digest = hashlib.sha256()
+        size = 0
+        completed = False
+
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+            completed = True
+        finally:
+            with anyio.CancelScope(shield=True):
+                await asyncio.to_thread(f.close)
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+                if not completed:
+                    await asyncio.to_thread(_discard, tmp_path)
+                    await _call_abort(on_abort, stream_id)
+
+        with anyio.CancelScope(shield=True):
+            try:
+                stored = await asyncio.to_thread(self._adopt, tmp_path, digest.hexdigest(), size, stream_id)
+            except Exception as e:
+                print(f"⚠️ Failed to store streamed audio {stream_id}: {e}")
+                await asyncio.to_thread(_discard, tmp_path)
+                await _call_abort(on_abort, stream_id)
+                return
+
+            self._register([stored])
+            if self._over_limits():
+                await asyncio.to_thread(self._evict)
+
+            if on_complete:
+                try:
+                    await on_complete(stored)
+                except Exception as e:
+                    print(f"⚠️ Failed to finalize streamed audio {stream_id}: {e}")
+
+    async def resolve(self, filename: str) -> Optional[str]:
+        """File path for an audio URL name, or None if unknown or evicted"""
+        return await asyncio.to_thread(self._resolve, filename)
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        stored = self.writes + self.deduplicated
+        return {
+            "blobs": len(self._index),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "max_age_days": self.max_age_seconds / 86400,
+            "writes": self.writes,
+            "deduplicated": self.deduplicated,
+            "dedup_rate": round(self.deduplicated / stored, 4) if stored else 0,
+            "evictions": self.evictions
+        }
+
+
+# Shared store for every route that produces or serves audio
+audio_store = AudioStore(AUDIO_DIR, AUDIO_STORE_MAX_BYTES, AUDIO_STORE_MAX_AGE_DAYS)
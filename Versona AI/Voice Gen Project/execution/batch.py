@@ -0,0 +1,126 @@
+"""
+Batch TTS - Synthesize many short texts in one call
+Used by the /tts/batch endpoints and `cli.py tts --batch` for IVR menus,
+app strings and other lists of short prompts.
+"""
+
+import os
+import io
+import json
+import asyncio
+import zipfile
+from dotenv import load_dotenv
+
+from execution.tts import text_to_speech_segmented_async
+
+load_dotenv()
+
+# Items synthesized at the same time within one batch
+BATCH_CONCURRENCY = int(os.getenv("TTS_BATCH_CONCURRENCY", "8"))
+
+# Maximum number of texts in one batch
+BATCH_MAX_ITEMS = int(os.getenv("TTS_BATCH_MAX_ITEMS", "500"))
+
+# Maximum uncompressed size of one file inside an uploaded zip
+MAX_MEMBER_BYTES = 1024 * 1024
+
+
+def _decode(content: bytes, name: str) -> str:
+    try:
+        return content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        try:
+            return content.decode("utf-16")
+        except UnicodeDecodeError:
+            raise ValueError(f"Could not decode {name}. Please use UTF-8 encoding.")
+
+
+def _parse_zip(content: bytes) -> list:
+    items = []
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        members = sorted(
+            (m for m in archive.infolist() if not m.is_dir() and m.filename.endswith(".txt")),
+            key=lambda m: m.filename
+        )
+        if len(members) > BATCH_MAX_ITEMS:
+            raise ValueError(f"Batch exceeds {BATCH_MAX_ITEMS} items")
+        for member in members:
+            if member.file_size > MAX_MEMBER_BYTES:
+                raise ValueError(f"{member.filename} is too large. Max 1MB per file.")
+            text = _decode(archive.read(member), member.filename)
+            items.append({"id": os.path.splitext(os.path.basename(member.filename))[0], "text": text})
+    return items
+
+
+def _parse_ndjson(text: str) -> list:
+    items = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError(f"Line {line_no} is not valid JSON")
+        if isinstance(record, str):
+            record = {"text": record}
+        if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+            raise ValueError(f"Line {line_no} must be a string or an object with a 'text' field")
+        items.append({"id": str(record.get("id", len(items))), "text": record["text"]})
+    return items
+
+
+def parse_batch_file(filename: str, content: bytes) -> list:
+    """
+    Read batch items from an uploaded or local file.
+
+    Supported formats:
+    - .zip: one text per .txt file (id = file name)
+    - .ndjson / .jsonl: one JSON string or {"id", "text"} object per line
+    - .txt: one text per non-empty line
+
+    Returns:
+        List of {"id", "text"} dicts in file order
+    """
+    name = filename.lower()
+
+    if name.endswith(".zip"):
+        try:
+            return _parse_zip(content)
+        except zipfile.BadZipFile:
+            raise ValueError("Invalid zip file")
+
+    text = _decode(content, filename)
+
+    if name.endswith((".ndjson", ".jsonl")):
+        return _parse_ndjson(text)
+
+    if name.endswith(".txt"):
+        return [
+            {"id": str(i), "text": line}
+            for i, line in enumerate(l for l in text.splitlines() if l.strip())
+        ]
+
+    raise ValueError("Unsupported batch file. Use .zip, .ndjson, .jsonl or .txt")
+
+
+async def synthesize_batch(
+    texts: list,
+    voice_id: str = None,
+    max_concurrency: int = BATCH_CONCURRENCY
+) -> list:
+    """
+    Synthesize every text with at most max_concurrency provider calls in flight.
+
+    Repeated texts are served by the audio cache and request coalescing,
+    so duplicates in a batch cost one synthesis.
+
+    Returns:
+        One entry per text, in order: audio bytes, or the exception raised for it
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def synthesize(text: str) -> bytes:
+        async with semaphore:
+            return await text_to_speech_segmented_async(text=text, voice_id=voice_id)
+
+    return await asyncio.gather(*(synthesize(text) for text in texts), return_exceptions=True)
@@ -4,22 +4,23 @@ Creates a cloned voice from audio samples
 """
 
 import os
-import requests
-from dotenv import load_dotenv
+import asyncio
 
-load_dotenv()
+from execution.elevenlabs_client import ELEVENLABS_API_KEY, METADATA_TIMEOUT, request, run_sync
 
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-BASE_URL = "https://api.elevenlabs.io/v1"
 
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
-def clone_voice(
+
+async def clone_voice_async(
     name: str,
     audio_files: list,
     description: str = "Urdu voice clone"
 ) -> dict:
     """
-    Clone a voice from audio samples.
+    Clone a voice from audio samples without blocking the event loop.
     
     Args:
         name: Name for the cloned voice
@@ -37,17 +38,12 @@ def clone_voice(
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Audio file not found: {file_path}")
     
-    url = f"{BASE_URL}/voices/add"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
     # Prepare multipart form data
     files = []
     for file_path in audio_files:
+        content = await asyncio.to_thread(_read_file, file_path)
         files.append(
-            ("files", (os.path.basename(file_path), open(file_path, "rb"), "audio/mpeg"))
+            ("files", (os.path.basename(file_path), content, "audio/mpeg"))
         )
     
     data = {
@@ -55,11 +51,7 @@ def clone_voice(
         "description": description
     }
     
-    response = requests.post(url, headers=headers, data=data, files=files)
-    
-    # Close file handles
-    for _, file_tuple in files:
-        file_tuple[1].close()
+    response = await request("POST", "/voices/add", data=data, files=files)
     
     if response.status_code != 200:
         raise Exception(f"Clone Error: {response.status_code} - {response.text}")
@@ -71,7 +63,22 @@ def clone_voice(
     return result
 
 
-def list_voices() -> list:
+def clone_voice(
+    name: str,
+    audio_files: list,
+    description: str = "Urdu voice clone"
+) -> dict:
+    """
+    Clone a voice from audio samples.
+    Blocking wrapper around clone_voice_async for the CLI and scripts.
+    
+    Returns:
+        Dict with 'voice_id' of the cloned voice
+    """
+    return run_sync(clone_voice_async(name, audio_files, description))
+
+
+async def list_voices_async() -> list:
     """
     Get list of all available voices (including cloned ones).
     
@@ -81,13 +88,7 @@ def list_voices() -> list:
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    url = f"{BASE_URL}/voices"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
-    response = requests.get(url, headers=headers)
+    response = await request("GET", "/voices", timeout=METADATA_TIMEOUT)
     
     if response.status_code != 200:
         raise Exception(f"List Voices Error: {response.status_code} - {response.text}")
@@ -95,20 +96,24 @@ def list_voices() -> list:
     return response.json().get("voices", [])
 
 
-def get_voice(voice_id: str) -> dict:
+def list_voices() -> list:
+    """
+    Get list of all available voices (including cloned ones).
+    
+    Returns:
+        List of voice objects with id, name, category, etc.
+    """
+    return run_sync(list_voices_async())
+
+
+async def get_voice_async(voice_id: str) -> dict:
     """
     Get details of a specific voice.
     """
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    url = f"{BASE_URL}/voices/{voice_id}"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
-    response = requests.get(url, headers=headers)
+    response = await request("GET", f"/voices/{voice_id}", timeout=METADATA_TIMEOUT)
     
     if response.status_code != 200:
         raise Exception(f"Get Voice Error: {response.status_code} - {response.text}")
@@ -116,7 +121,14 @@ def get_voice(voice_id: str) -> dict:
     return response.json()
 
 
-def delete_voice(voice_id: str) -> bool:
+def get_voice(voice_id: str) -> dict:
+    """
+    Get details of a specific voice.
+    """
+    return run_sync(get_voice_async(voice_id))
+
+
+async def delete_voice_async(voice_id: str) -> bool:
     """
     Delete a cloned voice.
     
@@ -129,13 +141,7 @@ def delete_voice(voice_id: str) -> bool:
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    url = f"{BASE_URL}/voices/{voice_id}"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
-    response = requests.delete(url, headers=headers)
+    response = await request("DELETE", f"/voices/{voice_id}", timeout=METADATA_TIMEOUT)
     
     if response.status_code != 200:
         raise Exception(f"Delete Voice Error: {response.status_code} - {response.text}")
@@ -144,17 +150,27 @@ def delete_voice(voice_id: str) -> bool:
     return True
 
 
+def delete_voice(voice_id: str) -> bool:
+    """
+    Delete a cloned voice.
+    
+    Returns:
+        True if successful
+    """
+    return run_sync(delete_voice_async(voice_id))
+
+
 # CLI usage
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  Clone: python clone_voice.py clone <name> <audio1.mp3> [audio2.mp3] ...")
-        print("  List:  python clone_voice.py list")
-        print("  Delete: python clone_voice.py delete <voice_id>")
+        print("  Clone: python -m execution.clone_voice clone <name> <audio1.mp3> [audio2.mp3] ...")
+        print("  List:  python -m execution.clone_voice list")
+        print("  Delete: python -m execution.clone_voice delete <voice_id>")
         print("\nExample:")
-        print("  python clone_voice.py clone 'My Voice' sample1.mp3 sample2.mp3")
+        print("  python -m execution.clone_voice clone 'My Voice' sample1.mp3 sample2.mp3")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -171,7 +187,7 @@ if __name__ == "__main__":
     
     elif command == "clone":
         if len(sys.argv) < 4:
-            print("Usage: python clone_voice.py clone <name> <audio1.mp3> [audio2.mp3] ...")
+            print("Usage: python -m execution.clone_voice clone <name> <audio1.mp3> [audio2.mp3] ...")
             sys.exit(1)
         
         name = sys.argv[2]
@@ -186,7 +202,7 @@ if __name__ == "__main__":
     
     elif command == "delete":
         if len(sys.argv) < 3:
-            print("Usage: python clone_voice.py delete <voice_id>")
+            print("Usage: python -m execution.clone_voice delete <voice_id>")
             sys.exit(1)
         
         voice_id = sys.argv[2]
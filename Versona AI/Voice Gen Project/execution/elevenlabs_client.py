@@ -0,0 +1,301 @@
+"""
+ElevenLabs Client - Shared async HTTP client for all provider calls
+Keeps a keep-alive connection pool per event loop so TTS, STS and cloning
+requests never block the server's event loop.
+"""
+
+import os
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+from dotenv import load_dotenv
+
+from execution.governor import GOVERNOR_MAX_REQUEUES, provider_governor, endpoint_of, latency_key
+from execution.resilience import (
+    RETRY_ATTEMPTS, IDEMPOTENT_METHODS, NOT_SENT_ERRORS, ProviderUnavailableError,
+    backoff_delay, is_failure_status, provider_breaker
+)
+
+load_dotenv()
+
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# Point at a local stand-in (python cli.py fake-provider) for offline runs
+BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+
+# Pool and timeout limits (override via .env)
+MAX_CONNECTIONS = int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ELEVENLABS_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("ELEVENLABS_KEEPALIVE_EXPIRY", "60"))
+CONNECT_TIMEOUT = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("ELEVENLABS_READ_TIMEOUT", "120"))
+WRITE_TIMEOUT = float(os.getenv("ELEVENLABS_WRITE_TIMEOUT", "60"))
+POOL_TIMEOUT = float(os.getenv("ELEVENLABS_POOL_TIMEOUT", "30"))
+
+# Account and voice lookups are small; give up on them sooner than on synthesis
+METADATA_TIMEOUT = float(os.getenv("ELEVENLABS_METADATA_TIMEOUT", "15"))
+
+# Number of connections opened at startup so the first requests skip the TLS handshake
+WARM_CONNECTIONS = int(os.getenv("ELEVENLABS_WARM_CONNECTIONS", "2"))
+
+# One client per event loop: the server loop keeps its pool for the whole
+# process, while CLI calls get a short-lived client of their own
+_clients = weakref.WeakKeyDictionary()
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Create a pooled client with the configured limits"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        headers={"xi-api-key": ELEVENLABS_API_KEY or ""},
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(
+            connect=CONNECT_TIMEOUT,
+            read=READ_TIMEOUT,
+            write=WRITE_TIMEOUT,
+            pool=POOL_TIMEOUT
+        )
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the shared client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[loop] = client
+
+    return client
+
+
+async def close_async_client():
+    """Close the client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def warm_up() -> int:
+    """
+    Open pooled connections ahead of the first real request.
+
+    Returns:
+        Number of connections that completed the TLS handshake
+    """
+    if not ELEVENLABS_API_KEY:
+        return 0
+
+    client = get_async_client()
+
+    async def _touch():
+        try:
+            await client.get("/models")
+            return True
+        except httpx.HTTPError:
+            return False
+
+    results = await asyncio.gather(*[_touch() for _ in range(max(WARM_CONNECTIONS, 1))])
+    return sum(results)
+
+
+# ==================== Requests ====================
+
+# Calls wait in the provider governor for a concurrency slot and a rate
+# token; a 429 is re-queued there (after Retry-After) instead of failing.
+# Transient failures are retried with jittered backoff, but only when
+# repeating the call is safe, and the circuit breaker fails fast while
+# ElevenLabs is unhealthy (GETs then fall back to their last good response).
+
+# Last successful GET responses, served while the circuit is open
+_stale = {}
+STALE_MAX_BYTES = 1024 * 1024
+
+
+def _remember(method: str, path: str, response: httpx.Response):
+    if method.upper() == "GET" and response.status_code == 200 and len(response.content) <= STALE_MAX_BYTES:
+        _stale[path] = (response.headers.get("content-type", ""), response.content)
+
+
+def _stale_response(method: str, path: str):
+    if method.upper() != "GET" or path not in _stale:
+        return None
+    content_type, content = _stale[path]
+    return httpx.Response(
+        200,
+        content=content,
+        headers={"content-type": content_type, "x-stale": "true"},
+        request=httpx.Request(method, f"{BASE_URL}{path}")
+    )
+
+
+def _may_retry(retry, method: str) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+
+
+async def request(method: str, path: str, retry: bool = None, **kwargs) -> httpx.Response:
+    """
+    Send a request to ElevenLabs and return the full response.
+
+    Args:
+        retry: Whether the call may be repeated after it reached ElevenLabs
+               (defaults to idempotent methods only; synthesis passes True)
+        **kwargs: Passed to httpx (json, data, files, timeout, ...)
+    """
+    client = get_async_client()
+    latency_group = latency_key(endpoint_of(method, path), kwargs)
+    retry_sent = _may_retry(retry, method)
+    requeues = retries = 0
+
+    while True:
+        try:
+            provider_breaker.before_call()
+        except ProviderUnavailableError:
+            stale = _stale_response(method, path)
+            if stale is not None:
+                return stale
+            raise
+
+        try:
+            async with provider_governor.slot():
+                started = time.monotonic()
+                response = await client.request(method, path, **kwargs)
+                delay = provider_governor.observe(
+                    latency_group, response.status_code, time.monotonic() - started, response.headers.get("retry-after")
+                )
+        except httpx.TransportError as e:
+            provider_breaker.record_failure()
+            if retries < RETRY_ATTEMPTS and (retry_sent or isinstance(e, NOT_SENT_ERRORS)):
+                await asyncio.sleep(backoff_delay(retries))
+                retries += 1
+                continue
+            stale = _stale_response(method, path)
+            if stale is not None:
+                return stale
+            raise
+        except BaseException:
+            provider_breaker.record_neutral()
+            raise
+
+        if response.status_code == 429:
+            provider_breaker.record_neutral()
+            if requeues < GOVERNOR_MAX_REQUEUES:
+                requeues += 1
+                provider_governor.requeued += 1
+                await asyncio.sleep(delay)
+                continue
+            return response
+
+        if is_failure_status(response.status_code):
+            provider_breaker.record_failure()
+            if retry_sent and retries < RETRY_ATTEMPTS:
+                await asyncio.sleep(backoff_delay(retries))
+                retries += 1
+                continue
+            return _stale_response(method, path) or response
+
+        provider_breaker.record_success()
+        _remember(method, path, response)
+        return response
+
+
+@asynccontextmanager
+async def stream(method: str, path: str, retry: bool = None, **kwargs):
+    """
+    Send a request to ElevenLabs and yield the response unread.
+    Retries happen only before the response is handed to the caller.
+    """
+    client = get_async_client()
+    latency_group = latency_key(endpoint_of(method, path), kwargs)
+    retry_sent = _may_retry(retry, method)
+    requeues = retries = 0
+
+    while True:
+        provider_breaker.before_call()
+        delivered = False
+
+        try:
+            async with provider_governor.slot():
+                started = time.monotonic()
+                async with client.stream(method, path, **kwargs) as response:
+                    # Latency is time to headers; the slot is held until the body is read
+                    delay = provider_governor.observe(
+                        latency_group, response.status_code, time.monotonic() - started, response.headers.get("retry-after")
+                    )
+                    status = response.status_code
+
+                    if status == 429 and requeues < GOVERNOR_MAX_REQUEUES:
+                        provider_breaker.record_neutral()
+                    elif is_failure_status(status) and retry_sent and retries < RETRY_ATTEMPTS:
+                        provider_breaker.record_failure()
+                    else:
+                        if is_failure_status(status):
+                            provider_breaker.record_failure()
+                        elif status == 429:
+                            provider_breaker.record_neutral()
+                        else:
+                            provider_breaker.record_success()
+                        delivered = True
+                        yield response
+                        return
+        except httpx.TransportError as e:
+            if delivered:
+                raise  # Failed while the caller was reading; too late to retry
+            provider_breaker.record_failure()
+            if retries < RETRY_ATTEMPTS and (retry_sent or isinstance(e, NOT_SENT_ERRORS)):
+                await asyncio.sleep(backoff_delay(retries))
+                retries += 1
+                continue
+            raise
+        except BaseException:
+            if not delivered:
+                provider_breaker.record_neutral()
+            raise
+
+        if status == 429:
+            requeues += 1
+            provider_governor.requeued += 1
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(backoff_delay(retries))
+            retries += 1
+
+
+# ==================== Sync Wrappers ====================
+
+def run_sync(coro):
+    """
+    Run an async provider call from synchronous code (CLI, scripts).
+    The temporary client is closed before returning.
+    """
+    async def _runner():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+
+    return asyncio.run(_runner())
+
+
+def iter_sync(agen):
+    """Drive an async generator of audio chunks from synchronous code"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(close_async_client())
+        loop.close()
@@ -0,0 +1,289 @@
+"""
+Fake ElevenLabs - Local stand-in for the ElevenLabs API
+Implements the endpoints this project calls and answers with valid MP3
+frames, so the server, CLI and load tests run without network or credits.
+
+Run it with `python cli.py fake-provider` and point the project at it:
+    ELEVENLABS_BASE_URL=http://localhost:8100/v1
+
+Behaviour is configurable from the environment (FAKE_ELEVENLABS_*) or at
+runtime with PUT /_fake/config:
+- latency: "fixed:300", "uniform:100,800" or "lognormal:300,0.5" (median ms, sigma)
+- error_rate: fraction of calls answered with 500
+- rate_limit_rate: fraction of calls answered with 429
+- max_concurrency: concurrent synthesis calls before 429 (like the real plan cap)
+- tier: subscription tier reported by /user/subscription
+"""
+
+import os
+import math
+import uuid
+import random
+import asyncio
+from fastapi import FastAPI, APIRouter, Request, UploadFile, File, Form, Header
+from fastapi.responses import Response, StreamingResponse, JSONResponse
+from pydantic import BaseModel
+from typing import Optional, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo, no padding: 417-byte frames
+FRAME_HEADER = b"\xff\xfb\x90\x64"
+FRAME_BYTES = 417
+FRAMES_PER_SECOND = 44100 / 1152
+
+# Speaking rate used to size the audio for a text
+CHARS_PER_SECOND = 15
+
+STREAM_FRAMES_PER_CHUNK = 10
+
+
+class FakeConfig(BaseModel):
+    """Runtime behaviour of the fake provider"""
+    latency: str = os.getenv("FAKE_ELEVENLABS_LATENCY", "lognormal:300,0.5")
+    stream_chunk_delay_ms: float = float(os.getenv("FAKE_ELEVENLABS_CHUNK_DELAY_MS", "20"))
+    error_rate: float = float(os.getenv("FAKE_ELEVENLABS_ERROR_RATE", "0"))
+    rate_limit_rate: float = float(os.getenv("FAKE_ELEVENLABS_429_RATE", "0"))
+    max_concurrency: int = int(os.getenv("FAKE_ELEVENLABS_MAX_CONCURRENCY", "0"))  # 0 = unlimited
+    tier: str = os.getenv("FAKE_ELEVENLABS_TIER", "creator")
+    seed: Optional[int] = None
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    """Draw one latency in seconds from a distribution spec"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+
+    if kind == "fixed":
+        ms = values[0] if values else 0
+    elif kind == "uniform":
+        ms = rng.uniform(values[0], values[1])
+    elif kind == "lognormal":
+        ms = rng.lognormvariate(math.log(values[0]), values[1] if len(values) > 1 else 0.5)
+    else:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+
+    return max(0.0, ms) / 1000
+
+
+def mp3_frames(seconds: float) -> bytes:
+    """Silent but valid MP3 audio of about the given duration"""
+    frame = FRAME_HEADER + b"\x00" * (FRAME_BYTES - len(FRAME_HEADER))
+    return frame * max(1, round(seconds * FRAMES_PER_SECOND))
+
+
+def create_fake_app(config: FakeConfig = None) -> FastAPI:
+    """Build the fake provider; every instance keeps its own state"""
+    app = FastAPI(title="Fake ElevenLabs", docs_url=None, redoc_url=None)
+    router = APIRouter(prefix="/v1")
+
+    state = {
+        "config": config or FakeConfig(),
+        "in_flight": 0,
+        "calls": {},
+        "voices": {},
+        "characters": 0
+    }
+    rng = random.Random(state["config"].seed)
+
+    def count(endpoint: str, outcome: str):
+        calls = state["calls"].setdefault(endpoint, {})
+        calls[outcome] = calls.get(outcome, 0) + 1
+
+    async def admit(endpoint: str, api_key: Optional[str], limited: bool = False):
+        """Apply auth, injected faults and latency; returns an error response or None"""
+        cfg = state["config"]
+
+        if not api_key:
+            count(endpoint, "401")
+            return JSONResponse({"detail": {"status": "invalid_api_key"}}, status_code=401)
+
+        if limited and cfg.max_concurrency and state["in_flight"] >= cfg.max_concurrency:
+            count(endpoint, "429")
+            return JSONResponse(
+                {"detail": {"status": "too_many_concurrent_requests"}},
+                status_code=429,
+                headers={"Retry-After": "1"}
+            )
+
+        roll = rng.random()
+        if roll < cfg.rate_limit_rate:
+            count(endpoint, "429")
+            return JSONResponse(
+                {"detail": {"status": "system_busy"}},
+                status_code=429,
+                headers={"Retry-After": "1"}
+            )
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            await asyncio.sleep(sample_latency(cfg.latency, rng))
+            count(endpoint, "500")
+            return JSONResponse({"detail": "Injected failure"}, status_code=500)
+
+        count(endpoint, "200")
+        return None
+
+    async def synthesize(endpoint: str, api_key: Optional[str], seconds: float, streaming: bool):
+        error = await admit(endpoint, api_key, limited=True)
+        if error:
+            return error
+
+        cfg = state["config"]
+        state["in_flight"] += 1
+        audio = mp3_frames(seconds)
+
+        if not streaming:
+            try:
+                await asyncio.sleep(sample_latency(cfg.latency, rng))
+            finally:
+                state["in_flight"] -= 1
+            return Response(audio, media_type="audio/mpeg")
+
+        # Stream: first byte after the sampled latency, then one chunk per delay
+        try:
+            await asyncio.sleep(sample_latency(cfg.latency, rng))
+        except BaseException:
+            state["in_flight"] -= 1
+            raise
+
+        async def chunks():
+            try:
+                step = FRAME_BYTES * STREAM_FRAMES_PER_CHUNK
+                for offset in range(0, len(audio), step):
+                    yield audio[offset:offset + step]
+                    await asyncio.sleep(cfg.stream_chunk_delay_ms / 1000)
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(chunks(), media_type="audio/mpeg")
+
+    # ==================== Speech ====================
+
+    @router.post("/text-to-speech/{voice_id}")
+    async def text_to_speech(voice_id: str, request: Request, xi_api_key: Optional[str] = Header(None)):
+        text = (await request.json()).get("text", "")
+        state["characters"] += len(text)
+        return await synthesize("text-to-speech", xi_api_key, len(text) / CHARS_PER_SECOND, streaming=False)
+
+    @router.post("/text-to-speech/{voice_id}/stream")
+    async def text_to_speech_stream(voice_id: str, request: Request, xi_api_key: Optional[str] = Header(None)):
+        text = (await request.json()).get("text", "")
+        state["characters"] += len(text)
+        return await synthesize("text-to-speech/stream", xi_api_key, len(text) / CHARS_PER_SECOND, streaming=True)
+
+    @router.post("/speech-to-speech/{voice_id}/stream")
+    async def speech_to_speech_stream(
+        voice_id: str,
+        audio: UploadFile = File(...),
+        model_id: str = Form(None),
+        voice_settings: str = Form(None),
+        xi_api_key: Optional[str] = Header(None)
+    ):
+        size = len(await audio.read())
+        seconds = size / (128000 / 8)  # Same length as a 128 kbps input
+        return await synthesize("speech-to-speech/stream", xi_api_key, seconds, streaming=True)
+
+    # ==================== Voices ====================
+
+    @router.get("/voices")
+    async def list_voices(xi_api_key: Optional[str] = Header(None)):
+        error = await admit("voices", xi_api_key)
+        if error:
+            return error
+        await asyncio.sleep(sample_latency(state["config"].latency, rng) / 3)
+        premade = [
+            {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "category": "premade", "preview_url": None},
+            {"voice_id": "pNInz6obpgDQGcFmaJgB", "name": "Adam", "category": "premade", "preview_url": None}
+        ]
+        return {"voices": premade + list(state["voices"].values())}
+
+    @router.post("/voices/add")
+    async def add_voice(
+        name: str = Form(...),
+        description: str = Form(None),
+        files: List[UploadFile] = File(...),
+        xi_api_key: Optional[str] = Header(None)
+    ):
+        error = await admit("voices/add", xi_api_key)
+        if error:
+            return error
+        await asyncio.sleep(sample_latency(state["config"].latency, rng))
+        voice_id = uuid.uuid4().hex[:20]
+        state["voices"][voice_id] = {
+            "voice_id": voice_id,
+            "name": name,
+            "description": description,
+            "category": "cloned",
+            "preview_url": None
+        }
+        return {"voice_id": voice_id}
+
+    @router.get("/voices/{voice_id}")
+    async def get_voice(voice_id: str, xi_api_key: Optional[str] = Header(None)):
+        error = await admit("voices/get", xi_api_key)
+        if error:
+            return error
+        if voice_id not in state["voices"]:
+            return JSONResponse({"detail": {"status": "voice_not_found"}}, status_code=404)
+        return state["voices"][voice_id]
+
+    @router.delete("/voices/{voice_id}")
+    async def delete_voice(voice_id: str, xi_api_key: Optional[str] = Header(None)):
+        error = await admit("voices/delete", xi_api_key)
+        if error:
+            return error
+        state["voices"].pop(voice_id, None)
+        return {"status": "ok"}
+
+    # ==================== Account ====================
+
+    @router.get("/models")
+    async def list_models(xi_api_key: Optional[str] = Header(None)):
+        return [{"model_id": "eleven_multilingual_v2"}, {"model_id": "eleven_multilingual_sts_v2"}]
+
+    @router.get("/user")
+    async def get_user(xi_api_key: Optional[str] = Header(None)):
+        error = await admit("user", xi_api_key)
+        if error:
+            return error
+        return {"subscription": {"tier": state["config"].tier}, "is_new_user": False, "xi_api_key": "fake"}
+
+    @router.get("/user/subscription")
+    async def get_subscription(xi_api_key: Optional[str] = Header(None)):
+        error = await admit("user/subscription", xi_api_key)
+        if error:
+            return error
+        return {
+            "tier": state["config"].tier,
+            "character_count": state["characters"],
+            "character_limit": 100000,
+            "voice_limit": 30,
+            "status": "active",
+            "next_character_count_reset_unix": 0
+        }
+
+    app.include_router(router)
+
+    # ==================== Control ====================
+
+    @app.get("/_fake/stats")
+    async def fake_stats():
+        return {
+            "config": state["config"].dict(),
+            "in_flight": state["in_flight"],
+            "characters": state["characters"],
+            "calls": state["calls"]
+        }
+
+    @app.put("/_fake/config")
+    async def update_fake_config(config: FakeConfig):
+        state["config"] = config
+        if config.seed is not None:
+            rng.seed(config.seed)
+        return {"success": True, "config": config.dict()}
+
+    return app
+
+
+# Default instance for `uvicorn execution.fake_elevenlabs:app`
+app = create_fake_app()
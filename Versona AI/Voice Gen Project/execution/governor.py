@@ -0,0 +1,275 @@
+"""
+Provider Governor - Rate and concurrency control for ElevenLabs calls
+Every outbound request waits here for a concurrency slot and a rate token,
+so bursts queue inside the server instead of turning into 429s.
+
+The concurrency limit starts at the plan's cap and adapts (AIMD): it is
+halved when ElevenLabs answers 429 or latency climbs well above its
+baseline, and grows back by one slot per window of healthy responses.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GOVERNOR_RATE = float(os.getenv("GOVERNOR_RATE_PER_SECOND", "10"))
+GOVERNOR_BURST = int(os.getenv("GOVERNOR_BURST", "20"))
+GOVERNOR_MIN_CONCURRENCY = int(os.getenv("GOVERNOR_MIN_CONCURRENCY", "1"))
+GOVERNOR_LATENCY_FACTOR = float(os.getenv("GOVERNOR_LATENCY_FACTOR", "3"))
+
+# Fixed cap; when unset the cap comes from the subscription tier
+GOVERNOR_MAX_CONCURRENCY = os.getenv("GOVERNOR_MAX_CONCURRENCY")
+
+# Cap used until the subscription tier is known
+DEFAULT_CONCURRENCY = 2
+
+# Times a 429 is re-queued before it is returned to the caller
+GOVERNOR_MAX_REQUEUES = int(os.getenv("GOVERNOR_MAX_REQUEUES", "5"))
+
+# Synthesis time grows with text length, so latency is only compared between
+# texts of similar size: up to 100, 400, 1600, ... characters
+SIZE_BUCKET_CHARS = 100
+
+
+def endpoint_of(method: str, path: str) -> str:
+    """Group requests by method and first path segment ("POST /text-to-speech")"""
+    return f"{method.upper()} /{path.lstrip('/').split('/', 1)[0]}"
+
+
+def latency_key(endpoint: str, kwargs: dict) -> Optional[str]:
+    """
+    Group a request with others of comparable cost for latency tracking.
+    Text payloads are bucketed by length ("POST /text-to-speech <=400 chars").
+    Uploads (speech to speech, cloning) have no comparable cost: None, so
+    only their 429s steer the limit.
+    """
+    if kwargs.get("files"):
+        return None
+    payload = kwargs.get("json")
+    if isinstance(payload, dict) and isinstance(payload.get("text"), str):
+        limit = SIZE_BUCKET_CHARS
+        while limit < len(payload["text"]):
+            limit *= 4
+        return f"{endpoint} <={limit} chars"
+    return endpoint
+
+
+def _wake_first(waiters: deque):
+    while waiters:
+        waiter = waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
+            return
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; each request takes one"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        """Hold every request for `seconds` (e.g. a Retry-After header)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """Semaphore whose size moves between minimum and maximum (AIMD)"""
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            while True:
+                await waiter
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                # Limit shrank while we waited: queue again at the front
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.appendleft(waiter)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                _wake_first(self._waiters)  # Pass the wake-up on
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        _wake_first(self._waiters)
+
+    def decrease(self):
+        """Multiplicative decrease"""
+        self.limit = max(self.minimum, self.limit / 2)
+
+    def increase(self):
+        """Additive increase: about one slot per `limit` healthy responses"""
+        previous = int(self.limit)
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        if int(self.limit) > previous:
+            _wake_first(self._waiters)
+
+    def set_maximum(self, maximum: int):
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        for _ in range(max(0, self.maximum - self.in_flight)):
+            _wake_first(self._waiters)
+
+
+class ProviderGovernor:
+    """Token bucket plus adaptive concurrency limit for one provider account"""
+
+    def __init__(self, rate: float, burst: int, concurrency: int, min_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(concurrency, min_concurrency)
+        self.tier = None
+        self.latency = {}  # latency key -> [ewma, baseline] in seconds
+        self._last_decrease = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.requeued = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a concurrency slot, then a rate token"""
+        await self.limiter.acquire()
+        try:
+            await self.bucket.acquire()
+            self.requests += 1
+            yield
+        finally:
+            self.limiter.release()
+
+    def _decrease(self):
+        # At most one decrease per second, so one burst of 429s halves once
+        now = time.monotonic()
+        if now - self._last_decrease >= 1.0:
+            self.limiter.decrease()
+            self._last_decrease = now
+
+    def observe(self, key: Optional[str], status_code: int, latency: float, retry_after: str = None) -> float:
+        """
+        Feed one response into the governor.
+        Latency is tracked per latency_key (endpoint, and text size for
+        synthesis), since a long text or an account lookup would otherwise
+        look like provider slowdown next to a short greeting. With key None
+        the latency is ignored.
+
+        Returns:
+            Seconds to wait before re-queueing (429), otherwise 0
+        """
+        if status_code == 429:
+            self.throttled += 1
+            self._decrease()
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = 1.0
+            self.bucket.pause(delay)
+            return delay
+
+        if status_code >= 500:
+            return 0
+
+        if key is None:
+            self.limiter.increase()
+            return 0
+
+        entry = self.latency.get(key)
+        if entry is None:
+            entry = self.latency[key] = [latency, latency]
+        ewma = entry[0] = 0.8 * entry[0] + 0.2 * latency
+        if ewma < entry[1]:
+            entry[1] = ewma
+        else:
+            # Let the baseline drift up slowly so it follows real changes in load
+            entry[1] += (ewma - entry[1]) * 0.01
+
+        if ewma > entry[1] * GOVERNOR_LATENCY_FACTOR:
+            self._decrease()
+        else:
+            self.limiter.increase()
+        return 0
+
+    def configure(self, subscription: dict):
+        """Size the concurrency cap to the subscription tier"""
+        from execution.analytics import PRICING
+
+        plans = PRICING["elevenlabs"]["plans"]
+        self.tier = subscription.get("tier", "free").lower()
+        if GOVERNOR_MAX_CONCURRENCY:
+            return
+        plan = plans.get(self.tier, plans["free"])
+        self.limiter.set_maximum(plan["concurrency"])
+
+    async def configure_from_plan(self) -> int:
+        """Fetch the subscription and apply its concurrency cap"""
+        from execution.analytics import get_subscription_info_async
+
+        self.configure(await get_subscription_info_async())
+        return self.limiter.maximum
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        return {
+            "tier": self.tier,
+            "concurrency_limit": int(self.limiter.limit),
+            "concurrency_max": self.limiter.maximum,
+            "in_flight": self.limiter.in_flight,
+            "queued": len(self.limiter._waiters),
+            "rate_per_second": self.bucket.rate,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "requeued": self.requeued,
+            "latency_ms": {
+                key: {"ewma": round(ewma * 1000, 1), "baseline": round(baseline * 1000, 1)}
+                for key, (ewma, baseline) in self.latency.items()
+            }
+        }
+
+
+# Shared governor for every ElevenLabs call
+provider_governor = ProviderGovernor(
+    GOVERNOR_RATE,
+    GOVERNOR_BURST,
+    int(GOVERNOR_MAX_CONCURRENCY or DEFAULT_CONCURRENCY),
+    GOVERNOR_MIN_CONCURRENCY
+)
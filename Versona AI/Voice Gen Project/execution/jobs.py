@@ -0,0 +1,227 @@
+"""
+Background Jobs - Durable worker pool for provider operations
+Slow ElevenLabs calls (long TTS, speech to speech, voice cloning) run here
+instead of inside the HTTP request. Jobs live in the MongoDB jobs collection,
+so a job submitted before a restart is picked up again afterwards.
+"""
+
+import os
+import uuid
+import shutil
+import asyncio
+from dotenv import load_dotenv
+
+from database.models.job import (
+    JOB_COMPLETED, JOB_FAILED,
+    claim_next_job, fail_exhausted_jobs, renew_job_lease,
+    update_job_progress, finish_job, release_job, settle_abandoned_reservations
+)
+
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Uploaded inputs are kept here until their job finishes
+JOB_INPUT_DIR = ".tmp/jobs"
+
+
+def new_job_input_dir() -> str:
+    """Fresh directory for the uploaded inputs of one job (removed when it finishes)"""
+    path = os.path.join(JOB_INPUT_DIR, uuid.uuid4().hex)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class JobQueue:
+    """
+    Bounded pool of workers claiming jobs from MongoDB.
+
+    A claimed job carries a lease that its worker renews while it runs.
+    If the process dies the lease expires and another worker (here or in
+    another process) claims the job again, up to JOB_MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._handlers = {}
+        self._tasks = []
+        self._running = {}  # job id -> task of its handler
+        self._cancelled = set()  # job ids interrupted by a cancel request
+        self._wakeup = None
+        self._changes = {}  # job id -> Event set on the next change
+        self._watchers = {}  # job id -> number of wait_for_change calls waiting
+        self._db_getter = None
+        self.completed = 0
+        self.failed = 0
+
+    def register(self, kind: str, run, on_complete=None):
+        """
+        Register the handler for a job kind.
+
+        Args:
+            kind: Job kind ("tts", "sts", "clone")
+            run: Coroutine function (job, progress) -> result dict;
+                 progress(fraction, message) is awaitable
+            on_complete: Optional coroutine function (job, result) called once
+                 the job is marked completed (charge credits, save history)
+        """
+        self._handlers[kind] = (run, on_complete)
+
+    # ==================== Notifications ====================
+
+    def notify(self, job_id):
+        """Wake everyone watching this job"""
+        event = self._changes.pop(str(job_id), None)
+        if event:
+            event.set()
+
+    async def wait_for_change(self, job_id, timeout: float = JOB_POLL_SECONDS):
+        """Wait until this process changes the job, or timeout (other processes)"""
+        key = str(job_id)
+        event = self._changes.setdefault(key, asyncio.Event())
+        self._watchers[key] = self._watchers.get(key, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # The last watcher drops the Event (jobs finished by another process are never notified here)
+            self._watchers[key] -= 1
+            if not self._watchers[key]:
+                del self._watchers[key]
+                self._changes.pop(key, None)
+
+    def wake(self):
+        """Tell idle workers that a job was submitted"""
+        if self._wakeup:
+            self._wakeup.set()
+
+    # ==================== Lifecycle ====================
+
+    async def start(self, db_getter):
+        """Start the workers; unfinished jobs from a previous run are resumed"""
+        if self._tasks:
+            return
+        self._db_getter = db_getter
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"🧵 Job queue started ({self.workers} workers)")
+
+    async def stop(self):
+        """Stop the workers; running jobs are released for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def cancel_local(self, job_id):
+        """Interrupt a job if this process is running it"""
+        task = self._running.get(str(job_id))
+        if task:
+            self._cancelled.add(str(job_id))
+            task.cancel()
+        self.notify(job_id)
+
+    # ==================== Workers ====================
+
+    async def _worker(self):
+        while True:
+            try:
+                db = self._db_getter()
+                job = await claim_next_job(db, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Job queue could not claim work: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await fail_exhausted_jobs(db, JOB_MAX_ATTEMPTS)
+                    await settle_abandoned_reservations(db)
+                except Exception:
+                    pass
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._execute(db, job)
+
+    async def _execute(self, db, job: dict):
+        job_id = job["_id"]
+        key = str(job_id)
+        self.notify(key)
+
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            await finish_job(db, job_id, JOB_FAILED, error=f"Unknown job kind: {job['kind']}")
+            self.notify(key)
+            return
+        run, on_complete = handler
+
+        async def progress(fraction: float, message: str):
+            await update_job_progress(db, job_id, fraction, message)
+            self.notify(key)
+
+        task = asyncio.ensure_future(run(job, progress))
+        self._running[key] = task
+        heartbeat = asyncio.create_task(self._heartbeat(db, job_id, task))
+
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if key not in self._cancelled:
+                # The worker itself is stopping: hand the job back for the next start
+                await release_job(db, job_id)
+                raise
+            result = None
+        except Exception as e:
+            result = None
+            if await finish_job(db, job_id, JOB_FAILED, error=str(e)):
+                self.failed += 1
+                print(f"❌ Job {key} ({job['kind']}) failed: {e}")
+        finally:
+            heartbeat.cancel()
+            self._running.pop(key, None)
+            self._cancelled.discard(key)
+
+        if result is not None and await finish_job(db, job_id, JOB_COMPLETED, result=result):
+            self.completed += 1
+            if on_complete:
+                try:
+                    await on_complete(job, result)
+                except Exception as e:
+                    print(f"⚠️ Failed to finalize job {key}: {e}")
+
+        input_dir = job["params"].get("input_dir")
+        if input_dir:
+            await asyncio.to_thread(shutil.rmtree, input_dir, True)
+        self.notify(key)
+
+    async def _heartbeat(self, db, job_id, task):
+        """Renew the lease; stop the handler if the job was cancelled elsewhere"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            if await renew_job_lease(db, job_id, JOB_LEASE_SECONDS) is None:
+                self._cancelled.add(str(job_id))
+                task.cancel()
+                return
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        return {
+            "workers": len(self._tasks),
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+# Shared queue for every job endpoint
+job_queue = JobQueue()
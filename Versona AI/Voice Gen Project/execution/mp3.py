@@ -0,0 +1,224 @@
+"""
+MP3 Utilities - Frame-level parsing and joining without decoding
+Used to stitch separately synthesized segments into one playable file.
+"""
+
+from collections import namedtuple
+
+# Bitrates in kbps, indexed by [version_group][layer][bitrate_index]
+# version_group: 0 = MPEG1, 1 = MPEG2 / MPEG2.5
+_BITRATES = {
+    (0, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (0, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (0, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (1, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (1, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (1, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates indexed by version bits (0 = MPEG2.5, 2 = MPEG2, 3 = MPEG1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+FrameHeader = namedtuple(
+    "FrameHeader",
+    ["version", "layer", "bitrate", "sample_rate", "samples", "length", "channels"]
+)
+
+
+def parse_header(data, offset: int = 0):
+    """
+    Parse the 4-byte frame header at offset.
+
+    Returns:
+        FrameHeader, or None if the bytes are not a valid header
+    """
+    if offset + 4 > len(data):
+        return None
+
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    version_group = 0 if version_bits == 3 else 1
+    bitrate = _BITRATES[(version_group, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version_group == 1:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+
+    channels = 1 if (b3 >> 6) == 3 else 2
+    version = {3: 1.0, 2: 2.0, 0: 2.5}[version_bits]
+
+    return FrameHeader(version, layer, bitrate, sample_rate, samples, length, channels)
+
+
+def _id3v2_size(data) -> int:
+    """Size of a leading ID3v2 tag, or 0 if there is none"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data, offset: int, header: FrameHeader) -> bool:
+    """True for Xing/Info/VBRI header frames, which carry no audio"""
+    if header.version == 1.0:
+        side_info = 17 if header.channels == 1 else 32
+    else:
+        side_info = 9 if header.channels == 1 else 17
+
+    tag = bytes(data[offset + 4 + side_info:offset + 8 + side_info])
+    return tag in (b"Xing", b"Info") or bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+
+def iter_frames(data):
+    """
+    Yield (offset, FrameHeader) for every audio frame in data.
+    Tags, a leading Xing/Info frame and a truncated last frame are
+    skipped; junk between frames is resynchronized over.
+    """
+    offset = _id3v2_size(data)
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    first = True
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or offset + header.length > end:
+            offset += 1
+            continue
+
+        if first and _is_info_frame(data, offset, header):
+            first = False
+            offset += header.length
+            continue
+
+        first = False
+        yield offset, header
+        offset += header.length
+
+
+def strip(data) -> bytes:
+    """Reduce an MP3 file to its audio frames (no tags, no Info frame)"""
+    out = bytearray()
+    view = memoryview(data)
+    for offset, header in iter_frames(data):
+        out += view[offset:offset + header.length]
+    return bytes(out)
+
+
+def concat(pieces: list) -> bytes:
+    """
+    Join MP3 files frame-accurately into a single stream.
+    Each piece is reduced to its audio frames so per-piece tags and
+    Info headers do not end up in the middle of the output.
+    """
+    if len(pieces) == 1:
+        return pieces[0]
+
+    return b"".join(strip(piece) for piece in pieces)
+
+
+AudioInfo = namedtuple(
+    "AudioInfo",
+    ["duration", "bitrate", "sample_rate", "channels", "frames", "junk_bytes", "truncated"]
+)
+
+
+def probe(data) -> AudioInfo:
+    """
+    Measure an MP3 from its frame headers alone (nothing is decoded).
+
+    Duration is exact: the sum of samples over every audio frame. Bitrate is
+    the average over audio frames, so it is also right for VBR files.
+    junk_bytes counts bytes that were not tags or frames, and truncated is
+    True when the last frame is cut short.
+    """
+    offset = _id3v2_size(data)
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    headers = {}  # Every frame of a CBR stream shares one or two header values
+    frames = samples = audio_bytes = junk = 0
+    sample_rate = channels = 0
+    truncated = False
+    first = True
+
+    while offset + 4 <= end:
+        raw = bytes(data[offset:offset + 4])
+        header = headers.get(raw)
+        if header is None:
+            header = parse_header(raw)
+            if header is None:
+                junk += 1
+                offset += 1
+                continue
+            headers[raw] = header
+
+        if offset + header.length > end:
+            truncated = True
+            junk += end - offset
+            break
+
+        if first:
+            first = False
+            if _is_info_frame(data, offset, header):
+                offset += header.length
+                continue
+
+        frames += 1
+        samples += header.samples
+        audio_bytes += header.length
+        sample_rate = header.sample_rate
+        channels = header.channels
+        offset += header.length
+
+    junk += max(0, end - offset) if not truncated else 0
+    duration = samples / sample_rate if sample_rate else 0.0
+    bitrate = int(audio_bytes * 8 / duration) if duration else 0
+
+    return AudioInfo(duration, bitrate, sample_rate, channels, frames, junk, truncated)
+
+
+def require_audio(data) -> AudioInfo:
+    """Probe data and raise ValueError unless it holds playable MP3 frames"""
+    info = probe(data)
+    if info.frames == 0:
+        raise ValueError("Invalid audio from provider: no MP3 frames found")
+    return info
+
+
+def probe_file(path: str) -> AudioInfo:
+    """probe() for an MP3 on disk (blocking; run it in a thread from async code)"""
+    with open(path, "rb") as f:
+        return probe(f.read())
+
+
+def require_audio_file(path: str) -> AudioInfo:
+    """require_audio() for an MP3 on disk (blocking; run it in a thread from async code)"""
+    with open(path, "rb") as f:
+        return require_audio(f.read())
@@ -0,0 +1,187 @@
+"""
+Phrase Cache - Sentence-level audio store shared across different texts
+Sentences (greetings, sign-offs, boilerplate) recur inside otherwise
+different texts, so their audio is stored once and reused wherever
+they appear.
+
+Layout in PHRASE_CACHE_DIR:
+- segments.bin: append-only MP3 frames of every cached sentence, memory-mapped for reads
+- index.bin: fixed-size records (key digest, offset, length) into segments.bin
+"""
+
+import os
+import mmap
+import struct
+import asyncio
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PHRASE_CACHE_ENABLED = os.getenv("PHRASE_CACHE_ENABLED", "true").lower() == "true"
+PHRASE_CACHE_DIR = os.getenv("PHRASE_CACHE_DIR", ".tmp/cache/phrases")
+PHRASE_CACHE_MAX_BYTES = int(os.getenv("PHRASE_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# 32-byte SHA-256 digest, 8-byte offset, 4-byte length
+_RECORD = struct.Struct("<32sQI")
+
+
+class PhraseCache:
+    """
+    Memory-mapped segment file with an in-memory offset index.
+    When the segment file outgrows max_bytes it is compacted down to the
+    most recently used half.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._segments_path = os.path.join(directory, "segments.bin")
+        self._index_path = os.path.join(directory, "index.bin")
+        self._index = OrderedDict()  # digest -> (offset, length)
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+
+    # ==================== Files ====================
+
+    def _open(self):
+        """Open the segment file and load the index (caller holds the lock)"""
+        if self._file is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self._segments_path, "a+b")
+        self._file.seek(0, os.SEEK_END)
+        self._size = self._file.tell()
+
+        self._index.clear()
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "rb") as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % _RECORD.size  # Ignore a torn last record
+            for digest, offset, length in _RECORD.iter_unpack(raw[:usable]):
+                if offset + length <= self._size:
+                    self._index[digest] = (offset, length)
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _view(self, end: int):
+        """Memory map covering at least [0, end) of the segment file"""
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    # ==================== Sync Operations ====================
+
+    def _get_many(self, digests: list) -> list:
+        results = []
+        with self._lock:
+            self._open()
+            for digest in digests:
+                entry = self._index.get(digest)
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                offset, length = entry
+                self._index.move_to_end(digest)
+                self.hits += 1
+                results.append(bytes(self._view(offset + length)[offset:offset + length]))
+        return results
+
+    def _put_many(self, items: list):
+        with self._lock:
+            self._open()
+            records = bytearray()
+            for digest, data in items:
+                if digest in self._index or not data:
+                    continue
+                self._file.write(data)
+                self._index[digest] = (self._size, len(data))
+                records += _RECORD.pack(digest, self._size, len(data))
+                self._size += len(data)
+            self._file.flush()
+
+            with open(self._index_path, "ab") as f:
+                f.write(records)
+
+            if self._size > self.max_bytes:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite both files keeping the most recently used half (caller holds the lock)"""
+        keep = []
+        budget = self.max_bytes // 2
+        for digest in reversed(self._index):
+            offset, length = self._index[digest]
+            if length > budget:
+                break
+            budget -= length
+            keep.append(digest)
+        keep.reverse()
+
+        view = self._view(self._size)
+        new_index = OrderedDict()
+        tmp_segments = f"{self._segments_path}.tmp"
+        tmp_index = f"{self._index_path}.tmp"
+        position = 0
+
+        with open(tmp_segments, "wb") as seg, open(tmp_index, "wb") as idx:
+            for digest in keep:
+                offset, length = self._index[digest]
+                seg.write(view[offset:offset + length])
+                idx.write(_RECORD.pack(digest, position, length))
+                new_index[digest] = (position, length)
+                position += length
+
+        self._close()
+        os.replace(tmp_segments, self._segments_path)
+        os.replace(tmp_index, self._index_path)
+        self._open()
+        self._index = new_index
+        self.compactions += 1
+
+    # ==================== Public API ====================
+
+    async def get_many(self, keys: list) -> list:
+        """Look up several phrase keys; None for each miss"""
+        digests = [bytes.fromhex(key) for key in keys]
+        return await asyncio.to_thread(self._get_many, digests)
+
+    async def put_many(self, items: list):
+        """Store (key, mp3 frames) pairs"""
+        pairs = [(bytes.fromhex(key), data) for key, data in items]
+        await asyncio.to_thread(self._put_many, pairs)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": PHRASE_CACHE_ENABLED,
+            "phrases": len(self._index),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "compactions": self.compactions
+        }
+
+
+# Shared phrase store for every TTS entry point
+phrase_cache = PhraseCache(PHRASE_CACHE_DIR, PHRASE_CACHE_MAX_BYTES)
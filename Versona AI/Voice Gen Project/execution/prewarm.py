@@ -0,0 +1,185 @@
+"""
+Cache Prewarming - Synthesize the most likely requests ahead of time
+Suggested texts, preset voices and the most frequent phrases from history
+are rendered into the audio cache during idle periods, within a credit budget.
+"""
+
+import os
+import asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+
+from execution.tts import DEFAULT_VOICES, resolve_voice_id, text_to_speech_segmented_async, tts_flights
+from execution.audio_cache import CACHE_ENABLED, tts_cache, make_cache_key
+
+load_dotenv()
+
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "50"))
+PREWARM_CREDIT_BUDGET = int(os.getenv("PREWARM_CREDIT_BUDGET", "5000"))  # Characters per run
+PREWARM_INTERVAL = int(os.getenv("PREWARM_INTERVAL_SECONDS", "21600"))  # 6 hours
+PREWARM_START_DELAY = int(os.getenv("PREWARM_START_DELAY_SECONDS", "60"))
+
+# History phrases must have been requested at least this often to qualify
+MIN_HISTORY_COUNT = 3
+
+# Static candidates rank as if they had been requested this many times
+SUGGESTED_WEIGHT = 5
+
+MODEL_ID = "eleven_multilingual_v2"
+STABILITY = 0.5
+SIMILARITY_BOOST = 0.75
+
+
+async def _history_candidates(db, limit: int) -> list:
+    """Most frequent complete texts from the history collection"""
+    from routes.voice_routes import CLONED_VOICES
+
+    pipeline = [
+        {"$match": {
+            "action": {"$in": ["tts", "voice_cloning"]},
+            "full_text_length": {"$lte": 200}  # Longer texts are stored truncated
+        }},
+        {"$group": {
+            "_id": {"text": "$text", "action": "$action", "voice_id": "$voice_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gte": MIN_HISTORY_COUNT}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+
+    candidates = []
+    async for row in db.history.aggregate(pipeline):
+        text = row["_id"].get("text")
+        voice_id = row["_id"].get("voice_id")
+        if not text:
+            continue
+        if row["_id"].get("action") == "voice_cloning":
+            if voice_id not in CLONED_VOICES:
+                continue
+            voice_id = CLONED_VOICES[voice_id]["elevenlabs_id"]
+        candidates.append((row["count"], text, voice_id))
+
+    return candidates
+
+
+def _static_candidates() -> list:
+    """Suggested texts paired with every preset and premium cloned voice"""
+    from routes.tts_routes import SUGGESTED_TEXTS
+    from routes.voice_routes import CLONED_VOICES
+
+    voices = list(DEFAULT_VOICES.keys()) + [v["elevenlabs_id"] for v in CLONED_VOICES.values()]
+    return [(SUGGESTED_WEIGHT, text, voice) for text in SUGGESTED_TEXTS for voice in voices]
+
+
+async def _wait_until_idle(poll_seconds: float = 1.0):
+    """Yield to live traffic: wait while user synthesis calls are in flight"""
+    while tts_flights.stats()["in_flight"] > 0:
+        await asyncio.sleep(poll_seconds)
+
+
+async def prewarm_cache(
+    db=None,
+    top_n: int = PREWARM_TOP_N,
+    credit_budget: int = PREWARM_CREDIT_BUDGET
+) -> dict:
+    """
+    Synthesize the top-N (text, voice) pairs that are not cached yet.
+
+    Args:
+        db: Database handle for history phrases (static candidates only if None)
+        top_n: Maximum number of uncached pairs to synthesize
+        credit_budget: Maximum characters to spend in this run
+
+    Returns:
+        Report with counts of cached, synthesized and skipped pairs
+    """
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "considered": 0,
+        "already_cached": 0,
+        "synthesized": 0,
+        "credits_spent": 0,
+        "skipped_budget": 0,
+        "errors": 0
+    }
+
+    if not CACHE_ENABLED:
+        report["error"] = "TTS cache is disabled"
+        return report
+
+    candidates = _static_candidates()
+    if db is not None:
+        try:
+            candidates += await _history_candidates(db, top_n)
+        except Exception as e:
+            print(f"⚠️ Prewarm could not read history: {e}")
+
+    await tts_cache.load()
+
+    # Highest demand first; the same pair may come from several sources
+    ranked = {}
+    for score, text, voice in candidates:
+        key = make_cache_key(text, resolve_voice_id(voice), MODEL_ID, STABILITY, SIMILARITY_BOOST)
+        if key not in ranked or ranked[key][0] < score:
+            ranked[key] = (score, text, voice)
+
+    # Cached pairs are dropped before the cut, so each run reaches further down the list
+    uncached = []
+    for key, candidate in ranked.items():
+        if tts_cache.contains(key):
+            report["already_cached"] += 1
+        else:
+            uncached.append(candidate)
+    selected = sorted(uncached, key=lambda candidate: -candidate[0])[:top_n]
+
+    for _, text, voice in selected:
+        report["considered"] += 1
+
+        if report["credits_spent"] + len(text) > credit_budget:
+            report["skipped_budget"] += 1
+            continue
+
+        await _wait_until_idle()
+        try:
+            await text_to_speech_segmented_async(
+                text, voice, MODEL_ID, STABILITY, SIMILARITY_BOOST
+            )
+            report["synthesized"] += 1
+            report["credits_spent"] += len(text)
+        except Exception as e:
+            report["errors"] += 1
+            print(f"⚠️ Prewarm failed for '{text[:30]}': {e}")
+
+    report["finished_at"] = datetime.now().isoformat()
+    return report
+
+
+async def prewarm_loop(db_getter=None, interval: int = PREWARM_INTERVAL):
+    """
+    Background task: prewarm once shortly after startup, then every interval.
+
+    Args:
+        db_getter: Callable returning the database (None to skip history)
+        interval: Seconds between runs
+    """
+    await asyncio.sleep(PREWARM_START_DELAY)
+
+    while True:
+        db = None
+        if db_getter:
+            try:
+                db = db_getter()
+            except Exception:
+                db = None
+
+        try:
+            report = await prewarm_cache(db)
+            print(
+                f"🔥 Cache prewarm: {report['synthesized']} synthesized, "
+                f"{report['already_cached']} already cached, {report['credits_spent']} credits"
+            )
+        except Exception as e:
+            print(f"⚠️ Cache prewarm failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,111 @@
+"""
+Resilience - Retries and circuit breaking for ElevenLabs calls
+Transient failures (5xx, dropped connections, timeouts) are retried with
+jittered exponential backoff. After repeated failures the circuit opens and
+calls fail fast until a trial request shows the provider has recovered.
+"""
+
+import os
+import time
+import random
+from dotenv import load_dotenv
+
+import httpx
+
+load_dotenv()
+
+RETRY_ATTEMPTS = int(os.getenv("ELEVENLABS_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("ELEVENLABS_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("ELEVENLABS_RETRY_MAX_DELAY", "8"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+# Methods that may be repeated even if the first attempt reached ElevenLabs
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+
+# Errors raised before the request was sent; retrying these is always safe
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class ProviderUnavailableError(Exception):
+    """ElevenLabs is failing; the circuit is open and the call was not sent"""
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry (0-based)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def is_failure_status(status_code: int) -> bool:
+    """Responses that count against provider health and may be retried"""
+    return status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Closed: calls pass. Open: calls fail fast for reset_seconds.
+    Half-open: one trial call passes; success closes, failure re-opens.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """Raise ProviderUnavailableError unless this call may go out"""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+
+        self.rejected += 1
+        retry_in = max(0, self.reset_seconds - (time.monotonic() - self.opened_at))
+        raise ProviderUnavailableError(
+            f"ElevenLabs is temporarily unavailable, retry in {retry_in:.0f}s"
+        )
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_neutral(self):
+        """The call ended without saying anything about provider health"""
+        self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected
+        }
+
+
+# Shared breaker for every ElevenLabs call
+provider_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
@@ -0,0 +1,48 @@
+"""
+Single Flight - Coalesce identical in-flight provider calls
+Concurrent callers with the same key wait on one upstream call and share
+its result instead of each paying for their own.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; later callers join it"""
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn):
+        """
+        Await fn() once per key, sharing the result with concurrent callers.
+
+        Args:
+            key: Identity of the call (e.g. the audio cache key)
+            fn: Zero-argument coroutine function performing the call
+
+        Returns:
+            Whatever fn() returns; its exception is raised to every caller
+        """
+        task = self._calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        # Shield so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Counters for the admin dashboard"""
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
@@ -4,16 +4,25 @@ Converts voice from one speaker to another voice
 """
 
 import os
-import requests
-from dotenv import load_dotenv
+import json
+import asyncio
 
-load_dotenv()
+from execution.elevenlabs_client import (
+    ELEVENLABS_API_KEY, request, stream, run_sync, iter_sync
+)
 
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-BASE_URL = "https://api.elevenlabs.io/v1"
 
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
-def speech_to_speech(
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def speech_to_speech_async(
     audio_path: str,
     voice_id: str,
     model_id: str = "eleven_english_sts_v2",
@@ -24,7 +33,8 @@ def speech_to_speech(
     output_path: str = None
 ) -> bytes:
     """
-    Convert speech from one voice to another using ElevenLabs STS.
+    Convert speech from one voice to another using ElevenLabs STS
+    without blocking the event loop.
     
     Args:
         audio_path: Path to the source audio file
@@ -45,12 +55,6 @@ def speech_to_speech(
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
     
-    url = f"{BASE_URL}/speech-to-speech/{voice_id}/stream"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
     # Voice settings as JSON string
     voice_settings = {
         "stability": stability,
@@ -59,16 +63,19 @@ def speech_to_speech(
         "use_speaker_boost": use_speaker_boost
     }
     
-    with open(audio_path, "rb") as audio_file:
-        files = {
-            "audio": audio_file
-        }
-        data = {
-            "model_id": model_id,
-            "voice_settings": str(voice_settings).replace("'", '"').replace("True", "true").replace("False", "false")
-        }
-        
-        response = requests.post(url, headers=headers, files=files, data=data)
+    audio_data = await asyncio.to_thread(_read_file, audio_path)
+    
+    files = {
+        "audio": (os.path.basename(audio_path), audio_data, "audio/mpeg")
+    }
+    data = {
+        "model_id": model_id,
+        "voice_settings": json.dumps(voice_settings)
+    }
+    
+    response = await request(
+        "POST", f"/speech-to-speech/{voice_id}/stream", files=files, data=data, retry=True
+    )
     
     if response.status_code != 200:
         raise Exception(f"STS Error: {response.status_code} - {response.text}")
@@ -77,31 +84,47 @@ def speech_to_speech(
     
     # Save to file if path provided
     if output_path:
-        with open(output_path, "wb") as f:
-            f.write(audio_bytes)
+        await asyncio.to_thread(_write_file, output_path, audio_bytes)
         print(f"Audio saved to: {output_path}")
     
     return audio_bytes
 
 
-def speech_to_speech_stream(
+def speech_to_speech(
+    audio_path: str,
+    voice_id: str,
+    model_id: str = "eleven_english_sts_v2",
+    stability: float = 0.5,
+    similarity_boost: float = 0.8,
+    style: float = 0.0,
+    use_speaker_boost: bool = True,
+    output_path: str = None
+) -> bytes:
+    """
+    Convert speech from one voice to another using ElevenLabs STS.
+    Blocking wrapper around speech_to_speech_async for the CLI and scripts.
+    
+    Returns:
+        Audio bytes (MP3 format)
+    """
+    return run_sync(speech_to_speech_async(
+        audio_path, voice_id, model_id, stability, similarity_boost,
+        style, use_speaker_boost, output_path
+    ))
+
+
+async def speech_to_speech_stream_async(
     audio_path: str,
     voice_id: str,
     model_id: str = "eleven_english_sts_v2"
 ):
     """
     Stream STS for real-time conversion.
-    Returns a generator of audio chunks.
+    Returns an async generator of audio chunks.
     """
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    url = f"{BASE_URL}/speech-to-speech/{voice_id}/stream"
-    
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY
-    }
-    
     voice_settings = {
         "stability": 0.5,
         "similarity_boost": 0.8,
@@ -109,23 +132,37 @@ def speech_to_speech_stream(
         "use_speaker_boost": True
     }
     
-    with open(audio_path, "rb") as audio_file:
-        files = {
-            "audio": audio_file
-        }
-        data = {
-            "model_id": model_id,
-            "voice_settings": str(voice_settings).replace("'", '"').replace("True", "true").replace("False", "false")
-        }
-        
-        response = requests.post(url, headers=headers, files=files, data=data, stream=True)
+    audio_data = await asyncio.to_thread(_read_file, audio_path)
     
-    if response.status_code != 200:
-        raise Exception(f"STS Stream Error: {response.status_code}")
+    files = {
+        "audio": (os.path.basename(audio_path), audio_data, "audio/mpeg")
+    }
+    data = {
+        "model_id": model_id,
+        "voice_settings": json.dumps(voice_settings)
+    }
     
-    for chunk in response.iter_content(chunk_size=1024):
-        if chunk:
-            yield chunk
+    async with stream(
+        "POST", f"/speech-to-speech/{voice_id}/stream", files=files, data=data, retry=True
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(f"STS Stream Error: {response.status_code}")
+        
+        async for chunk in response.aiter_bytes(1024):
+            if chunk:
+                yield chunk
+
+
+def speech_to_speech_stream(
+    audio_path: str,
+    voice_id: str,
+    model_id: str = "eleven_english_sts_v2"
+):
+    """
+    Stream STS for real-time conversion.
+    Returns a generator of audio chunks.
+    """
+    return iter_sync(speech_to_speech_stream_async(audio_path, voice_id, model_id))
 
 
 # CLI usage
@@ -133,8 +170,8 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 3:
-        print("Usage: python sts.py <source_audio> <voice_id> [output.mp3]")
-        print("\nExample: python sts.py input.mp3 Fgk4TfwyUJIUGvE1DLu8 converted.mp3")
+        print("Usage: python -m execution.sts <source_audio> <voice_id> [output.mp3]")
+        print("\nExample: python -m execution.sts input.mp3 Fgk4TfwyUJIUGvE1DLu8 converted.mp3")
         sys.exit(1)
     
     source_audio = sys.argv[1]
@@ -4,13 +4,17 @@ Converts Urdu text to natural-sounding speech
 """
 
 import os
-import requests
-from dotenv import load_dotenv
+import asyncio
+from collections import deque
 
-load_dotenv()
-
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-BASE_URL = "https://api.elevenlabs.io/v1"
+from execution.elevenlabs_client import (
+    ELEVENLABS_API_KEY, request, stream, run_sync, iter_sync
+)
+from execution.audio_cache import CACHE_ENABLED, tts_cache, make_cache_key
+from execution.singleflight import SingleFlight
+from execution.phrase_cache import PHRASE_CACHE_ENABLED, phrase_cache
+from execution.urdu_text import segment_text, split_sentences, pack_segments
+from execution import mp3
 
 # Default voice IDs (you can get these from ElevenLabs dashboard or /v1/voices)
 DEFAULT_VOICES = {
@@ -20,17 +24,44 @@ DEFAULT_VOICES = {
     "male-1": "Mbwx1ZAXuMdYGtJRjvvQ",    # Arnold
 }
 
+# Maximum number of segments of one long text synthesized at the same time
+SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", "4"))
 
-def text_to_speech(
+# Characters of neighbouring text sent as context for continuous prosody
+CONTEXT_CHARS = 200
+
+# Bytes read from the provider per streamed chunk
+STREAM_CHUNK_SIZE = int(os.getenv("TTS_STREAM_CHUNK_SIZE", "4096"))
+
+# Identical synthesis requests in flight at the same time share one provider call
+tts_flights = SingleFlight()
+
+
+def resolve_voice_id(voice_id: str = None) -> str:
+    """Map a preset name (or nothing) to an ElevenLabs voice ID"""
+    if not voice_id:
+        return DEFAULT_VOICES["female-1"]
+    return DEFAULT_VOICES.get(voice_id, voice_id)
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def text_to_speech_async(
     text: str,
     voice_id: str = None,
     model_id: str = "eleven_multilingual_v2",
     stability: float = 0.5,
     similarity_boost: float = 0.75,
-    output_path: str = None
+    output_path: str = None,
+    use_cache: bool = True
 ) -> bytes:
     """
-    Convert text to speech using ElevenLabs API.
+    Convert text to speech using ElevenLabs API without blocking the event loop.
+    Repeated requests are served from the shared audio cache, and sentences
+    already in the phrase cache are reused instead of synthesized again.
     
     Args:
         text: The text to convert (supports Urdu)
@@ -39,26 +70,161 @@ def text_to_speech(
         stability: Voice stability (0-1)
         similarity_boost: Similarity to original voice (0-1)
         output_path: Optional path to save the audio file
+        use_cache: Look up and store the result in the audio cache
         
     Returns:
         Audio bytes (MP3 format)
     """
+    audio_bytes = await _text_to_speech(
+        text, voice_id, model_id, stability, similarity_boost,
+        use_cache=use_cache, segmented=False, max_concurrency=SEGMENT_CONCURRENCY
+    )
+    
+    # Save to file if path provided
+    if output_path:
+        await asyncio.to_thread(_write_file, output_path, audio_bytes)
+        print(f"Audio saved to: {output_path}")
+    
+    return audio_bytes
+
+
+def text_to_speech(
+    text: str,
+    voice_id: str = None,
+    model_id: str = "eleven_multilingual_v2",
+    stability: float = 0.5,
+    similarity_boost: float = 0.75,
+    output_path: str = None,
+    use_cache: bool = True
+) -> bytes:
+    """
+    Convert text to speech using ElevenLabs API.
+    Blocking wrapper around text_to_speech_async for the CLI and scripts.
+    
+    Returns:
+        Audio bytes (MP3 format)
+    """
+    return run_sync(text_to_speech_async(
+        text, voice_id, model_id, stability, similarity_boost, output_path, use_cache
+    ))
+
+
+async def text_to_speech_segmented_async(
+    text: str,
+    voice_id: str = None,
+    model_id: str = "eleven_multilingual_v2",
+    stability: float = 0.5,
+    similarity_boost: float = 0.75,
+    max_concurrency: int = SEGMENT_CONCURRENCY,
+    use_cache: bool = True
+) -> bytes:
+    """
+    Convert long text to speech by synthesizing its sentences in parallel.
+    
+    The text is split on Urdu sentence boundaries, segments are synthesized
+    with neighbouring context under a bounded fan-out, and the results are
+    joined frame-accurately into one MP3. Short texts take the single-call path.
+    
+    Returns:
+        Audio bytes (MP3 format)
+    """
+    return await _text_to_speech(
+        text, voice_id, model_id, stability, similarity_boost,
+        use_cache=use_cache, segmented=True, max_concurrency=max_concurrency
+    )
+
+
+async def _text_to_speech(
+    text: str,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    use_cache: bool,
+    segmented: bool,
+    max_concurrency: int
+) -> bytes:
+    """Whole-text cache and request coalescing around _render"""
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    # Use default voice if not specified
-    if not voice_id:
-        voice_id = DEFAULT_VOICES["female-1"]
-    elif voice_id in DEFAULT_VOICES:
-        voice_id = DEFAULT_VOICES[voice_id]
+    voice_id = resolve_voice_id(voice_id)
+    use_cache = use_cache and CACHE_ENABLED
+    cache_key = make_cache_key(text, voice_id, model_id, stability, similarity_boost)
     
-    url = f"{BASE_URL}/text-to-speech/{voice_id}"
+    if use_cache:
+        cached = await tts_cache.get(cache_key)
+        if cached is not None:
+            return cached
     
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json"
-    }
+    async def _render_and_store():
+        audio = await _render(
+            text, voice_id, model_id, stability, similarity_boost, segmented, max_concurrency
+        )
+        if use_cache:
+            await tts_cache.put(cache_key, audio)
+        return audio
     
+    # Identical concurrent requests share one render
+    return await tts_flights.do(cache_key, _render_and_store)
+
+
+async def _render(
+    text: str,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    segmented: bool,
+    max_concurrency: int
+) -> bytes:
+    """Produce audio for text, reusing sentences from the phrase cache"""
+    if PHRASE_CACHE_ENABLED:
+        sentences = split_sentences(text)
+        if sentences:
+            return await _synthesize_by_phrase(
+                sentences, voice_id, model_id, stability, similarity_boost,
+                segmented, max_concurrency
+            )
+    
+    return await _render_text(
+        text, voice_id, model_id, stability, similarity_boost, segmented, max_concurrency
+    )
+
+
+async def _render_text(
+    text: str,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    segmented: bool,
+    max_concurrency: int
+) -> bytes:
+    """Synthesize a whole text: segmented in parallel, or one call"""
+    if segmented:
+        segments = segment_text(text)
+        if len(segments) > 1:
+            pieces = [
+                piece async for piece in iter_segments_async(
+                    segments, voice_id, model_id, stability, similarity_boost, max_concurrency
+                )
+            ]
+            return await asyncio.to_thread(mp3.concat, pieces)
+    
+    return await _synthesize(text, voice_id, model_id, stability, similarity_boost)
+
+
+async def _synthesize(
+    text: str,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    previous_text: str = None,
+    next_text: str = None
+) -> bytes:
+    """Single uncached call to the ElevenLabs TTS endpoint"""
     payload = {
         "text": text,
         "model_id": model_id,
@@ -68,45 +234,165 @@ def text_to_speech(
         }
     }
     
-    response = requests.post(url, json=payload, headers=headers)
+    # Neighbouring text keeps intonation continuous across segment joins
+    if previous_text:
+        payload["previous_text"] = previous_text[-CONTEXT_CHARS:]
+    if next_text:
+        payload["next_text"] = next_text[:CONTEXT_CHARS]
+    
+    response = await request("POST", f"/text-to-speech/{voice_id}", json=payload, retry=True)
     
     if response.status_code != 200:
         raise Exception(f"TTS Error: {response.status_code} - {response.text}")
     
-    audio_bytes = response.content
+    return response.content
+
+
+async def _synthesize_segment(
+    segments: list,
+    index: int,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float
+) -> bytes:
+    """Synthesize segments[index] with its neighbours as context"""
+    return await _synthesize(
+        segments[index], voice_id, model_id, stability, similarity_boost,
+        previous_text=segments[index - 1] if index > 0 else None,
+        next_text=segments[index + 1] if index + 1 < len(segments) else None
+    )
+
+
+async def _synthesize_by_phrase(
+    sentences: list,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    segmented: bool,
+    max_concurrency: int
+) -> bytes:
+    """
+    Assemble audio from the phrase cache, synthesizing only missing sentences.
+    
+    Every missing sentence is synthesized on its own, without the context of
+    its neighbours, and cached under its own key: its audio can then be
+    reused inside any text, and editing one sentence costs one sentence.
+    A sentence that repeats within the text is synthesized once.
+    """
+    keys = [
+        make_cache_key(sentence, voice_id, model_id, stability, similarity_boost)
+        for sentence in sentences
+    ]
+    pieces = await phrase_cache.get_many(keys)
     
-    # Save to file if path provided
-    if output_path:
-        with open(output_path, "wb") as f:
-            f.write(audio_bytes)
-        print(f"Audio saved to: {output_path}")
+    # Missing sentences in order of first appearance: key -> its sentence
+    missing = {}
+    for key, sentence, piece in zip(keys, sentences, pieces):
+        if piece is None:
+            missing.setdefault(key, sentence)
     
-    return audio_bytes
+    # Over-long sentences are still split (with context inside the sentence)
+    jobs = []
+    spans = {}  # key -> (first job, job count)
+    for key, sentence in missing.items():
+        segments = pack_segments([sentence]) if segmented else [sentence]
+        spans[key] = (len(jobs), len(segments))
+        jobs.extend((segments, index) for index in range(len(segments)))
+    
+    audio = [
+        piece async for piece in _synthesize_in_order(
+            jobs, voice_id, model_id, stability, similarity_boost, max_concurrency
+        )
+    ]
+    
+    rendered = await asyncio.to_thread(lambda: {
+        key: mp3.strip(mp3.concat(audio[first:first + count]))
+        for key, (first, count) in spans.items()
+    })
+    if rendered:
+        await phrase_cache.put_many(list(rendered.items()))
+    
+    pieces = [piece if piece is not None else rendered[key] for key, piece in zip(keys, pieces)]
+    return await asyncio.to_thread(mp3.concat, pieces)
 
 
-def text_to_speech_stream(
-    text: str,
+async def iter_segments_async(
+    segments: list,
     voice_id: str = None,
-    model_id: str = "eleven_multilingual_v2"
+    model_id: str = "eleven_multilingual_v2",
+    stability: float = 0.5,
+    similarity_boost: float = 0.75,
+    max_concurrency: int = SEGMENT_CONCURRENCY
 ):
     """
-    Stream TTS for real-time playback.
-    Returns a generator of audio chunks.
+    Synthesize text segments concurrently and yield their audio in order.
+    
+    At most max_concurrency segments are in flight; the first segment is
+    yielded as soon as it is ready, while later ones keep synthesizing.
+    
+    Args:
+        segments: Consecutive pieces of one text (see urdu_text.segment_text)
+        max_concurrency: Bound on simultaneous provider calls
+        
+    Returns:
+        Async generator of MP3 bytes, one item per segment
     """
     if not ELEVENLABS_API_KEY:
         raise ValueError("ELEVENLABS_API_KEY not found in .env")
     
-    if not voice_id:
-        voice_id = DEFAULT_VOICES["female-1"]
-    elif voice_id in DEFAULT_VOICES:
-        voice_id = DEFAULT_VOICES[voice_id]
+    voice_id = resolve_voice_id(voice_id)
+    jobs = [(segments, index) for index in range(len(segments))]
     
-    url = f"{BASE_URL}/text-to-speech/{voice_id}/stream"
+    async for piece in _synthesize_in_order(
+        jobs, voice_id, model_id, stability, similarity_boost, max_concurrency
+    ):
+        yield piece
+
+
+async def _synthesize_in_order(
+    jobs: list,
+    voice_id: str,
+    model_id: str,
+    stability: float,
+    similarity_boost: float,
+    max_concurrency: int
+):
+    """Bounded in-order fan-out over (segments, index) jobs"""
+    window = deque()
+    next_job = 0
+    try:
+        while next_job < len(jobs) or window:
+            while next_job < len(jobs) and len(window) < max(max_concurrency, 1):
+                segments, index = jobs[next_job]
+                window.append(asyncio.ensure_future(_synthesize_segment(
+                    segments, index, voice_id, model_id, stability, similarity_boost
+                )))
+                next_job += 1
+            yield await window.popleft()
+    finally:
+        for task in window:
+            task.cancel()
+
+
+async def text_to_speech_stream_async(
+    text: str,
+    voice_id: str = None,
+    model_id: str = "eleven_multilingual_v2",
+    chunk_size: int = STREAM_CHUNK_SIZE
+):
+    """
+    Stream TTS for real-time playback.
+    Returns an async generator of audio chunks.
     
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json"
-    }
+    Chunks are read from the provider only as the consumer asks for them,
+    so a slow consumer slows the upstream read instead of buffering audio.
+    """
+    if not ELEVENLABS_API_KEY:
+        raise ValueError("ELEVENLABS_API_KEY not found in .env")
+    
+    voice_id = resolve_voice_id(voice_id)
     
     payload = {
         "text": text,
@@ -117,14 +403,61 @@ def text_to_speech_stream(
         }
     }
     
-    response = requests.post(url, json=payload, headers=headers, stream=True)
+    async with stream("POST", f"/text-to-speech/{voice_id}/stream", json=payload, retry=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"TTS Stream Error: {response.status_code}")
+        
+        async for chunk in response.aiter_bytes(chunk_size):
+            if chunk:
+                yield chunk
+
+
+async def open_tts_stream(
+    text: str,
+    voice_id: str = None,
+    model_id: str = "eleven_multilingual_v2",
+    chunk_size: int = STREAM_CHUNK_SIZE
+):
+    """
+    Start a TTS stream and wait for its first chunk.
+    
+    Provider errors are raised here, before any response headers go out,
+    so routes can still answer with a proper error status.
     
-    if response.status_code != 200:
-        raise Exception(f"TTS Stream Error: {response.status_code}")
+    Returns:
+        Async generator of audio chunks, starting with the first one
+    """
+    chunks = text_to_speech_stream_async(text, voice_id, model_id, chunk_size)
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    except BaseException:
+        await chunks.aclose()
+        raise
     
-    for chunk in response.iter_content(chunk_size=1024):
-        if chunk:
-            yield chunk
+    async def _forward():
+        try:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    return _forward()
+
+
+def text_to_speech_stream(
+    text: str,
+    voice_id: str = None,
+    model_id: str = "eleven_multilingual_v2"
+):
+    """
+    Stream TTS for real-time playback.
+    Returns a generator of audio chunks.
+    """
+    return iter_sync(text_to_speech_stream_async(text, voice_id, model_id))
 
 
 # CLI usage
@@ -132,8 +465,8 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python tts.py 'Your text here' [voice_id] [output.mp3]")
-        print("\nExample: python tts.py 'السلام علیکم' female-1 output.mp3")
+        print("Usage: python -m execution.tts 'Your text here' [voice_id] [output.mp3]")
+        print("\nExample: python -m execution.tts 'السلام علیکم' female-1 output.mp3")
         sys.exit(1)
     
     text = sys.argv[1]
@@ -0,0 +1,159 @@
+"""
+Urdu Text Utilities - Validation, normalization and sentence segmentation
+"""
+
+import os
+import re
+import unicodedata
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Target size of one synthesis segment (several short sentences are packed together)
+SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", "400"))
+
+# Sentence ends: Urdu full stop, Urdu/Latin question marks, exclamation, newlines
+_SENTENCE_END = re.compile(r"(?<=[۔؟?!])\s*|\n+")
+
+# Fallback break points for sentences longer than one segment
+_CLAUSE_END = re.compile(r"(?<=[،؛,;:])\s+|\s+")
+
+# Share of letters that must be Urdu/Arabic script for text to count as Urdu
+URDU_MIN_RATIO = 0.8
+
+# Character classes by UTF-8 byte. Every code point in U+0600-U+06FF (Arabic)
+# starts with lead byte D8-DB and every code point in U+0740-U+077F with DD, so
+# counting lead bytes counts characters without decoding anything in Python.
+_URDU, _LATIN, _SUPPLEMENT = 1, 2, 3
+_BYTE_CLASSES = bytes(
+    _URDU if 0xD8 <= b <= 0xDB else
+    _SUPPLEMENT if b == 0xDD else
+    _LATIN if 0x41 <= b <= 0x5A or 0x61 <= b <= 0x7A else 0
+    for b in range(256)
+)
+
+# Syriac letters share lead byte DD with Arabic Supplement (U+0750-U+077F)
+_SYRIAC_TAIL = re.compile(r"[\u0740-\u074F]")
+
+# Arabic letter variants folded to the Urdu letters (Urdu keyboards and Arabic
+# keyboards produce different code points for the same letter)
+_LETTER_VARIANTS = (
+    ("\u064A", "\u06CC"),  # ي Arabic yeh -> ی Farsi yeh
+    ("\u0649", "\u06CC"),  # ى Alef maksura -> ی
+    ("\u0643", "\u06A9"),  # ك Arabic kaf -> ک Keheh
+    ("\u0647", "\u06C1"),  # ه Arabic heh -> ہ Heh goal
+    ("\u0629", "\u06C3"),  # ة Teh marbuta -> ۃ Teh marbuta goal
+    ("\u0640", ""),         # ـ Tatweel (decorative stretching)
+    ("\uFEFF", ""),         # Byte order mark
+) + tuple((chr(0x0660 + d), chr(0x06F0 + d)) for d in range(10))  # ٠-٩ -> ۰-۹
+
+
+def script_counts(text: str) -> tuple:
+    """
+    Count (Urdu/Arabic script characters, Latin letters) in text.
+    Urdu covers U+0600-U+06FF and U+0750-U+077F. The text is encoded once
+    and classified with bytes.translate, so no match lists are built.
+    """
+    classes = text.encode("utf-8", "surrogatepass").translate(_BYTE_CLASSES)
+    urdu = classes.count(_URDU)
+    supplement = classes.count(_SUPPLEMENT)
+    if supplement:
+        supplement -= len(_SYRIAC_TAIL.findall(text))
+    return urdu + supplement, classes.count(_LATIN)
+
+
+def is_urdu_text(text: str) -> bool:
+    """
+    Validate that text is primarily in Urdu/Arabic script
+    Allows numbers, punctuation, and spaces
+    """
+    if not text or text.isspace():
+        return False
+
+    urdu, latin = script_counts(text)
+    total_alpha = urdu + latin
+    if total_alpha == 0:
+        return False
+    return urdu >= URDU_MIN_RATIO * total_alpha
+
+
+def normalize_text(text: str, keep_newlines: bool = False) -> str:
+    """
+    Canonical form of Urdu text: NFC, Arabic letter variants folded to Urdu,
+    whitespace collapsed. Used for cache keys and credit counting.
+
+    With keep_newlines, line breaks survive (blank lines dropped) so the
+    sentence splitter still sees them; otherwise all whitespace becomes one space.
+    """
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    # str.replace skips absent letters at memchr speed; str.translate with a
+    # mapping would look up every character of non-ASCII text in a dict
+    for variant, letter in _LETTER_VARIANTS:
+        if variant in text:
+            text = text.replace(variant, letter)
+
+    if not keep_newlines:
+        return " ".join(text.split())
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def split_sentences(text: str) -> list:
+    """
+    Split text on Urdu sentence boundaries (۔ ؟ ! and newlines).
+    Terminal punctuation stays attached to its sentence.
+    """
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def _split_long(sentence: str, max_chars: int) -> list:
+    """Break an over-long sentence at clause marks or spaces"""
+    parts = []
+    current = ""
+    for word in _CLAUSE_END.split(sentence):
+        if not word:
+            continue
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > max_chars and current:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+
+    # A single word longer than the limit is hard-cut
+    result = []
+    for part in parts:
+        while len(part) > max_chars:
+            result.append(part[:max_chars])
+            part = part[max_chars:]
+        result.append(part)
+    return result
+
+
+def pack_segments(sentences: list, max_chars: int = SEGMENT_MAX_CHARS) -> list:
+    """
+    Group consecutive sentences into segments of at most max_chars,
+    so short sentences do not each cost a separate provider call.
+    """
+    segments = []
+    current = ""
+    for sentence in sentences:
+        pieces = _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]
+        for piece in pieces:
+            candidate = f"{current} {piece}" if current else piece
+            if len(candidate) > max_chars and current:
+                segments.append(current)
+                current = piece
+            else:
+                current = candidate
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_text(text: str, max_chars: int = SEGMENT_MAX_CHARS) -> list:
+    """Split text into synthesis segments along sentence boundaries"""
+    return pack_segments(split_sentences(text), max_chars)
@@ -7,11 +7,13 @@ from .tts_routes import router as tts_router
 from .sts_routes import router as sts_router
 from .voice_routes import router as voice_router
 from .history_routes import router as history_router
+from .job_routes import router as job_router
 
 __all__ = [
     "auth_router",
     "tts_router", 
     "sts_router",
     "voice_router",
-    "history_router"
+    "history_router",
+    "job_router"
 ]
@@ -7,10 +7,12 @@ from typing import Optional
 
 from database.models import (
     UserCreate, UserLogin, 
-    create_user, get_user_by_email, update_last_login,
-    verify_password, user_to_response, hash_password, update_user
+    create_user, get_user_by_email, get_user_by_id, update_last_login,
+    verify_password_async, verify_unknown_user_async, hash_password_async, needs_rehash,
+    user_to_response, update_user, delete_user, clear_usage
 )
 from database.connection import get_database
+from database.user_cache import get_cached_user
 from auth.jwt_handler import (
     create_access_token, verify_token, 
     create_password_reset_token, verify_password_reset_token
@@ -36,9 +38,9 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
+    # Served from the in-process user cache when possible (no password hash)
     db = get_database()
-    from database.models import get_user_by_id
-    user = await get_user_by_id(db, payload["user_id"])
+    user = await get_cached_user(db, payload["user_id"])
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -80,16 +82,23 @@ async def login(credentials: UserLogin):
         user = await get_user_by_email(db, credentials.Email)
         
         if not user:
+            # Same scrypt work as a real check, so timing does not reveal which emails exist
+            await verify_unknown_user_async(credentials.password)
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
-        # Verify password
-        if not verify_password(credentials.password, user["password"]):
+        # Verify password (on the password thread pool, off the event loop)
+        if not await verify_password_async(credentials.password, user["password"]):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Check if user is active
         if not user.get("is_active", True):
             raise HTTPException(status_code=401, detail="Account is deactivated")
         
+        # Upgrade legacy or outdated hashes while the plain password is known
+        if needs_rehash(user["password"]):
+            new_hash = await hash_password_async(credentials.password)
+            await update_user(db, str(user["_id"]), {"password": new_hash})
+        
         # Update last login
         await update_last_login(db, str(user["_id"]))
         
@@ -156,7 +165,7 @@ async def reset_password(token: str, new_password: str):
             raise HTTPException(status_code=404, detail="User not found")
         
         # Update password
-        new_hash = hash_password(new_password)
+        new_hash = await hash_password_async(new_password)
         await update_user(db, str(user["_id"]), {"password": new_hash})
         
         return {
@@ -217,7 +226,6 @@ async def update_profile(
         await update_user(db, str(user["_id"]), safe_updates)
         
         # Get updated user
-        from database.models import get_user_by_id
         updated_user = await get_user_by_id(db, str(user["_id"]))
         
         return {
@@ -250,8 +258,10 @@ async def change_password(
         if new_password != confirm_password:
             raise HTTPException(status_code=400, detail="New passwords do not match")
 
-        # Verify current password
-        if not verify_password(old_password, user["password"]):
+        # Verify current password (the cached user carries no password hash)
+        db = get_database()
+        stored = await get_user_by_id(db, str(user["_id"]))
+        if not stored or not await verify_password_async(old_password, stored["password"]):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
         # Validate new password
@@ -259,8 +269,7 @@ async def change_password(
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
         # Update password
-        db = get_database()
-        new_hash = hash_password(new_password)
+        new_hash = await hash_password_async(new_password)
         await update_user(db, str(user["_id"]), {"password": new_hash})
         
         return {
@@ -281,22 +290,22 @@ async def delete_account(
 ):
     """Delete user's account (requires password confirmation)"""
     try:
-        # Verify password
-        if not verify_password(password, user["password"]):
-            raise HTTPException(status_code=400, detail="Password is incorrect")
-        
+        # Verify password (the cached user carries no password hash)
         db = get_database()
         user_id = str(user["_id"])
+        stored = await get_user_by_id(db, user_id)
+        if not stored or not await verify_password_async(password, stored["password"]):
+            raise HTTPException(status_code=400, detail="Password is incorrect")
         
         # Delete user's history
         await db.history.delete_many({"user_id": user_id})
+        await clear_usage(db, user_id)
         
         # Delete user's voices
         await db.voices.delete_many({"user_id": user_id})
         
         # Delete user
-        from bson import ObjectId
-        await db.users.delete_one({"_id": ObjectId(user_id)})
+        await delete_user(db, user_id)
         
         return {
             "success": True,
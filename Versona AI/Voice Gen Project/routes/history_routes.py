@@ -2,112 +2,265 @@
 History Routes - User generation history and analytics
 """
 
+import base64
 from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional
 
 from routes.auth_routes import get_current_user
 from database.connection import get_database
+from database.models import forget_usage, clear_usage, start_usage_rollups, count_history, get_usage_rollups
 
 router = APIRouter(prefix="/history", tags=["History"])
 
 
+# Fields history_item_to_response reads
+HISTORY_FIELDS = {
+    "action": 1,
+    "text": 1,
+    "voice_name": 1,
+    "voice_type": 1,
+    "duration": 1,
+    "bitrate": 1,
+    "sample_rate": 1,
+    "credits_used": 1,
+    "mode": 1,
+    "audio_path": 1,
+    "created_at": 1
+}
+
+# Newest first; _id breaks ties between items saved in the same millisecond
+HISTORY_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def history_item_to_response(item: dict) -> dict:
+    """Convert history document to response format"""
+    return {
+        "id": str(item["_id"]),
+        "action": item["action"],
+        "text": item.get("text"),
+        "voice_name": item.get("voice_name"),
+        "voice_type": item.get("voice_type"),
+        "duration": item.get("duration"),
+        "bitrate": item.get("bitrate"),
+        "sample_rate": item.get("sample_rate"),
+        "credits_used": item.get("credits_used", 0),
+        "mode": item.get("mode"),
+        "audio_path": item.get("audio_path"),
+        "created_at": item["created_at"].isoformat() if item.get("created_at") else None
+    }
+
+
+def encode_history_cursor(item: dict) -> str:
+    """Opaque cursor pointing just after this item"""
+    created_at = item["created_at"]
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    position = f"{int(created_at.timestamp() * 1000)}:{item['_id']}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> dict:
+    """Query clause for the items after a cursor; raises ValueError if it is malformed"""
+    from bson import ObjectId
+    
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        millis, item_id = position.split(":")
+        created_at = datetime.fromtimestamp(int(millis) / 1000, timezone.utc)
+        item_id = ObjectId(item_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    # The $lte bound lets the index seek; the $or excludes what was already returned
+    return {
+        "created_at": {"$lte": created_at},
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"_id": {"$lt": item_id}}
+        ]
+    }
+
+
 @router.get("/")
 async def get_history(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     action: Optional[str] = Query(None, description="Filter: tts, sts, voice_cloning"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    include_total: Optional[bool] = Query(None, description="Return the total count (default: only without a cursor)"),
     user: dict = Depends(get_current_user)
 ):
-    """Get user's generation history with pagination"""
+    """
+    Get user's generation history, newest first. Pass the returned
+    next_cursor to get the following page: it seeks on the index, so deep
+    pages cost the same as the first. `page` (skip-based) still works.
+    """
     try:
         db = get_database()
+        user_id = str(user["_id"])
         
         # Build query
-        query = {"user_id": str(user["_id"])}
+        query = {"user_id": user_id}
         if action:
             query["action"] = action
+        if cursor:
+            try:
+                query.update(decode_history_cursor(cursor))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
-        # Get total count
-        total = await db.history.count_documents(query)
+        # One extra item tells whether there is a next page
+        find = db.history.find(query, HISTORY_FIELDS).sort(HISTORY_SORT)
+        if not cursor:
+            find = find.skip((page - 1) * limit)
+        items = await find.limit(limit + 1).to_list(limit + 1)
+        has_more = len(items) > limit
+        items = items[:limit]
         
-        # Get paginated results
-        skip = (page - 1) * limit
-        cursor = db.history.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        items = await cursor.to_list(limit)
+        pagination = {
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": encode_history_cursor(items[-1]) if has_more else None
+        }
+        if not cursor:
+            pagination["page"] = page
+        
+        # Total from the usage rollups; counting history is the fallback
+        if include_total if include_total is not None else not cursor:
+            total = await count_history(db, user_id, action)
+            if total is None:
+                total = await db.history.count_documents({k: v for k, v in query.items() if k in ("user_id", "action")})
+            pagination["total"] = total
+            pagination["pages"] = (total + limit - 1) // limit if total > 0 else 0
         
         return {
             "success": True,
-            "items": [
-                {
-                    "id": str(item["_id"]),
-                    "action": item["action"],
-                    "text": item.get("text"),
-                    "voice_name": item.get("voice_name"),
-                    "voice_type": item.get("voice_type"),
-                    "duration": item.get("duration"),
-                    "credits_used": item.get("credits_used", 0),
-                    "mode": item.get("mode"),
-                    "audio_path": item.get("audio_path"),
-                    "created_at": item["created_at"].isoformat() if item.get("created_at") else None
-                }
-                for item in items
-            ],
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "pages": (total + limit - 1) // limit if total > 0 else 0
-            }
+            "items": [history_item_to_response(item) for item in items],
+            "pagination": pagination
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def history_stats_pipeline(user_id: str, recent_since: datetime, window_start: datetime, tz: str) -> list:
+    """
+    One aggregation for the Overview dashboard: counts per action, the
+    rolling 7-day total and a per-day histogram. The leading $match uses the
+    (user_id, created_at) index; $facet runs the three views over its output.
+    """
+    day = {"format": "%Y-%m-%d", "date": "$created_at"}
+    if tz != "UTC":
+        day["timezone"] = tz
+    
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "by_action": [
+                {"$group": {"_id": "$action", "count": {"$sum": 1}}}
+            ],
+            "recent": [
+                {"$match": {"created_at": {"$gte": recent_since}}},
+                {"$count": "count"}
+            ],
+            "daily": [
+                {"$match": {"created_at": {"$gte": window_start}}},
+                {"$group": {"_id": {"$dateToString": day}, "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+
+
+async def stats_from_history(db, user_id: str, tz: str, window_start: datetime, week_ago: datetime) -> tuple:
+    """(counts by action, 7-day count, counts by local date) from one history aggregation"""
+    result = await db.history.aggregate(
+        history_stats_pipeline(user_id, week_ago, window_start, tz)
+    ).to_list(1)
+    facets = result[0] if result else {}
+    
+    by_action = {row["_id"]: row["count"] for row in facets.get("by_action", [])}
+    recent = facets.get("recent", [])
+    per_day = {row["_id"]: row["count"] for row in facets.get("daily", [])}
+    return by_action, recent[0]["count"] if recent else 0, per_day
+
+
+async def stats_from_rollups(db, user_id: str, zone: ZoneInfo, window_start: datetime,
+                             week_ago: datetime, now: datetime) -> Optional[tuple]:
+    """
+    Same as stats_from_history from the usage_daily rollups (a few small
+    documents). The 7-day count is exact to the hour. None if the user has no rollups.
+    """
+    usage = await get_usage_rollups(db, user_id, min(window_start, week_ago), now)
+    if usage is None:
+        return None
+    
+    recent_from = week_ago.replace(minute=0, second=0, microsecond=0)
+    recent_count = 0
+    per_day = {}
+    for hour, count in usage["hours"].items():
+        if hour >= recent_from:
+            recent_count += count
+        if hour >= window_start:
+            date = hour.astimezone(zone).strftime("%Y-%m-%d")
+            per_day[date] = per_day.get(date, 0) + count
+    
+    return usage["totals"].get("counts", {}), recent_count, per_day
+
+
 @router.get("/stats")
-async def get_history_stats(user: dict = Depends(get_current_user)):
+async def get_history_stats(
+    days: int = Query(7, ge=1, le=90, description="Days in the daily activity histogram"),
+    tz: str = Query("UTC", description="IANA timezone for day boundaries, e.g. Asia/Karachi"),
+    user: dict = Depends(get_current_user)
+):
     """Get user's usage statistics for Overview dashboard"""
     try:
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+        
         db = get_database()
         user_id = str(user["_id"])
         
-        # Count by action type
-        tts_count = await db.history.count_documents({"user_id": user_id, "action": "tts"})
-        sts_count = await db.history.count_documents({"user_id": user_id, "action": "sts"})
-        clone_count = await db.history.count_documents({"user_id": user_id, "action": "voice_cloning"})
+        # Day boundaries in the requested timezone
+        now = datetime.now(timezone.utc)
+        today = now.astimezone(zone).date()
+        first_day = today - timedelta(days=days - 1)
+        window_start = datetime(first_day.year, first_day.month, first_day.day, tzinfo=zone).astimezone(timezone.utc)
+        week_ago = now - timedelta(days=7)
+        
+        # Rollups when the zone's days are whole UTC hours, else scan history
+        counts = None
+        if all(t.astimezone(zone).utcoffset() % timedelta(hours=1) == timedelta(0) for t in (window_start, now)):
+            counts = await stats_from_rollups(db, user_id, zone, window_start, week_ago, now)
+        if counts is None:
+            counts = await stats_from_history(db, user_id, tz, window_start, week_ago)
+        by_action, recent_count, per_day = counts
+        
+        tts_count = by_action.get("tts", 0)
+        sts_count = by_action.get("sts", 0)
+        clone_count = by_action.get("voice_cloning", 0)
         
         # Get total credits used from user document
         credits_used = user.get("credits_used", 0)
         credits_limit = user.get("credits_limit", 3000)
         credits_remaining = credits_limit - credits_used
         
-        # Get recent activity (last 7 days)
-        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-        recent_count = await db.history.count_documents({
-            "user_id": user_id,
-            "created_at": {"$gte": week_ago}
-        })
-        
-        # Get activity by day for the last 7 days
+        # Fill in days without activity, oldest to newest
         daily_activity = []
-        for i in range(7):
-            day_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=i)
-            day_end = day_start + timedelta(days=1)
-            
-            count = await db.history.count_documents({
-                "user_id": user_id,
-                "created_at": {"$gte": day_start, "$lt": day_end}
-            })
-            
+        for i in range(days):
+            date = first_day + timedelta(days=i)
             daily_activity.append({
-                "date": day_start.strftime("%Y-%m-%d"),
-                "day": day_start.strftime("%a"),
-                "count": count
+                "date": date.strftime("%Y-%m-%d"),
+                "day": date.strftime("%a"),
+                "count": per_day.get(date.strftime("%Y-%m-%d"), 0)
             })
         
-        daily_activity.reverse()  # Oldest to newest
-        
         # Get most used feature
         features = [
             ("Text to Speech", tts_count),
@@ -129,10 +282,13 @@ async def get_history_stats(user: dict = Depends(get_current_user)):
                 "credits_percentage": round((credits_used / credits_limit) * 100, 1) if credits_limit > 0 else 0,
                 "recent_activity_7d": recent_count,
                 "most_used_feature": most_used[0],
-                "daily_activity": daily_activity
+                "daily_activity": daily_activity,
+                "timezone": tz
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -147,8 +303,9 @@ async def get_recent_generations(
         db = get_database()
         
         cursor = db.history.find(
-            {"user_id": str(user["_id"])}
-        ).sort("created_at", -1).limit(limit)
+            {"user_id": str(user["_id"])},
+            {"action": 1, "text": 1, "voice_name": 1, "created_at": 1, "audio_path": 1}
+        ).sort(HISTORY_SORT).limit(limit)
         
         items = await cursor.to_list(limit)
         
@@ -183,14 +340,16 @@ async def delete_history_item(
         db = get_database()
         
         # Verify ownership and delete
-        result = await db.history.delete_one({
+        item = await db.history.find_one_and_delete({
             "_id": ObjectId(item_id),
             "user_id": str(user["_id"])
         })
         
-        if result.deleted_count == 0:
+        if item is None:
             raise HTTPException(status_code=404, detail="History item not found")
         
+        await forget_usage(db, item)
+        
         return {
             "success": True,
             "message": "History item deleted"
@@ -209,6 +368,8 @@ async def clear_history(user: dict = Depends(get_current_user)):
         db = get_database()
         
         result = await db.history.delete_many({"user_id": str(user["_id"])})
+        await clear_usage(db, str(user["_id"]))
+        await start_usage_rollups(db, str(user["_id"]))
         
         return {
             "success": True,
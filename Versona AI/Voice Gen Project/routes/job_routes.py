@@ -0,0 +1,469 @@
+"""
+Job Routes - Background TTS, STS and voice cloning
+Submit returns a job immediately; poll the job, follow its progress as
+server-sent events, and fetch the result once it has completed.
+"""
+
+import os
+import json
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Optional, List
+
+from routes.auth_routes import get_current_user
+from routes.tts_routes import MAX_CHARS, TTSGenerateRequest, read_text_upload, save_tts_history
+from routes.sts_routes import VOICE_MAPPINGS, save_sts_history
+from execution.tts import text_to_speech_segmented_async
+from execution.sts import speech_to_speech_async
+from execution.clone_voice import clone_voice_async
+from execution.audio_store import audio_store
+from execution.urdu_text import is_urdu_text, normalize_text
+from execution import mp3
+from execution.jobs import job_queue, new_job_input_dir
+from database.connection import get_database
+from database.models import credits_available, reserve_credits, commit_credits, refund_credits
+from database.models.job import (
+    JOB_COMPLETED, TERMINAL_STATUSES,
+    create_job, get_job, cancel_job, job_to_response,
+    hold_job_reservation, take_job_reservation
+)
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def submit_job(user: dict, kind: str, params: dict) -> dict:
+    """Queue a job and wake an idle worker"""
+    db = get_database()
+    job = await create_job(db, str(user["_id"]), kind, params)
+    job_queue.wake()
+    return job
+
+
+# ==================== Handlers ====================
+
+async def run_tts_job(job: dict, progress) -> dict:
+    params = job["params"]
+    db = get_database()
+
+    # Kept on the job: an attempt resumed after a crash reuses it
+    if job.get("reservation") is None:
+        reservation = await reserve_credits(db, job["user_id"], len(params["text"]), "tts_job")
+        if reservation is None:
+            raise ValueError("Not enough credits")
+        await hold_job_reservation(db, job["_id"], reservation)
+
+    try:
+        await progress(0.1, "Synthesizing speech")
+        audio_bytes = await text_to_speech_segmented_async(text=params["text"], voice_id=params.get("voice_id"))
+        audio_info = mp3.require_audio(audio_bytes)
+
+        await progress(0.9, "Saving audio")
+        stored = await audio_store.put(audio_bytes)
+    except BaseException:
+        # Failed, cancelled or handed back to the queue: nothing was delivered
+        held = await take_job_reservation(db, job["_id"])
+        if held:
+            await refund_credits(db, held)
+        raise
+
+    # Credits are charged in finalize_tts_job, once the job is marked completed
+    return {
+        "audio_id": stored.audio_id,
+        "audio_path": stored.path,
+        "audio_route": f"tts/audio/{stored.filename}",
+        "duration": round(audio_info.duration, 2),
+        "sample_rate": audio_info.sample_rate,
+        "bitrate": audio_info.bitrate,
+        "text_length": len(params["text"]),
+        "credits_used": len(params["text"])
+    }
+
+
+async def finalize_tts_job(job: dict, result: dict):
+    params = job["params"]
+    db = get_database()
+    held = await take_job_reservation(db, job["_id"])
+    if held:
+        await commit_credits(db, held)
+    await save_tts_history(
+        db,
+        user_id=job["user_id"],
+        mode=params.get("mode", "manual"),
+        text=params["text"],
+        audio_path=result["audio_path"],
+        duration=result["duration"],
+        credits_used=result["credits_used"],
+        voice_id=params.get("voice_id"),
+        bitrate=result.get("bitrate"),
+        sample_rate=result.get("sample_rate")
+    )
+
+
+async def run_sts_job(job: dict, progress) -> dict:
+    params = job["params"]
+    await progress(0.1, "Converting voice")
+    audio_bytes = await speech_to_speech_async(params["input_path"], VOICE_MAPPINGS[params["voice_type"]])
+    audio_info = mp3.require_audio(audio_bytes)
+
+    await progress(0.9, "Saving audio")
+    stored = await audio_store.put(audio_bytes)
+
+    return {
+        "audio_id": stored.audio_id,
+        "audio_path": stored.path,
+        "audio_route": f"sts/audio/{stored.filename}",
+        "voice_type": params["voice_type"],
+        "input_size": params["input_size"],
+        "output_size": len(audio_bytes),
+        "duration": round(audio_info.duration, 2),
+        "sample_rate": audio_info.sample_rate,
+        "bitrate": audio_info.bitrate
+    }
+
+
+async def finalize_sts_job(job: dict, result: dict):
+    await save_sts_history(
+        get_database(),
+        user_id=job["user_id"],
+        voice_type=result["voice_type"],
+        input_size=result["input_size"],
+        output_size=result["output_size"],
+        output_path=result["audio_path"],
+        duration=result.get("duration"),
+        bitrate=result.get("bitrate"),
+        sample_rate=result.get("sample_rate")
+    )
+
+
+async def run_clone_job(job: dict, progress) -> dict:
+    params = job["params"]
+    await progress(0.1, "Cloning voice")
+    cloned = await clone_voice_async(params["name"], params["file_paths"], params["description"])
+
+    return {
+        "voice_id": cloned.get("voice_id"),
+        "name": params["name"]
+    }
+
+
+async def finalize_clone_job(job: dict, result: dict):
+    await get_database().voices.insert_one({
+        "user_id": job["user_id"],
+        "name": result["name"],
+        "elevenlabs_id": result["voice_id"],
+        "created_at": datetime.now(timezone.utc)
+    })
+
+
+job_queue.register("tts", run_tts_job, finalize_tts_job)
+job_queue.register("sts", run_sts_job, finalize_sts_job)
+job_queue.register("clone", run_clone_job, finalize_clone_job)
+
+
+# ==================== Submit ====================
+
+async def _submit_tts(user: dict, text: str, voice_id: Optional[str], mode: str) -> dict:
+    if not is_urdu_text(text):
+        raise HTTPException(
+            status_code=400,
+            detail="متن صرف اردو میں ہونا چاہیے۔ (Text must be in Urdu only)"
+        )
+
+    # Early answer from the loaded user; credits are reserved when the job runs
+    if not credits_available(user, len(text)):
+        raise HTTPException(
+            status_code=403,
+            detail="کریڈٹس کم ہیں۔ پلان اپگریڈ کریں۔ (Not enough credits)"
+        )
+
+    return await submit_job(user, "tts", {"text": text, "voice_id": voice_id, "mode": mode})
+
+
+@router.post("/tts/", status_code=202)
+async def submit_tts_job(
+    request: TTSGenerateRequest,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """Queue text to speech; credits are reserved when the job starts and charged on delivery"""
+    try:
+        text = normalize_text(request.text, keep_newlines=True)
+
+        if not text:
+            raise HTTPException(status_code=400, detail="Text is required")
+
+        # Character limit (uploads are limited by file size instead)
+        if len(text) > MAX_CHARS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Text exceeds {MAX_CHARS} character limit. Current: {len(text)} characters"
+            )
+
+        job = await _submit_tts(user, text, request.voice_id, request.mode)
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/tts/upload/", status_code=202)
+async def submit_tts_upload_job(
+    req: Request,
+    file: UploadFile = File(...),
+    voice_id: Optional[str] = Form(None),
+    user: dict = Depends(get_current_user)
+):
+    """Queue text to speech for an uploaded .txt file (up to 1MB)"""
+    try:
+        text = await read_text_upload(file)
+        job = await _submit_tts(user, text, voice_id, "upload")
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sts/", status_code=202)
+async def submit_sts_job(
+    req: Request,
+    file: UploadFile = File(...),
+    voice_type: str = Form(...),  # "male" or "female"
+    user: dict = Depends(get_current_user)
+):
+    """Queue speech to speech conversion"""
+    try:
+        if voice_type not in VOICE_MAPPINGS:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid voice type. Must be 'male' or 'female'"
+            )
+
+        if not file.content_type or not file.content_type.startswith("audio/"):
+            raise HTTPException(status_code=400, detail="Invalid file type. Please upload an audio file.")
+
+        content = await file.read()
+
+        # File size limit (10MB)
+        if len(content) > 10 * 1024 * 1024:
+            raise HTTPException(status_code=400, detail="File too large. Max 10MB allowed.")
+
+        input_dir = new_job_input_dir()
+        input_path = f"{input_dir}/input.mp3"
+        await asyncio.to_thread(_write_file, input_path, content)
+
+        job = await submit_job(user, "sts", {
+            "voice_type": voice_type,
+            "input_dir": input_dir,
+            "input_path": input_path,
+            "input_size": len(content)
+        })
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/clone/", status_code=202)
+async def submit_clone_job(
+    req: Request,
+    name: str = Form(...),
+    description: str = Form("Urdu voice clone"),
+    files: List[UploadFile] = File(...),
+    user: dict = Depends(get_current_user)
+):
+    """Queue cloning a new voice from one or more audio samples"""
+    try:
+        if not name.strip():
+            raise HTTPException(status_code=400, detail="Voice name is required")
+
+        input_dir = new_job_input_dir()
+        file_paths = []
+        for i, upload in enumerate(files):
+            content = await upload.read()
+            if len(content) > 10 * 1024 * 1024:
+                raise HTTPException(status_code=400, detail="File too large. Max 10MB allowed.")
+            path = f"{input_dir}/sample_{i}.mp3"
+            await asyncio.to_thread(_write_file, path, content)
+            file_paths.append(path)
+
+        job = await submit_job(user, "clone", {
+            "name": name.strip(),
+            "description": description,
+            "input_dir": input_dir,
+            "file_paths": file_paths
+        })
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== Status ====================
+
+@router.get("/")
+async def list_jobs(
+    req: Request,
+    status: Optional[str] = Query(None, description="Filter: queued, running, completed, failed, cancelled"),
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(get_current_user)
+):
+    """Get the user's most recent jobs"""
+    try:
+        db = get_database()
+
+        query = {"user_id": str(user["_id"])}
+        if status:
+            query["status"] = status
+
+        cursor = db.jobs.find(query).sort("created_at", -1).limit(limit)
+        jobs = await cursor.to_list(limit)
+
+        return {
+            "success": True,
+            "jobs": [job_to_response(job, str(req.base_url)) for job in jobs]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _get_user_job(job_id: str, user: dict) -> dict:
+    job = await get_job(get_database(), job_id, str(user["_id"]))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """Get a job's status and progress"""
+    try:
+        job = await _get_user_job(job_id, user)
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Server-sent events: one "progress" event per change, then a final
+    event named after the terminal status.
+    """
+    try:
+        job = await _get_user_job(job_id, user)
+        base_url = str(req.base_url)
+
+        async def events():
+            current = job
+            last = None
+            while True:
+                payload = job_to_response(current, base_url)
+                snapshot = (payload["status"], payload["progress"], payload["message"])
+
+                if payload["status"] in TERMINAL_STATUSES:
+                    yield f"event: {payload['status']}\ndata: {json.dumps(payload)}\n\n"
+                    return
+
+                if snapshot != last:
+                    yield f"event: progress\ndata: {json.dumps(payload)}\n\n"
+                    last = snapshot
+
+                if await req.is_disconnected():
+                    return
+
+                await job_queue.wait_for_change(job_id)
+                current = await get_job(get_database(), job_id) or current
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_user_job(
+    job_id: str,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """Cancel a queued or running job (nothing is charged)"""
+    try:
+        job = await _get_user_job(job_id, user)
+
+        if not await cancel_job(get_database(), job_id, str(user["_id"])):
+            raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+
+        job_queue.cancel_local(job_id)
+
+        job = await get_job(get_database(), job_id)
+        return {"success": True, "job": job_to_response(job, str(req.base_url))}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    user: dict = Depends(get_current_user)
+):
+    """Download the audio of a completed job (voice cloning returns JSON)"""
+    try:
+        job = await _get_user_job(job_id, user)
+
+        if job["status"] != JOB_COMPLETED:
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+        result = job["result"]
+        if "audio_path" not in result:
+            return {"success": True, "result": result}
+
+        audio_path = await audio_store.resolve(os.path.basename(result["audio_path"]))
+        if not audio_path:
+            raise HTTPException(status_code=404, detail="Audio file not found")
+
+        return FileResponse(
+            audio_path,
+            media_type="audio/mpeg",
+            filename=os.path.basename(result["audio_path"])
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
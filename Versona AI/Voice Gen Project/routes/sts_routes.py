@@ -12,13 +12,15 @@ from fastapi.responses import FileResponse
 from typing import Optional
 
 from routes.auth_routes import get_current_user
-from execution.sts import speech_to_speech
+from execution.sts import speech_to_speech_async
+from execution import mp3
+from execution.audio_store import audio_store
 from database.connection import get_database
+from database.history_writer import history_writer
 
 router = APIRouter(prefix="/sts", tags=["Audio to Audio"])
 
-# Ensure temp directories exist
-os.makedirs(".tmp/audio", exist_ok=True)
+# Ensure temp directory exists
 os.makedirs(".tmp/sts_input", exist_ok=True)
 
 # Voice ID mappings for male/female voices
@@ -89,18 +91,15 @@ async def convert_audio(
         voice_id = VOICE_MAPPINGS[voice_type]
         
         # Convert using ElevenLabs STS
-        audio_bytes = speech_to_speech(input_path, voice_id)
+        try:
+            audio_bytes = await speech_to_speech_async(input_path, voice_id)
+            audio_info = mp3.require_audio(audio_bytes)
+        finally:
+            # Clean up input file (also when the provider fails or returns no audio)
+            os.remove(input_path)
         
-        # Clean up input file
-        os.remove(input_path)
-        
-        # Save output audio
-        output_id = uuid.uuid4().hex
-        output_filename = f"sts_{output_id}.mp3"
-        output_path = f".tmp/audio/{output_filename}"
-        
-        with open(output_path, "wb") as f:
-            f.write(audio_bytes)
+        # Save output audio (identical audio is stored once)
+        stored = await audio_store.put(audio_bytes)
         
         # Save to history
         db = get_database()
@@ -110,16 +109,22 @@ async def convert_audio(
             voice_type=voice_type,
             input_size=len(content),
             output_size=len(audio_bytes),
-            output_path=output_path
+            output_path=stored.path,
+            duration=audio_info.duration,
+            bitrate=audio_info.bitrate,
+            sample_rate=audio_info.sample_rate
         )
         
         return {
             "success": True,
-            "audio_url": f"{req.base_url}sts/audio/{output_filename}",
-            "audio_id": output_id,
+            "audio_url": f"{req.base_url}sts/audio/{stored.filename}",
+            "audio_id": stored.audio_id,
             "voice_type": voice_type,
             "input_size": len(content),
-            "output_size": len(audio_bytes)
+            "output_size": len(audio_bytes),
+            "duration": round(audio_info.duration, 2),
+            "sample_rate": audio_info.sample_rate,
+            "bitrate": audio_info.bitrate
         }
         
     except HTTPException:
@@ -131,9 +136,9 @@ async def convert_audio(
 @router.get("/audio/{filename}")
 async def get_sts_audio(filename: str):
     """Serve converted audio files"""
-    file_path = f".tmp/audio/{filename}"
+    file_path = await audio_store.resolve(filename)
     
-    if not os.path.exists(file_path):
+    if not file_path:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     return FileResponse(
@@ -144,7 +149,8 @@ async def get_sts_audio(filename: str):
 
 
 async def save_sts_history(db, user_id: str, voice_type: str, 
-                           input_size: int, output_size: int, output_path: str):
+                           input_size: int, output_size: int, output_path: str,
+                           duration: float = None, bitrate: int = None, sample_rate: int = None):
     """Save STS conversion to user history"""
     history_doc = {
         "user_id": user_id,
@@ -153,7 +159,10 @@ async def save_sts_history(db, user_id: str, voice_type: str,
         "input_size": input_size,
         "output_size": output_size,
         "audio_path": output_path,
+        "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
         "created_at": datetime.now(timezone.utc)
     }
     
-    await db.history.insert_one(history_doc)
+    await history_writer.write(db, history_doc)
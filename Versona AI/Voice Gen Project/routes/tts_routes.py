@@ -6,46 +6,29 @@ Three modes:
 3. Database - Use recent/suggested texts
 """
 
-import os
-import re
 import base64
-import uuid
-from database.models import increment_credits_used, check_credits_available
+import asyncio
 from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional, List
 
 from routes.auth_routes import get_current_user
-from execution.tts import text_to_speech
+from execution.tts import text_to_speech_segmented_async, open_tts_stream
+from execution import mp3
+from execution.urdu_text import is_urdu_text, normalize_text
+from execution.audio_store import audio_store
+from execution.batch import BATCH_CONCURRENCY, BATCH_MAX_ITEMS, parse_batch_file, synthesize_batch
 from database.connection import get_database
-from database.models import increment_credits_used, check_credits_available
+from database.models import reserve_credits, commit_credits, refund_credits
+from database.history_writer import history_writer
 
 router = APIRouter(prefix="/tts", tags=["Text to Speech"])
 
-# Ensure temp directory exists
-os.makedirs(".tmp/audio", exist_ok=True)
-
-
-def is_urdu_text(text: str) -> bool:
-    """
-    Validate that text is primarily in Urdu/Arabic script
-    Allows numbers, punctuation, and spaces
-    """
-    if not text or not text.strip():
-        return False
-    
-    # Urdu Unicode range: \u0600-\u06FF (Arabic) and \u0750-\u077F (Arabic Supplement)
-    text_stripped = text.strip()
-    urdu_chars = len(re.findall(r'[\u0600-\u06FF\u0750-\u077F]', text_stripped))
-    total_alpha = len(re.findall(r'[a-zA-Z\u0600-\u06FF\u0750-\u077F]', text_stripped))
-    
-    if total_alpha == 0:
-        return False
-    
-    urdu_ratio = urdu_chars / total_alpha
-    return urdu_ratio >= 0.8  # Must be at least 80% Urdu characters
+# Character limit for typed text (uploaded files may be up to 1MB)
+MAX_CHARS = 2000
 
 
 # Suggested texts for the database mode
@@ -68,6 +51,13 @@ class TTSGenerateRequest(BaseModel):
     voice_id: Optional[str] = None
 
 
+class TTSBatchRequest(BaseModel):
+    """Request model for batch TTS generation"""
+    texts: List[str]
+    voice_id: Optional[str] = None
+    max_concurrency: Optional[int] = None
+
+
 class TextSuggestion(BaseModel):
     """Model for text suggestions"""
     id: str
@@ -75,6 +65,88 @@ class TextSuggestion(BaseModel):
     is_recent: bool = False
 
 
+async def prepare_generation(raw_text: str, user: dict, action: str) -> tuple:
+    """
+    Normalize and validate request text, then reserve its credits.
+    Shared by the generate and stream handlers of TTS and voice cloning.
+    
+    Returns:
+        (text, db, reservation) - pass the reservation to commit_credits/refund_credits
+    """
+    text = normalize_text(raw_text, keep_newlines=True)
+    
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
+    
+    # Character limit
+    if len(text) > MAX_CHARS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Text exceeds {MAX_CHARS} character limit. Current: {len(text)} characters"
+        )
+    
+    # Validate Urdu language
+    if not is_urdu_text(text):
+        raise HTTPException(
+            status_code=400,
+            detail="متن صرف اردو میں ہونا چاہیے۔ (Text must be in Urdu only)"
+        )
+    
+    # Reserve credits (checked and taken in one atomic update)
+    db = get_database()
+    reservation = await reserve_credits(db, str(user["_id"]), len(text), action)
+    if reservation is None:
+        raise HTTPException(
+            status_code=403,
+            detail="کریڈٹس کم ہیں۔ پلان اپگریڈ کریں۔ (Not enough credits)"
+        )
+    
+    return text, db, reservation
+
+
+def stream_and_store(chunks, audio_id: str, finalize, db, reservation: dict, headers: dict) -> StreamingResponse:
+    """
+    Stream provider audio to the client while saving it under audio_id.
+    Once the audio is stored and holds valid MP3 frames the credits are
+    committed and finalize(stored, audio_info) records the history. In every
+    other case (invalid audio, failed commit, client gone, even before the
+    first chunk so the body never runs) the reservation is refunded, once.
+    """
+    settled = False
+    
+    async def complete(stored):
+        nonlocal settled
+        try:
+            audio_info = await asyncio.to_thread(mp3.require_audio_file, stored.path)
+            await commit_credits(db, reservation)
+        except BaseException:
+            await abort()
+            raise
+        settled = True
+        await finalize(stored, audio_info)
+    
+    async def abort():
+        nonlocal settled
+        if not settled:
+            settled = True
+            await refund_credits(db, reservation)
+    
+    body = audio_store.tee(chunks, audio_id, on_complete=complete, on_abort=abort)
+    
+    async def settle_unfinished():
+        # Runs after the response even if the body was never iterated
+        await body.aclose()
+        await chunks.aclose()
+        await abort()
+    
+    return StreamingResponse(
+        body,
+        media_type="audio/mpeg",
+        headers=headers,
+        background=BackgroundTask(settle_unfinished)
+    )
+
+
 @router.get("/suggestions/")
 async def get_text_suggestions(user: dict = Depends(get_current_user)):
     """Get suggested and recent texts for the database mode"""
@@ -128,52 +200,22 @@ async def generate_tts(
     Modes: manual, upload, database
     """
     try:
-        text = request.text.strip()
-        
-        if not text:
-            raise HTTPException(status_code=400, detail="Text is required")
-        
-        # Character limit
-        MAX_CHARS = 2000
-        if len(text) > MAX_CHARS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Text exceeds {MAX_CHARS} character limit. Current: {len(text)} characters"
-            )
-        
-        # Validate Urdu language
-        if not is_urdu_text(text):
-            raise HTTPException(
-                status_code=400,
-                detail="متن صرف اردو میں ہونا چاہیے۔ (Text must be in Urdu only)"
-            )
-        
-        # Check credits
+        text, db, reservation = await prepare_generation(request.text, user, "tts")
         text_length = len(text)
-        db = get_database()
-        
-        if not await check_credits_available(db, str(user["_id"]), text_length):
-            raise HTTPException(
-                status_code=403,
-                detail="کریڈٹس کم ہیں۔ پلان اپگریڈ کریں۔ (Not enough credits)"
-            )
-        
-        # Generate audio
-        audio_bytes = text_to_speech(text=text, voice_id=request.voice_id)
-        
-        # Save audio file
-        audio_id = uuid.uuid4().hex
-        audio_filename = f"tts_{audio_id}.mp3"
-        audio_path = f".tmp/audio/{audio_filename}"
-        
-        with open(audio_path, "wb") as f:
-            f.write(audio_bytes)
-        
-        # Calculate duration estimate
-        estimated_duration = len(text) / 15
         
-        # Deduct credits
-        await increment_credits_used(db, str(user["_id"]), text_length)
+        try:
+            # Generate audio (long texts are synthesized sentence by sentence in parallel)
+            audio_bytes = await text_to_speech_segmented_async(text=text, voice_id=request.voice_id)
+            audio_info = mp3.require_audio(audio_bytes)
+            
+            # Save audio file (identical audio is stored once)
+            stored = await audio_store.put(audio_bytes)
+        except BaseException:
+            await refund_credits(db, reservation)
+            raise
+        
+        # Charge the reserved credits
+        await commit_credits(db, reservation)
         
         # Save to history
         await save_tts_history(
@@ -181,17 +223,21 @@ async def generate_tts(
             user_id=str(user["_id"]),
             mode=request.mode,
             text=text,
-            audio_path=audio_path,
-            duration=estimated_duration,
-            credits_used=text_length
+            audio_path=stored.path,
+            duration=audio_info.duration,
+            credits_used=text_length,
+            voice_id=request.voice_id,
+            bitrate=audio_info.bitrate,
+            sample_rate=audio_info.sample_rate
         )
         
         return {
             "success": True,
-            "audio_url": f"{req.base_url}tts/audio/{audio_filename}",
-            "audio_id": audio_id,
-            "duration": round(estimated_duration, 2),
-            "sample_rate": 44100,
+            "audio_url": f"{req.base_url}tts/audio/{stored.filename}",
+            "audio_id": stored.audio_id,
+            "duration": round(audio_info.duration, 2),
+            "sample_rate": audio_info.sample_rate,
+            "bitrate": audio_info.bitrate,
             "text_length": text_length,
             "credits_used": text_length,
             "spectrogram_url": None,
@@ -205,6 +251,96 @@ async def generate_tts(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/tts/stream/")
+async def stream_tts(
+    request: TTSGenerateRequest,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Generate speech and stream it back while it is synthesized.
+    The audio is saved as it arrives; credits and history are recorded
+    once the stream completes. X-Audio-Url serves the saved file afterwards.
+    """
+    try:
+        text, db, reservation = await prepare_generation(request.text, user, "tts")
+        text_length = len(text)
+        user_id = str(user["_id"])
+        
+        # Start the provider stream (errors surface here, before headers are sent)
+        try:
+            chunks = await open_tts_stream(text=text, voice_id=request.voice_id)
+        except BaseException:
+            await refund_credits(db, reservation)
+            raise
+        
+        audio_id = audio_store.new_stream_id()
+        
+        async def finalize(stored, audio_info):
+            await save_tts_history(
+                db,
+                user_id=user_id,
+                mode=request.mode,
+                text=text,
+                audio_path=stored.path,
+                duration=audio_info.duration,
+                credits_used=text_length,
+                voice_id=request.voice_id,
+                bitrate=audio_info.bitrate,
+                sample_rate=audio_info.sample_rate
+            )
+        
+        return stream_and_store(chunks, audio_id, finalize, db, reservation, headers={
+            "X-Audio-Id": audio_id,
+            "X-Audio-Url": f"{req.base_url}tts/audio/{audio_id}.mp3",
+            "X-Credits-Used": str(text_length)
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def read_text_upload(file: UploadFile) -> str:
+    """Read an uploaded .txt file and return its normalized text"""
+    # Validate file type
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(
+            status_code=400, 
+            detail="Only .txt files are allowed"
+        )
+    
+    # Read file content
+    content = await file.read()
+    
+    # File size limit (1MB)
+    if len(content) > 1024 * 1024:
+        raise HTTPException(
+            status_code=400, 
+            detail="File too large. Max 1MB allowed."
+        )
+    
+    # Decode text (try UTF-8 first, then UTF-16)
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            text = content.decode('utf-16')
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=400,
+                detail="Could not decode file. Please use UTF-8 encoding."
+            )
+    
+    text = normalize_text(text, keep_newlines=True)
+    
+    if not text:
+        raise HTTPException(status_code=400, detail="File is empty")
+    
+    return text
+
+
 @router.post("/upload/")
 async def upload_text_file(
     req: Request,
@@ -217,39 +353,7 @@ async def upload_text_file(
     File must contain Urdu text
     """
     try:
-        # Validate file type
-        if not file.filename.endswith('.txt'):
-            raise HTTPException(
-                status_code=400, 
-                detail="Only .txt files are allowed"
-            )
-        
-        # Read file content
-        content = await file.read()
-        
-        # File size limit (1MB)
-        if len(content) > 1024 * 1024:
-            raise HTTPException(
-                status_code=400, 
-                detail="File too large. Max 1MB allowed."
-            )
-        
-        # Decode text (try UTF-8 first, then UTF-16)
-        try:
-            text = content.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                text = content.decode('utf-16')
-            except UnicodeDecodeError:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Could not decode file. Please use UTF-8 encoding."
-                )
-        
-        text = text.strip()
-        
-        if not text:
-            raise HTTPException(status_code=400, detail="File is empty")
+        text = await read_text_upload(file)
         
         # Validate Urdu language
         if not is_urdu_text(text):
@@ -258,31 +362,30 @@ async def upload_text_file(
                 detail="فائل میں صرف اردو متن ہونا چاہیے۔ (File must contain Urdu text only)"
             )
         
-        # Check credits
+        # Reserve credits (checked and taken in one atomic update)
         text_length = len(text)
         db = get_database()
         
-        if not await check_credits_available(db, str(user["_id"]), text_length):
+        reservation = await reserve_credits(db, str(user["_id"]), text_length, "tts")
+        if reservation is None:
             raise HTTPException(
                 status_code=403,
                 detail="کریڈٹس کم ہیں۔ (Not enough credits)"
             )
         
-        # Generate audio
-        audio_bytes = text_to_speech(text=text, voice_id=voice_id)
-        
-        # Save audio file
-        audio_id = uuid.uuid4().hex
-        audio_filename = f"tts_{audio_id}.mp3"
-        audio_path = f".tmp/audio/{audio_filename}"
-        
-        with open(audio_path, "wb") as f:
-            f.write(audio_bytes)
-        
-        estimated_duration = len(text) / 15
-        
-        # Deduct credits
-        await increment_credits_used(db, str(user["_id"]), text_length)
+        try:
+            # Generate audio (long texts are synthesized sentence by sentence in parallel)
+            audio_bytes = await text_to_speech_segmented_async(text=text, voice_id=voice_id)
+            audio_info = mp3.require_audio(audio_bytes)
+            
+            # Save audio file (identical audio is stored once)
+            stored = await audio_store.put(audio_bytes)
+        except BaseException:
+            await refund_credits(db, reservation)
+            raise
+        
+        # Charge the reserved credits
+        await commit_credits(db, reservation)
         
         # Save to history
         await save_tts_history(
@@ -290,16 +393,21 @@ async def upload_text_file(
             user_id=str(user["_id"]),
             mode="upload",
             text=text,
-            audio_path=audio_path,
-            duration=estimated_duration,
-            credits_used=text_length
+            audio_path=stored.path,
+            duration=audio_info.duration,
+            credits_used=text_length,
+            voice_id=voice_id,
+            bitrate=audio_info.bitrate,
+            sample_rate=audio_info.sample_rate
         )
         
         return {
             "success": True,
-            "audio_url": f"{req.base_url}tts/audio/{audio_filename}",
-            "audio_id": audio_id,
-            "duration": round(estimated_duration, 2),
+            "audio_url": f"{req.base_url}tts/audio/{stored.filename}",
+            "audio_id": stored.audio_id,
+            "duration": round(audio_info.duration, 2),
+            "sample_rate": audio_info.sample_rate,
+            "bitrate": audio_info.bitrate,
             "text_length": text_length,
             "credits_used": text_length
         }
@@ -310,12 +418,174 @@ async def upload_text_file(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def run_tts_batch(items: list, voice_id: Optional[str], max_concurrency: Optional[int],
+                        user: dict, base_url: str) -> dict:
+    """
+    Validate, synthesize and record a batch of texts.
+    Credits are reserved once for the whole batch and committed for the
+    items that were delivered; history is written with a single insert_many.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    # Validate every item in one pass and report all problems together
+    errors = []
+    for index, item in enumerate(items):
+        item["text"] = normalize_text(item["text"], keep_newlines=True)
+        if not item["text"]:
+            errors.append({"index": index, "id": item["id"], "error": "Text is required"})
+        elif len(item["text"]) > MAX_CHARS:
+            errors.append({"index": index, "id": item["id"], "error": f"Text exceeds {MAX_CHARS} character limit"})
+        elif not is_urdu_text(item["text"]):
+            errors.append({"index": index, "id": item["id"], "error": "Text must be in Urdu only"})
+    
+    if errors:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "متن صرف اردو میں ہونا چاہیے۔ (Some texts are invalid)", "errors": errors}
+        )
+    
+    # Reserve credits for the whole batch
+    total_length = sum(len(item["text"]) for item in items)
+    db = get_database()
+    user_id = str(user["_id"])
+    
+    reservation = await reserve_credits(db, user_id, total_length, "tts_batch")
+    if reservation is None:
+        raise HTTPException(
+            status_code=403,
+            detail="کریڈٹس کم ہیں۔ پلان اپگریڈ کریں۔ (Not enough credits)"
+        )
+    
+    concurrency = min(max_concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    try:
+        results = await synthesize_batch([item["text"] for item in items], voice_id, concurrency)
+    except BaseException:
+        await refund_credits(db, reservation)
+        raise
+    
+    manifest = [None] * len(items)
+    delivered = []
+    
+    for index, (item, audio) in enumerate(zip(items, results)):
+        if not isinstance(audio, Exception):
+            try:
+                delivered.append((index, item, audio, mp3.require_audio(audio)))
+                continue
+            except ValueError as e:
+                audio = e
+        manifest[index] = {"index": index, "id": item["id"], "success": False, "error": str(audio)}
+    
+    # Store every delivered file in one hop off the event loop
+    try:
+        stored_files = await audio_store.put_many([audio for _, _, audio, _ in delivered])
+    except BaseException:
+        await refund_credits(db, reservation)
+        raise
+    
+    history_docs = []
+    credits_used = 0
+    
+    for (index, item, audio, audio_info), stored in zip(delivered, stored_files):
+        text_length = len(item["text"])
+        history_docs.append(tts_history_doc(
+            user_id=user_id,
+            mode="batch",
+            text=item["text"],
+            audio_path=stored.path,
+            duration=audio_info.duration,
+            credits_used=text_length,
+            voice_id=voice_id,
+            bitrate=audio_info.bitrate,
+            sample_rate=audio_info.sample_rate
+        ))
+        credits_used += text_length
+        manifest[index] = {
+            "index": index,
+            "id": item["id"],
+            "success": True,
+            "audio_url": f"{base_url}tts/audio/{stored.filename}",
+            "audio_id": stored.audio_id,
+            "duration": round(audio_info.duration, 2),
+            "bitrate": audio_info.bitrate,
+            "text_length": text_length
+        }
+    
+    # Charge only the delivered items; the rest of the reservation is refunded
+    await commit_credits(db, reservation, used=credits_used)
+    if history_docs:
+        await history_writer.write(db, *history_docs)
+    
+    return {
+        "success": len(delivered) == len(items),
+        "total": len(items),
+        "succeeded": len(delivered),
+        "failed": len(items) - len(delivered),
+        "credits_used": credits_used,
+        "items": manifest
+    }
+
+
+@router.post("/batch/")
+async def generate_tts_batch(
+    request: TTSBatchRequest,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Generate speech for a list of texts in one request
+    Returns a manifest with one audio URL (or error) per text, in order
+    """
+    try:
+        items = [{"id": str(i), "text": text} for i, text in enumerate(request.texts)]
+        return await run_tts_batch(items, request.voice_id, request.max_concurrency, user, str(req.base_url))
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/upload/")
+async def upload_tts_batch(
+    req: Request,
+    file: UploadFile = File(...),
+    voice_id: Optional[str] = Form(None),
+    max_concurrency: Optional[int] = Form(None),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Generate speech for a batch file
+    Accepts a .zip of .txt files, NDJSON (.ndjson/.jsonl) or a .txt with one text per line
+    """
+    try:
+        content = await file.read()
+        
+        # File size limit (10MB)
+        if len(content) > 10 * 1024 * 1024:
+            raise HTTPException(status_code=400, detail="File too large. Max 10MB allowed.")
+        
+        try:
+            items = parse_batch_file(file.filename, content)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return await run_tts_batch(items, voice_id, max_concurrency, user, str(req.base_url))
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/audio/{filename}")
 async def get_audio_file(filename: str):
     """Serve generated audio files"""
-    file_path = f".tmp/audio/{filename}"
+    file_path = await audio_store.resolve(filename)
     
-    if not os.path.exists(file_path):
+    if not file_path:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     return FileResponse(
@@ -337,19 +607,31 @@ async def validate_urdu_text(text: str):
     }
 
 
-async def save_tts_history(db, user_id: str, mode: str, text: str,
-                           audio_path: str, duration: float, credits_used: int):
-    """Save TTS generation to user history"""
-    history_doc = {
+def tts_history_doc(user_id: str, mode: str, text: str, audio_path: str,
+                    duration: float, credits_used: int, voice_id: str = None,
+                    bitrate: int = None, sample_rate: int = None) -> dict:
+    """Build the history document for one TTS generation"""
+    return {
         "user_id": user_id,
         "action": "tts",
         "mode": mode,
+        "voice_id": voice_id,
         "text": text[:200] + "..." if len(text) > 200 else text,
         "full_text_length": len(text),
         "audio_path": audio_path,
         "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
         "credits_used": credits_used,
         "created_at": datetime.now(timezone.utc)
     }
+
+
+async def save_tts_history(db, user_id: str, mode: str, text: str,
+                           audio_path: str, duration: float, credits_used: int,
+                           voice_id: str = None, bitrate: int = None, sample_rate: int = None):
+    """Save TTS generation to user history"""
+    history_doc = tts_history_doc(user_id, mode, text, audio_path, duration, credits_used,
+                                  voice_id, bitrate, sample_rate)
     
-    await db.history.insert_one(history_doc)
+    await history_writer.write(db, history_doc)
@@ -5,24 +5,22 @@ writes Urdu text, and generates speech
 """
 
 import os
-import re
 import base64
-import uuid
 from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional
 
 from routes.auth_routes import get_current_user
-from execution.tts import text_to_speech
-from database.connection import get_database
-from database.models import increment_credits_used, check_credits_available
+from routes.tts_routes import prepare_generation, stream_and_store
+from execution.tts import text_to_speech_async, open_tts_stream
+from execution.audio_store import audio_store
+from execution import mp3
+from database.models import commit_credits, refund_credits
+from database.history_writer import history_writer
 
 router = APIRouter(prefix="/voice-cloning", tags=["Voice Cloning"])
 
-# Ensure temp directory exists
-os.makedirs(".tmp/audio", exist_ok=True)
-
 # Premium cloned voice mappings
 # These are the 3 female voices - update with actual ElevenLabs voice IDs
 CLONED_VOICES = {
@@ -47,30 +45,6 @@ CLONED_VOICES = {
 }
 
 
-def is_urdu_text(text: str) -> bool:
-    """
-    Validate that text is primarily in Urdu/Arabic script
-    Allows numbers, punctuation, and spaces
-    """
-    if not text or not text.strip():
-        return False
-    
-    # Urdu Unicode range: \u0600-\u06FF (Arabic) and \u0750-\u077F (Arabic Supplement)
-    # Also allow common punctuation, numbers, and spaces
-    urdu_pattern = re.compile(r'^[\u0600-\u06FF\u0750-\u077F\s\d.,!?؟،؛:\-\(\)\[\]\"\']+$')
-    
-    # Check if at least 50% of alphabetic characters are Urdu
-    text_stripped = text.strip()
-    urdu_chars = len(re.findall(r'[\u0600-\u06FF\u0750-\u077F]', text_stripped))
-    total_alpha = len(re.findall(r'[a-zA-Z\u0600-\u06FF\u0750-\u077F]', text_stripped))
-    
-    if total_alpha == 0:
-        return False
-    
-    urdu_ratio = urdu_chars / total_alpha
-    return urdu_ratio >= 0.8  # Must be at least 80% Urdu characters
-
-
 class VoiceCloningRequest(BaseModel):
     """Request model for voice cloning generation"""
     voice_id: str  # "mareeb", "aleeza", or "eiza"
@@ -105,7 +79,6 @@ async def generate_cloned_voice(
     - Text must be in Urdu
     """
     try:
-        text = request.text.strip()
         voice_id = request.voice_id.lower()
         
         # Validate voice selection
@@ -115,51 +88,25 @@ async def generate_cloned_voice(
                 detail=f"Invalid voice. Choose from: {', '.join(CLONED_VOICES.keys())}"
             )
         
-        # Validate text is not empty
-        if not text:
-            raise HTTPException(status_code=400, detail="Text is required")
-        
-        # Character limit
-        MAX_CHARS = 2000
-        if len(text) > MAX_CHARS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Text exceeds {MAX_CHARS} character limit. Current: {len(text)} characters"
-            )
-        
-        # Validate Urdu language
-        if not is_urdu_text(text):
-            raise HTTPException(
-                status_code=400,
-                detail="متن صرف اردو میں ہونا چاہیے۔ (Text must be in Urdu only)"
-            )
-        
-        # Check credits
+        text, db, reservation = await prepare_generation(request.text, user, "voice_cloning")
         text_length = len(text)
-        db = get_database()
-        
-        if not await check_credits_available(db, str(user["_id"]), text_length):
-            raise HTTPException(
-                status_code=403,
-                detail="کریڈٹس کم ہیں۔ پلان اپگریڈ کریں۔ (Not enough credits)"
-            )
         
         # Get ElevenLabs voice ID
         elevenlabs_voice_id = CLONED_VOICES[voice_id]["elevenlabs_id"]
         
-        # Generate audio
-        audio_bytes = text_to_speech(text=text, voice_id=elevenlabs_voice_id)
+        try:
+            # Generate audio
+            audio_bytes = await text_to_speech_async(text=text, voice_id=elevenlabs_voice_id)
+            audio_info = mp3.require_audio(audio_bytes)
+            
+            # Save audio file (identical audio is stored once)
+            stored = await audio_store.put(audio_bytes)
+        except BaseException:
+            await refund_credits(db, reservation)
+            raise
         
-        # Save audio file
-        audio_id = uuid.uuid4().hex
-        audio_filename = f"clone_{audio_id}.mp3"
-        audio_path = f".tmp/audio/{audio_filename}"
-        
-        with open(audio_path, "wb") as f:
-            f.write(audio_bytes)
-        
-        # Deduct credits
-        await increment_credits_used(db, str(user["_id"]), text_length)
+        # Charge the reserved credits
+        await commit_credits(db, reservation)
         
         # Save to history
         await save_clone_history(
@@ -168,15 +115,21 @@ async def generate_cloned_voice(
             voice_id=voice_id,
             voice_name=CLONED_VOICES[voice_id]["name"],
             text=text,
-            audio_path=audio_path,
-            credits_used=text_length
+            audio_path=stored.path,
+            credits_used=text_length,
+            duration=audio_info.duration,
+            bitrate=audio_info.bitrate,
+            sample_rate=audio_info.sample_rate
         )
         
         return {
             "success": True,
-            "audio_url": f"{req.base_url}voice-cloning/audio/{audio_filename}",
-            "audio_id": audio_id,
+            "audio_url": f"{req.base_url}voice-cloning/audio/{stored.filename}",
+            "audio_id": stored.audio_id,
             "voice": CLONED_VOICES[voice_id]["name"],
+            "duration": round(audio_info.duration, 2),
+            "sample_rate": audio_info.sample_rate,
+            "bitrate": audio_info.bitrate,
             "text_length": text_length,
             "credits_used": text_length
         }
@@ -187,12 +140,74 @@ async def generate_cloned_voice(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/stream/")
+async def stream_cloned_voice(
+    request: VoiceCloningRequest,
+    req: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Generate speech with a premium cloned voice and stream it back.
+    The audio is saved as it arrives; credits and history are recorded
+    once the stream completes. X-Audio-Url serves the saved file afterwards.
+    """
+    try:
+        voice_id = request.voice_id.lower()
+        
+        # Validate voice selection
+        if voice_id not in CLONED_VOICES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid voice. Choose from: {', '.join(CLONED_VOICES.keys())}"
+            )
+        
+        text, db, reservation = await prepare_generation(request.text, user, "voice_cloning")
+        text_length = len(text)
+        user_id = str(user["_id"])
+        
+        # Start the provider stream (errors surface here, before headers are sent)
+        try:
+            chunks = await open_tts_stream(
+                text=text, voice_id=CLONED_VOICES[voice_id]["elevenlabs_id"]
+            )
+        except BaseException:
+            await refund_credits(db, reservation)
+            raise
+        
+        audio_id = audio_store.new_stream_id()
+        
+        async def finalize(stored, audio_info):
+            await save_clone_history(
+                db,
+                user_id=user_id,
+                voice_id=voice_id,
+                voice_name=CLONED_VOICES[voice_id]["name"],
+                text=text,
+                audio_path=stored.path,
+                credits_used=text_length,
+                duration=audio_info.duration,
+                bitrate=audio_info.bitrate,
+                sample_rate=audio_info.sample_rate
+            )
+        
+        return stream_and_store(chunks, audio_id, finalize, db, reservation, headers={
+            "X-Audio-Id": audio_id,
+            "X-Audio-Url": f"{req.base_url}voice-cloning/audio/{audio_id}.mp3",
+            "X-Credits-Used": str(text_length)
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/audio/{filename}")
 async def get_cloned_audio(filename: str):
     """Serve generated audio files"""
-    file_path = f".tmp/audio/{filename}"
+    file_path = await audio_store.resolve(filename)
     
-    if not os.path.exists(file_path):
+    if not file_path:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     from fastapi.responses import FileResponse
@@ -204,7 +219,8 @@ async def get_cloned_audio(filename: str):
 
 
 async def save_clone_history(db, user_id: str, voice_id: str, voice_name: str,
-                             text: str, audio_path: str, credits_used: int):
+                             text: str, audio_path: str, credits_used: int,
+                             duration: float = None, bitrate: int = None, sample_rate: int = None):
     """Save voice cloning generation to user history"""
     history_doc = {
         "user_id": user_id,
@@ -214,8 +230,11 @@ async def save_clone_history(db, user_id: str, voice_id: str, voice_name: str,
         "text": text[:200] + "..." if len(text) > 200 else text,
         "full_text_length": len(text),
         "audio_path": audio_path,
+        "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
         "credits_used": credits_used,
         "created_at": datetime.now(timezone.utc)
     }
     
-    await db.history.insert_one(history_doc)
+    await history_writer.write(db, history_doc)
@@ -4,13 +4,13 @@ FastAPI server connecting frontend to ElevenLabs APIs with MongoDB
 """
 
 import os
-import io
 import base64
 import uuid
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -18,11 +18,21 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import our execution scripts
-from execution.tts import text_to_speech
-from execution.clone_voice import clone_voice, list_voices, delete_voice
+from execution.tts import text_to_speech_async, open_tts_stream, tts_flights
+from execution.clone_voice import clone_voice_async, list_voices_async, delete_voice_async
+from execution.elevenlabs_client import warm_up, close_async_client
+from execution.governor import provider_governor
+from execution.resilience import provider_breaker
+from execution.audio_cache import tts_cache
+from execution.audio_store import audio_store
+from execution.phrase_cache import phrase_cache
+from execution.prewarm import PREWARM_ENABLED, prewarm_loop
+from execution.jobs import job_queue
 
 # Database connection
-from database.connection import connect_to_mongodb, close_mongodb_connection
+from database.connection import connect_to_mongodb, close_mongodb_connection, get_database
+from database.user_cache import user_cache, watch_user_changes, USER_CACHE_CHANGE_STREAM
+from database.history_writer import history_writer
 
 # Auth routes
 from routes.auth_routes import router as auth_router
@@ -30,6 +40,7 @@ from routes.tts_routes import router as tts_router
 from routes.sts_routes import router as sts_router
 from routes.voice_routes import router as voice_router
 from routes.history_routes import router as history_router
+from routes.job_routes import router as job_router
 
 
 # Lifespan handler for startup/shutdown
@@ -41,8 +52,52 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ MongoDB not connected: {e}")
         print("   Auth features will not work until MongoDB is running")
+    
+    # Open pooled ElevenLabs connections before the first request
+    try:
+        warmed = await warm_up()
+        if warmed:
+            print(f"🔌 ElevenLabs connection pool warmed ({warmed} connections)")
+    except Exception as e:
+        print(f"⚠️ ElevenLabs warm-up failed: {e}")
+    
+    # Size outbound concurrency to the ElevenLabs plan
+    try:
+        limit = await provider_governor.configure_from_plan()
+        print(f"🚦 ElevenLabs concurrency limit: {limit} ({provider_governor.tier} plan)")
+    except Exception as e:
+        print(f"⚠️ ElevenLabs plan lookup failed, using default concurrency: {e}")
+    
+    # Index cached audio so the first repeat request is a hit
+    await tts_cache.load()
+    
+    # Index stored audio for eviction (and evict what is over the limits)
+    await audio_store.load()
+    
+    # Render popular (text, voice) pairs into the cache in the background
+    prewarm_task = None
+    if PREWARM_ENABLED:
+        prewarm_task = asyncio.create_task(prewarm_loop(get_database))
+    
+    # Evict cached users changed by other workers
+    user_watch_task = None
+    if USER_CACHE_CHANGE_STREAM:
+        user_watch_task = asyncio.create_task(watch_user_changes(get_database()))
+    
+    # Buffered history inserts (replays items spilled by the last run)
+    await history_writer.start(get_database)
+    
+    # Background job workers (also resume jobs left unfinished by the last run)
+    await job_queue.start(get_database)
     yield
     # Shutdown
+    if prewarm_task:
+        prewarm_task.cancel()
+    if user_watch_task:
+        user_watch_task.cancel()
+    await job_queue.stop()
+    await history_writer.stop()  # After the jobs, which save history too
+    await close_async_client()
     await close_mongodb_connection()
 
 
@@ -59,6 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Audio-Id", "X-Audio-Url", "X-Credits-Used"],
 )
 
 # Include all routes
@@ -67,10 +123,16 @@ app.include_router(tts_router)
 app.include_router(sts_router)
 app.include_router(voice_router)
 app.include_router(history_router)
+app.include_router(job_router)
 
-# Static files for audio
-from fastapi.staticfiles import StaticFiles
-app.mount("/static/audio", StaticFiles(directory=".tmp/audio"), name="static_audio")
+# Audio files by name (history links use the file name of audio_path)
+@app.get("/static/audio/{filename}")
+async def get_static_audio(filename: str):
+    """Serve stored audio files"""
+    file_path = await audio_store.resolve(filename)
+    if not file_path:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    return FileResponse(file_path, media_type="audio/mpeg", filename=filename)
 
 
 # ==================== Models ====================
@@ -112,7 +174,7 @@ async def generate_tts(request: TTSRequest):
             raise HTTPException(status_code=400, detail="Text is required")
         
         # Generate audio
-        audio_bytes = text_to_speech(
+        audio_bytes = await text_to_speech_async(
             text=request.text,
             voice_id=request.voice_id
         )
@@ -133,19 +195,26 @@ async def generate_tts(request: TTSRequest):
 
 @app.post("/api/tts/stream")
 async def stream_tts(request: TTSRequest):
-    """Stream TTS audio"""
+    """Stream TTS audio as it is synthesized"""
     try:
-        audio_bytes = text_to_speech(
+        if not request.text:
+            raise HTTPException(status_code=400, detail="Text is required")
+        
+        # Chunks are forwarded as they arrive from ElevenLabs; each send waits
+        # on the client connection, which paces the upstream read
+        chunks = await open_tts_stream(
             text=request.text,
             voice_id=request.voice_id
         )
         
         return StreamingResponse(
-            io.BytesIO(audio_bytes),
+            chunks,
             media_type="audio/mpeg",
             headers={"Content-Disposition": "attachment; filename=speech.mp3"}
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -168,9 +237,9 @@ async def convert_voice(
             f.write(content)
         
         # Import and use STS
-        from execution.sts import speech_to_speech
+        from execution.sts import speech_to_speech_async
         
-        audio_bytes = speech_to_speech(temp_path, voice_id)
+        audio_bytes = await speech_to_speech_async(temp_path, voice_id)
         
         # Cleanup
         os.remove(temp_path)
@@ -206,7 +275,7 @@ async def clone_new_voice(
             f.write(content)
         
         # Clone voice
-        result = clone_voice(name, [temp_path])
+        result = await clone_voice_async(name, [temp_path])
         
         # Cleanup
         os.remove(temp_path)
@@ -225,7 +294,7 @@ async def clone_new_voice(
 async def get_voices():
     """Get list of all available voices"""
     try:
-        voices = list_voices()
+        voices = await list_voices_async()
         
         # Format for frontend
         formatted = []
@@ -250,7 +319,7 @@ async def get_voices():
 async def remove_voice(voice_id: str):
     """Delete a cloned voice"""
     try:
-        delete_voice(voice_id)
+        await delete_voice_async(voice_id)
         return {"success": True, "message": f"Voice {voice_id} deleted"}
     
     except Exception as e:
@@ -274,8 +343,8 @@ async def get_analytics(admin_key: str = ""):
     verify_admin(admin_key)
     
     try:
-        from execution.analytics import get_admin_dashboard
-        return get_admin_dashboard()
+        from execution.analytics import get_admin_dashboard_async
+        return await get_admin_dashboard_async()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -286,12 +355,41 @@ async def get_elevenlabs_usage(admin_key: str = ""):
     verify_admin(admin_key)
     
     try:
-        from execution.analytics import get_elevenlabs_analytics
-        return get_elevenlabs_analytics()
+        from execution.analytics import get_elevenlabs_analytics_async
+        return await get_elevenlabs_analytics_async()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/cache")
+async def get_cache_stats(admin_key: str = ""):
+    """Get TTS audio cache, audio store, request coalescing, user cache, job queue and history writer statistics"""
+    verify_admin(admin_key)
+    
+    return {
+        "success": True,
+        "tts_cache": tts_cache.stats(),
+        "audio_store": audio_store.stats(),
+        "phrase_cache": phrase_cache.stats(),
+        "tts_coalescing": tts_flights.stats(),
+        "user_cache": user_cache.stats(),
+        "jobs": job_queue.stats(),
+        "history_writer": history_writer.stats()
+    }
+
+
+@app.get("/api/admin/provider")
+async def get_provider_stats(admin_key: str = ""):
+    """Get ElevenLabs rate limiting, concurrency and circuit breaker statistics"""
+    verify_admin(admin_key)
+    
+    return {
+        "success": True,
+        "governor": provider_governor.stats(),
+        "circuit_breaker": provider_breaker.stats()
+    }
+
+
 # Gemini endpoint removed - STT not used
 
 